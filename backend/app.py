@@ -1,13 +1,201 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Annotated, AsyncIterator, Dict, List, Optional, Tuple, Union
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+import asyncio
+import json
 import os
+import secrets
+import time
 import httpx
-from bs4 import BeautifulSoup
-import re
+from urllib.parse import quote, urlencode
+
+from backend.services.cache import SingleFlight
+from backend.services.cache_backends import JsonCache, backend_from_env
+from backend.services.compression import CompressionMiddleware, choose_encoding
+from backend.services.http_client import HttpClientManager
+from backend.services import image_cache as image_cache_status
+from backend.services.image_cache import ImageCache
+from backend.services.dedup import duplicate_groups
+from backend.services.domains import DomainIndex
+from backend.services.keywords import KeywordMatcher, KeywordMatches
+from backend.services import metrics
+from backend.services.logging_setup import (
+    get_logger,
+    request_id_from_header,
+    set_request_id,
+    setup_logging,
+    shutdown_logging,
+)
+from backend.services.parse_pool import ParseExecutor, ParseExecutorSaturated
+from backend.services.prefetch import PrefetchConfig, PrefetchScheduler
+from backend.services.queries import DUPE_QUERY_TERMS, SimilarQueryIndex, normalize_query
+from backend.services.profiling import ProfileConfig, ProfileStore, RequestProfiler
+from backend.services.response_cache import HIT, ResponseCache, etag_matches
+from backend.services.scrape_scheduler import CircuitOpen, ScrapeScheduler
+from backend.services.static_site import StaticSite
+from backend.services.prices import comparable_amounts, parse_price, parse_prices
+from backend.services.scoring import score_batch
+from backend.services.thumbnails import (
+    MEDIA_TYPES,
+    ThumbnailCache,
+    make_thumbnail,
+    placeholder_svg,
+    sign_url,
+    thumbnail_format,
+    verify_url,
+)
+from backend.services.urls import canonical_url
+from backend.services.image_extract import HeadScanner, ImageHit, ProductPage, extract_image
+
+log = get_logger("api")
+search_log = get_logger("search")
+scrape_log = get_logger("scrape")
+image_log = get_logger("images")
+
+# App-lifetime HTTP clients (pooled connections, keep-alive, DNS cache)
+http_clients = HttpClientManager()
+
+# Persistent product URL -> image cache (with negative entries)
+image_cache = ImageCache.from_env()
+
+# HTML parsing runs in a bounded process pool so the event loop stays free
+parse_executor = ParseExecutor.from_env()
+
+# Global/per-host scrape limits, circuit breakers and adaptive timeouts
+scrape_scheduler = ScrapeScheduler.from_env()
+
+# Opt-in per-request profiling (PROFILING_ENABLED) and its bounded capture directory
+profiling_config = ProfileConfig.from_env()
+profile_store = ProfileStore(profiling_config.directory, profiling_config.max_files, profiling_config.max_bytes)
+
+# Metrics served on /metrics (Prometheus text format)
+metrics_registry = metrics.MetricsRegistry()
+REQUEST_SECONDS = metrics_registry.histogram(
+    "dupefinder_http_request_seconds", "Time to response start by route", ("method", "route", "status")
+)
+TAVILY_SECONDS = metrics_registry.histogram("dupefinder_tavily_seconds", "Tavily API call latency")
+SCRAPE_SECONDS = metrics_registry.histogram(
+    "dupefinder_scrape_seconds", "Product page fetch latency by host", ("host",), max_series=200
+)
+PARSE_SECONDS = metrics_registry.histogram("dupefinder_parse_seconds", "Image extraction time (incl. queueing)")
+STAGE_SECONDS = metrics_registry.histogram(
+    "dupefinder_stage_seconds", "Time spent in pipeline stages", ("stage",)
+)
+IMAGE_STRATEGY = metrics_registry.counter(
+    "dupefinder_image_strategy_total", "Scraped images by winning extraction strategy", ("strategy",)
+)
+CACHE_LOOKUPS = metrics_registry.counter(
+    "dupefinder_cache_lookups_total", "Cache lookups by cache and result", ("cache", "result")
+)
+TIMEOUTS = metrics_registry.counter("dupefinder_timeouts_total", "Upstream timeouts", ("upstream",))
+SCRAPE_FAILURES = metrics_registry.counter(
+    "dupefinder_scrape_failures_total", "Scrapes that failed or were skipped", ("reason",)
+)
+FILTER_REJECTIONS = metrics_registry.counter(
+    "dupefinder_filter_rejections_total", "Search results dropped by the filters", ("reason",)
+)
+
+
+def parse_queue_depth() -> float:
+    stats = parse_executor.stats()
+    return stats["running"] + stats["queued"]
+
+
+metrics_registry.gauge("dupefinder_parse_queue", "Parse jobs running or queued", fn=parse_queue_depth)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared resources at startup and release them at shutdown"""
+    setup_logging()
+    await http_clients.startup()
+    image_cache.purge_expired()
+    parse_executor.start()
+    if SERVE_FRONTEND:
+        await asyncio.to_thread(static_site.load)
+    if prefetch_config.enabled and TAVILY_API_KEY:
+        prefetcher.start()
+    try:
+        yield
+    finally:
+        await prefetcher.stop()
+        await http_clients.shutdown()
+        image_cache.close()
+        tavily_cache.backend.close()
+        response_cache.backend.close()
+        parse_executor.shutdown()
+        shutdown_logging()
+
+
+app = FastAPI(title="DupeFinder API", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    """Tag the request with a correlation ID, record its time and add a
+    Server-Timing header with per-stage durations
+
+    For streamed responses the time covers the work done before the first byte.
+    A request carrying ``X-Profile`` (or ``?profile=``) is profiled when
+    profiling is enabled; see backend/services/profiling.py.
+    """
+    request_id = request_id_from_header(request.headers.get("x-request-id"))
+    set_request_id(request_id)
+    timings = metrics.begin_request()
+    profiler = timeline = None
+    profile_requested = profiling_config.requested(
+        request.headers.get("x-profile") or request.query_params.get("profile")
+    )
+    if profile_requested:
+        profiler = RequestProfiler.start()
+        if profiler:
+            timeline = metrics.begin_timeline()
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        if profiler:
+            profiler.stop()
+    elapsed = time.perf_counter() - started
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    REQUEST_SECONDS.observe(elapsed, method=request.method, route=route, status=str(response.status_code))
+    log.info("request", extra={
+        "method": request.method,
+        "route": route,
+        "status": response.status_code,
+        "duration_ms": round(elapsed * 1000, 1),
+    })
+    response.headers["Server-Timing"] = metrics.server_timing_header(timings, total=elapsed)
+    response.headers["X-Request-ID"] = request_id
+    if profiler:
+        details = {
+            "method": request.method,
+            "path": request.url.path,
+            "query": {k: v for k, v in request.query_params.items() if k != "profile"},
+            "status": response.status_code,
+            "request_id": request_id,
+        }
+        response.headers["X-Profile-Id"] = await asyncio.to_thread(
+            save_profile, profiler, details, dict(timings), list(timeline)
+        )
+    elif profile_requested:
+        response.headers["X-Profile-Id"] = "busy"
+    return response
+
+
+def save_profile(profiler: RequestProfiler, details: dict, timings: dict, timeline: list) -> str:
+    """Summarize and store a capture (runs in a worker thread)"""
+    report = profiler.report(details, timings, timeline, profiling_config.top_functions)
+    profile_id = profile_store.save(profiler, report)
+    log.info("profile captured", extra={
+        "profile_id": profile_id, "request_id": details["request_id"], "duration_ms": report["duration_ms"],
+    })
+    return profile_id
 
-app = FastAPI(title="DupeFinder API")
 
 # CORS middleware for frontend
 app.add_middleware(
@@ -18,7 +206,79 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for API responses (streamed responses are left alone)
+if os.getenv("COMPRESSION_ENABLED", "1").lower() not in ("0", "false", "no"):
+    app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("COMPRESSION_MIN_BYTES", "1024")))
+
+# The frontend is served same-origin from / with hashed, precompressed assets
+# (SERVE_FRONTEND=0 when it is hosted elsewhere)
+SERVE_FRONTEND = os.getenv("SERVE_FRONTEND", "1").lower() not in ("0", "false", "no")
+FRONTEND_DIR = os.getenv(
+    "FRONTEND_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "frontend")
+)
+static_site = StaticSite(FRONTEND_DIR)
+
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+# Point at a local stand-in (benchmarks/stubs.py) for offline runs
+TAVILY_API_URL = os.getenv("TAVILY_API_URL", "https://api.tavily.com/search")
+
+# Tavily response cache: popular queries are answered from the cache backend
+# (in-process unless TAVILY_CACHE_BACKEND/CACHE_BACKEND names a shared one),
+# and concurrent identical misses share a single upstream call.
+TAVILY_CACHE_TTL = float(os.getenv("TAVILY_CACHE_TTL", "900"))
+TAVILY_CACHE_SIZE = int(os.getenv("TAVILY_CACHE_SIZE", "1024"))
+tavily_cache = JsonCache(backend_from_env("TAVILY", "memory://", TAVILY_CACHE_SIZE), "tavily", TAVILY_CACHE_TTL)
+tavily_inflight = SingleFlight()
+
+# Serialized /search and /dupes responses, with ETags and stale-while-revalidate
+response_cache = ResponseCache.from_env()
+
+# Set while the prefetcher recomputes a response: caches are refreshed, not read
+prefetching: ContextVar[bool] = ContextVar("prefetching", default=False)
+
+# /dupes answers a near-identical query (token-set Jaccard at or above the
+# threshold, no differing gender/size/model token) from a fresh result;
+# QUERY_SIMILARITY_THRESHOLD=1 turns this off
+query_index = SimilarQueryIndex(
+    threshold=float(os.getenv("QUERY_SIMILARITY_THRESHOLD", "0.8")),
+    maxsize=int(os.getenv("QUERY_INDEX_SIZE", "2048")),
+)
+
+# Product-page scraping: stream bodies and stop early, never read past the cap
+SCRAPE_STREAMING = os.getenv("SCRAPE_STREAMING", "1").lower() not in ("0", "false", "no")
+SCRAPE_MAX_BYTES = int(os.getenv("SCRAPE_MAX_BYTES", str(1536 * 1024)))
+
+# Image extraction: "fast" single-pass byte scanner (default) or "bs4";
+# IMAGE_PARSER_BS4_FALLBACK=1 also runs BeautifulSoup when the fast path misses
+IMAGE_PARSER = os.getenv("IMAGE_PARSER", "fast").lower()
+IMAGE_PARSER_BS4_FALLBACK = os.getenv("IMAGE_PARSER_BS4_FALLBACK", "0").lower() in ("1", "true", "yes")
+
+# POST /dupes/batch: queries per call and how many of them run at once
+DUPES_BATCH_MAX_QUERIES = int(os.getenv("DUPES_BATCH_MAX_QUERIES", "100"))
+DUPES_BATCH_CONCURRENCY = int(os.getenv("DUPES_BATCH_CONCURRENCY", "4"))
+
+# Collapse repeated products (tracking links, mobile hosts, colour variants,
+# near-identical titles on one site) before any page is scraped
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1").lower() not in ("0", "false", "no")
+DEDUP_TITLE_THRESHOLD = float(os.getenv("DEDUP_TITLE_THRESHOLD", "0.8"))
+
+# Image proxy: items carry signed /img URLs that serve resized thumbnails from
+# a size-bounded disk cache. Set IMAGE_PROXY_SECRET when running several
+# workers so they all accept each other's URLs.
+IMAGE_PROXY_ENABLED = os.getenv("IMAGE_PROXY_ENABLED", "1").lower() not in ("0", "false", "no")
+IMAGE_PROXY_SECRET = (os.getenv("IMAGE_PROXY_SECRET") or secrets.token_hex(16)).encode()
+IMAGE_PROXY_MAX_BYTES = int(os.getenv("IMAGE_PROXY_MAX_BYTES", str(8 * 1024 * 1024)))
+IMAGE_PROXY_FORMAT = thumbnail_format(os.getenv("IMAGE_PROXY_FORMAT", "webp").lower())
+THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT = 400, 500
+# Sizes /img renders: the result card and the detail view. Signatures cover
+# only the image URL, so a fixed set keeps each one to a few cached copies.
+THUMBNAIL_SIZES = {(THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT), (600, 750)}
+IMMUTABLE = "public, max-age=31536000, immutable"
+thumbnail_cache = ThumbnailCache(
+    os.getenv("IMAGE_PROXY_CACHE_DIR", os.path.join(".cache", "thumbnails")),
+    int(float(os.getenv("IMAGE_PROXY_CACHE_MB", "256")) * 1024 * 1024),
+)
+thumbnail_inflight = SingleFlight()
 
 
 class SearchResult(BaseModel):
@@ -44,6 +304,14 @@ class DupeItem(BaseModel):
     dupeScore: int
     reason: str
     image: Optional[str] = None
+    thumbnail: Optional[str] = None
+
+
+class DupesBatchRequest(BaseModel):
+    queries: List[Annotated[str, Field(min_length=2, max_length=256)]] = Field(
+        ..., min_length=1, max_length=DUPES_BATCH_MAX_QUERIES
+    )
+    max_results: int = Field(16, ge=1, le=30)
 
 
 class DupeResponse(BaseModel):
@@ -57,262 +325,305 @@ def healthz():
     return {"ok": True}
 
 
-async def tavily_search(query: str, max_results: int):
-    """Call Tavily API"""
+@app.get("/stats")
+def stats():
+    """Cache and parse-executor statistics (including executor saturation)"""
+    return {
+        "tavily_cache": tavily_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "similar_queries": query_index.stats(),
+        "prefetch": prefetcher.stats(),
+        "image_cache": image_cache.stats(),
+        "thumbnails": thumbnail_cache.stats(),
+        "frontend": static_site.stats(),
+        "parse_executor": parse_executor.stats(),
+        "scrape_hosts": scrape_scheduler.stats(),
+        "site_index": SITE_INDEX.stats(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """Prometheus metrics"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+
+def require_profile_admin(x_profile_token: Optional[str] = Header(None)):
+    if not profiling_config.enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiling_config.authorized(x_profile_token):
+        raise HTTPException(status_code=403, detail="Invalid profile token")
+
+
+@app.get("/admin/profiles", dependencies=[Depends(require_profile_admin)])
+def list_profiles():
+    """Stored request profiles, newest first"""
+    return {"profiles": profile_store.list()}
+
+
+@app.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_profile_admin)])
+def download_profile(profile_id: str, format: str = Query("json", pattern="^(json|pstats)$")):
+    """Download a profile: the JSON report (stages, timeline, top functions) or raw pstats"""
+    ext = "prof" if format == "pstats" else "json"
+    path = profile_store.path(profile_id, ext)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "application/octet-stream" if ext == "prof" else "application/json"
+    return FileResponse(path, media_type=media_type, filename=f"{profile_id}.{ext}")
+
+
+def thumbnail_url(image: Optional[str], width: int = THUMBNAIL_WIDTH, height: int = THUMBNAIL_HEIGHT) -> Optional[str]:
+    """Signed /img URL for a remote product image (None for placeholders or when the proxy is off)"""
+    if not IMAGE_PROXY_ENABLED or not image or not image.startswith(("http://", "https://")):
+        return None
+    return "/img?" + urlencode({"url": image, "w": width, "h": height, "sig": sign_url(IMAGE_PROXY_SECRET, image)})
+
+
+def placeholder_url(text: str, width: int = THUMBNAIL_WIDTH, height: int = THUMBNAIL_HEIGHT) -> str:
+    return "/img/placeholder?" + urlencode({"w": width, "h": height, "text": text})
+
+
+async def fetch_image_bytes(url: str) -> Tuple[bytes, str]:
+    """Download an image (at most IMAGE_PROXY_MAX_BYTES); returns (body, content type)"""
+    async with http_clients.scrape.stream("GET", url) as response:
+        response.raise_for_status()
+        content_type = response.headers.get("content-type", "")
+        if content_type.startswith("text/"):
+            raise ValueError(f"Not an image: {content_type}")
+        chunks, received = [], 0
+        async for chunk in response.aiter_bytes():
+            received += len(chunk)
+            if received > IMAGE_PROXY_MAX_BYTES:
+                raise ValueError("Image too large")
+            chunks.append(chunk)
+    return b"".join(chunks), content_type
+
+
+async def build_thumbnail(url: str, width: int, height: int, key: str) -> str:
+    """Fetch, resize (in the parse executor) and store a thumbnail; returns its path"""
+    host = extract_site(url) or ""
+    with metrics.stage("thumbnail", STAGE_SECONDS, stage="thumbnail"):
+        data, content_type = await scrape_scheduler.run(host, lambda: fetch_image_bytes(url))
+        thumb, ext = await parse_executor.run(make_thumbnail, data, width, height, IMAGE_PROXY_FORMAT, content_type)
+    return await asyncio.to_thread(thumbnail_cache.put, key, thumb, ext)
+
+
+@app.get("/img/placeholder")
+def image_placeholder(
+    w: int = Query(THUMBNAIL_WIDTH, ge=16, le=1600),
+    h: int = Query(THUMBNAIL_HEIGHT, ge=16, le=2000),
+    text: str = Query("No Image", max_length=40),
+):
+    """Locally drawn placeholder tile (SVG)"""
+    return Response(placeholder_svg(w, h, text), media_type="image/svg+xml", headers={"Cache-Control": IMMUTABLE})
+
+
+@app.get("/img")
+async def image_proxy(
+    url: str = Query(..., max_length=2048),
+    sig: str = Query(..., max_length=64),
+    w: int = Query(THUMBNAIL_WIDTH),
+    h: int = Query(THUMBNAIL_HEIGHT),
+):
+    """Resized, cached copy of a product image handed out by this API
+
+    The image is fetched once per size (one of THUMBNAIL_SIZES) and kept on
+    disk; if it cannot be fetched or decoded a placeholder is served with a
+    short max-age so a later request retries.
+    """
+    if not url.startswith(("http://", "https://")) or not verify_url(IMAGE_PROXY_SECRET, url, sig):
+        raise HTTPException(status_code=403, detail="Invalid image signature")
+    if (w, h) not in THUMBNAIL_SIZES:
+        raise HTTPException(status_code=400, detail="Unsupported thumbnail size")
+    key = ThumbnailCache.key(url, w, h, IMAGE_PROXY_FORMAT)
+    path = await asyncio.to_thread(thumbnail_cache.get, key)
+    CACHE_LOOKUPS.inc(cache="thumbnail", result="miss" if path is None else "hit")
+    if path is None:
+        try:
+            path = await thumbnail_inflight.do(key, lambda: build_thumbnail(url, w, h, key))
+        except (httpx.HTTPError, CircuitOpen, ParseExecutorSaturated, asyncio.TimeoutError, ValueError, OSError) as e:
+            image_log.info("thumbnail fallback", extra={"url": url, "error": f"{type(e).__name__}: {e}"[:200]})
+            return Response(
+                placeholder_svg(w, h, "No Image"),
+                media_type="image/svg+xml",
+                headers={"Cache-Control": "public, max-age=300", "X-Image-Proxy": "fallback"},
+            )
+    ext = path.rsplit(".", 1)[1]
+    return FileResponse(path, media_type=MEDIA_TYPES[ext], headers={"Cache-Control": IMMUTABLE})
+
+
+def serve_static(request: Request, path: str) -> Response:
+    """A frontend file in the client's preferred precompressed encoding"""
+    f = static_site.get(path) if SERVE_FRONTEND else None
+    if f is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    headers = {
+        "ETag": f.etag,
+        "Cache-Control": IMMUTABLE if f.immutable else "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), f.etag.removeprefix("W/")):
+        return Response(status_code=304, headers=headers)
+    encoding = choose_encoding(request.headers.get("accept-encoding"), f.variants)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(f.variants[encoding] if encoding else f.body, media_type=f.media_type, headers=headers)
+
+
+@app.get("/", include_in_schema=False)
+def frontend_index(request: Request):
+    return serve_static(request, "index.html")
+
+
+@app.get("/assets/{path:path}", include_in_schema=False)
+def frontend_asset(request: Request, path: str):
+    return serve_static(request, "assets/" + path)
+
+
+def tavily_cache_key(query: str, search_depth: str, max_results: int):
+    """Cache key for a Tavily call: normalized query, depth and result count"""
+    return (normalize_query(query), search_depth, max_results)
+
+
+async def cached_json_response(request: Request, key, compute, similar: bool = False) -> Response:
+    """Serve JSON bytes from the response cache, answering If-None-Match with 304
+
+    ``compute`` produces the serialized body on a miss. A request sending
+    ``Cache-Control: no-cache`` skips the lookup and refreshes the entry.
+    With ``similar`` (keys are ``(kind, normalized query, max_results)``) a
+    miss is first offered the fresh entry of a near-identical query; the
+    response then names it in ``X-Similar-Query`` and ``X-Query-Similarity``.
+    """
+    revalidate = "no-cache" in request.headers.get("cache-control", "").lower()
+    entry, extra = None, {}
+    if similar:
+        kind, query, size = key
+        if not revalidate and not response_cache.contains(key):
+            for other, score in query_index.similar((kind, size), query):
+                entry = response_cache.fresh((kind, other, size))
+                if entry is not None:
+                    query_index.matches += 1
+                    status = HIT
+                    extra = {"X-Similar-Query": quote(other, safe=" "), "X-Query-Similarity": str(score)}
+                    break
+    if entry is None:
+        entry, status = await response_cache.get_or_compute(key, compute, revalidate)
+        if similar:
+            # Only queries with a stored answer are worth offering to others
+            query_index.add((kind, size), query)
+    CACHE_LOOKUPS.inc(cache="response", result=status)
+    headers = {"ETag": entry.etag, "Cache-Control": response_cache.cache_control(entry), "X-Cache": status, **extra}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
+async def tavily_search(query: str, max_results: int, search_depth: str = "basic"):
+    """Call Tavily API (cached, with concurrent identical calls coalesced)"""
     if not TAVILY_API_KEY:
         raise HTTPException(status_code=500, detail="Missing TAVILY_API_KEY")
-    
-    payload = {
-        "api_key": TAVILY_API_KEY,
-        "query": query,
-        "search_depth": "basic",
-        "max_results": max_results,
-        "include_answer": False,
-        "include_images": True,
-    }
-    
-    async with httpx.AsyncClient(timeout=20) as client:
-        r = await client.post("https://api.tavily.com/search", json=payload)
+
+    key = tavily_cache_key(query, search_depth, max_results)
+    # A prefetch refresh replaces the entry before it expires
+    cached = None if prefetching.get() else tavily_cache.get(key)
+    if cached is not None:
+        CACHE_LOOKUPS.inc(cache="tavily", result="hit")
+        return cached
+    CACHE_LOOKUPS.inc(cache="tavily", result="miss")
+
+    async def fetch():
+        payload = {
+            "api_key": TAVILY_API_KEY,
+            "query": query,
+            "search_depth": search_depth,
+            "max_results": max_results,
+            "include_answer": False,
+            "include_images": True,
+        }
+
+        search_log.info("tavily search", extra={"query": query, "max_results": max_results, "depth": search_depth})
+        try:
+            with metrics.stage("tavily", TAVILY_SECONDS):
+                r = await http_clients.tavily.post(TAVILY_API_URL, json=payload)
+        except httpx.TimeoutException:
+            TIMEOUTS.inc(upstream="tavily")
+            search_log.warning("tavily timeout", extra={"query": query})
+            raise
         r.raise_for_status()
-        return r.json()
+        data = r.json()
+        tavily_cache.set(key, data)
+        return data
 
+    return await tavily_inflight.do(key, fetch)
 
-async def fetch_product_image(url: str) -> Optional[str]:
-    """Scrape the actual product image from a product page - OPTIMIZED"""
-    try:
-        async with httpx.AsyncClient(timeout=6, follow_redirects=True) as client:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            }
-            
-            response = await client.get(url, headers=headers)
-            
-            if response.status_code != 200:
-                return None
-            
-            soup = BeautifulSoup(response.text, 'lxml')
-            text = response.text or ''
-            
-            # Strategy 0: JSON-LD (ld+json) - structured product data often contains images
-            try:
-                for script in soup.find_all('script', type='application/ld+json'):
-                    try:
-                        import json
-                        data = json.loads(script.string or '{}')
-                        # data can be a list or dict
-                        if isinstance(data, list):
-                            candidates = data
-                        else:
-                            candidates = [data]
-
-                        for node in candidates:
-                            # Look for product.image or image fields
-                            if isinstance(node, dict):
-                                img = node.get('image') or node.get('images')
-                                if isinstance(img, str) and img.startswith('http') and not img.endswith('.svg'):
-                                    print(f"✓ Found JSON-LD image: {img[:60]}")
-                                    return img
-                                if isinstance(img, list) and img:
-                                    for iurl in img:
-                                        if isinstance(iurl, str) and iurl.startswith('http') and not iurl.endswith('.svg'):
-                                            print(f"✓ Found JSON-LD image (list): {iurl[:60]}")
-                                            return iurl
-                    except Exception:
-                        continue
-            except Exception:
-                pass
-
-            # Strategy 1: Open Graph image (most reliable for e-commerce)
-            og_image = soup.find('meta', property='og:image')
-            if og_image and og_image.get('content'):
-                img_url = og_image.get('content')
-                if img_url and img_url.startswith('http') and not img_url.endswith('.svg'):
-                    print(f"✓ Found OG image: {img_url[:60]}")
-                    return img_url
-            
-            # Strategy 2: Twitter card image
-            twitter_image = soup.find('meta', attrs={'name': 'twitter:image'})
-            if twitter_image and twitter_image.get('content'):
-                img_url = twitter_image.get('content')
-                if img_url and img_url.startswith('http') and not img_url.endswith('.svg'):
-                    print(f"✓ Found Twitter image: {img_url[:60]}")
-                    return img_url
-            
-            # Strategy 3: Product meta tag
-            product_image = soup.find('meta', attrs={'property': 'product:image'})
-            if product_image and product_image.get('content'):
-                img_url = product_image.get('content')
-                if img_url and img_url.startswith('http'):
-                    print(f"✓ Found product meta image: {img_url[:60]}")
-                    return img_url
-            
-            # Strategy 4: itemprop="image" (schema.org)
-            itemprop_image = soup.find('img', attrs={'itemprop': 'image'})
-            if itemprop_image:
-                img_url = itemprop_image.get('src') or itemprop_image.get('data-src')
-                if img_url:
-                    img_url = normalize_url(img_url, url)
-                    if img_url and img_url.startswith('http'):
-                        print(f"✓ Found itemprop image: {img_url[:60]}")
-                        return img_url
-
-            # Strategy 4b: link rel=image_src
-            link_img = soup.find('link', rel=re.compile(r'image_src', re.I))
-            if link_img and link_img.get('href'):
-                li = normalize_url(link_img.get('href'), url)
-                if li and li.startswith('http') and not li.endswith('.svg'):
-                    print(f"✓ Found link rel=image_src: {li[:60]}")
-                    return li
-
-            # Strategy 4c: og:image:secure_url
-            og_secure = soup.find('meta', property='og:image:secure_url')
-            if og_secure and og_secure.get('content'):
-                osrc = og_secure.get('content')
-                if osrc and osrc.startswith('http') and not osrc.endswith('.svg'):
-                    print(f"✓ Found og:image:secure_url: {osrc[:60]}")
-                    return osrc
-            
-            # Strategy 5: Common product image selectors
-            selectors = [
-                ('img', {'class': re.compile(r'product.*image', re.I)}),
-                ('img', {'class': re.compile(r'main.*image', re.I)}),
-                ('img', {'id': re.compile(r'product.*image', re.I)}),
-                ('img', {'class': re.compile(r'gallery.*main', re.I)}),
-            ]
-            
-            for tag, attrs in selectors:
-                img = soup.find(tag, attrs)
-                if img:
-                    img_url = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
-                    if img_url:
-                        img_url = normalize_url(img_url, url)
-                        if img_url and img_url.startswith('http') and not img_url.endswith('.svg'):
-                            print(f"✓ Found selector image: {img_url[:60]}")
-                            return img_url
-            
-            # Strategy 6: Find largest image (likely the product)
-            all_images = soup.find_all('img', src=True, limit=20)
-            best_img = None
-            best_score = 0
-            
-            for img in all_images:
-                src = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
-                if not src:
-                    continue
-                
-                # Skip obvious non-product images
-                src_lower = src.lower()
-                if any(skip in src_lower for skip in ['logo', 'icon', 'sprite', 'avatar', 'placeholder', 'blank']):
-                    continue
-                
-                if src.endswith('.svg'):
-                    continue
-                
-                # Normalize URL
-                src = normalize_url(src, url)
-                if not src or not src.startswith('http'):
-                    continue
-
-                # If srcset exists, prefer the largest candidate from it
-                srcset = img.get('srcset') or img.get('data-srcset')
-                if srcset:
-                    try:
-                        candidate = pick_largest_from_srcset(srcset, base=url)
-                        if candidate:
-                            candidate = normalize_url(candidate, url)
-                            if candidate and candidate.startswith('http') and not candidate.endswith('.svg'):
-                                print(f"✓ Found srcset candidate: {candidate[:60]}")
-                                return candidate
-                    except Exception:
-                        pass
-                
-                # Score based on dimensions and URL hints
-                score = 0
-                width = img.get('width', '')
-                height = img.get('height', '')
-                
-                if width and width.isdigit():
-                    score += int(width)
-                if height and height.isdigit():
-                    score += int(height)
-                
-                # Boost for product-related keywords
-                if re.search(r'(product|main|hero|large|full|detail)', src_lower):
-                    score += 500
-                
-                if score > best_score:
-                    best_score = score
-                    best_img = src
-            
-            if best_img:
-                print(f"✓ Found best image (score {best_score}): {best_img[:60]}")
-                return best_img
-            
-            print(f"✗ No image found for {url[:50]}")
+
+async def download_product_page(url: str) -> Union[ImageHit, ProductPage, None]:
+    """Download a product page - OPTIMIZED
+
+    The body is streamed: head metadata is scanned as chunks arrive and the
+    download stops once a high-confidence image (JSON-LD or og:image) is
+    known, which is returned as is. Otherwise at most SCRAPE_MAX_BYTES of the
+    page are returned for ``parse_product_page``. Network errors propagate.
+    """
+    if not SCRAPE_STREAMING:
+        response = await http_clients.scrape.get(url)
+        response.raise_for_status()
+        if response.status_code != 200:
             return None
-                
-    except Exception as e:
-        print(f"Error scraping {url[:50]}: {str(e)[:50]}")
-        return None
+        return ProductPage(response.content[:SCRAPE_MAX_BYTES], response.charset_encoding)
 
+    async with http_clients.scrape.stream("GET", url) as response:
+        response.raise_for_status()
+        if response.status_code != 200:
+            return None
 
-def normalize_url(img_url: str, base_url: str) -> str:
-    """Convert relative URLs to absolute"""
-    if img_url.startswith('http'):
-        return img_url
-    elif img_url.startswith('//'):
-        return 'https:' + img_url
-    elif img_url.startswith('/'):
-        from urllib.parse import urlparse
-        parsed = urlparse(base_url)
-        return f"{parsed.scheme}://{parsed.netloc}{img_url}"
-    return img_url
+        encoding = response.charset_encoding
+        scanner = HeadScanner(encoding)
+        received = 0
+        async for chunk in response.aiter_bytes():
+            chunk = chunk[:SCRAPE_MAX_BYTES - received]
+            received += len(chunk)
+            if scanner.feed(chunk):
+                hit = scanner.best
+                image_log.debug("image found in head", extra={"url": url, "strategy": hit.strategy, "bytes": received})
+                return hit
+            if received >= SCRAPE_MAX_BYTES:
+                image_log.debug("byte cap reached", extra={"url": url, "bytes": received})
+                break
+        return ProductPage(scanner.finish(), encoding)
 
 
-def pick_largest_from_srcset(srcset: str, base: str = '') -> Optional[str]:
-    """Parse a srcset string and return the URL with the largest width descriptor.
+async def parse_product_page(url: str, page: Union[ImageHit, ProductPage, None]) -> Optional[ImageHit]:
+    """Run the full strategy cascade (IMAGE_PARSER) over a downloaded page
 
-    Example: 'a.jpg 400w, b.jpg 800w' -> returns b.jpg
+    Early hits and missing pages pass through. Parse errors, including a full
+    parse queue, propagate so they are not mistaken for pages without an image.
     """
+    if not isinstance(page, ProductPage):
+        return page
     try:
-        candidates = []
-        parts = [p.strip() for p in srcset.split(',') if p.strip()]
-        for p in parts:
-            tokens = p.split()
-            if not tokens:
-                continue
-            url = tokens[0]
-            desc = tokens[1] if len(tokens) > 1 else ''
-            width = 0
-            if desc.endswith('w'):
-                try:
-                    width = int(desc[:-1])
-                except Exception:
-                    width = 0
-            elif desc.endswith('x'):
-                try:
-                    # scale 'x' descriptors to an approximate width by multiplier
-                    width = int(float(desc[:-1]) * 1000)
-                except Exception:
-                    width = 0
-            candidates.append((width, url))
-
-        if not candidates:
-            return None
-        # pick largest
-        candidates.sort(key=lambda x: x[0], reverse=True)
-        chosen = candidates[0][1]
-        # Normalize if needed
-        if chosen.startswith('//'):
-            return 'https:' + chosen
-        if chosen.startswith('/') and base:
-            return normalize_url(chosen, base)
-        return chosen
-    except Exception:
-        return None
+        with metrics.stage("parse", PARSE_SECONDS):
+            return await parse_executor.run(
+                extract_image, page.body, url, page.encoding, IMAGE_PARSER, IMAGE_PARSER_BS4_FALLBACK
+            )
+    except ParseExecutorSaturated as e:
+        scrape_log.warning("parse skipped", extra={"url": url, "error": str(e)})
+        raise
+    except Exception as e:
+        scrape_log.warning("parse failed", extra={"url": url, "error": str(e)[:200]})
+        raise
 
 
+async def fetch_product_image(url: str) -> Optional[ImageHit]:
+    """Scrape the actual product image from a product page
+
+    Network and parse errors propagate so callers can tell them apart from
+    pages that simply have no usable image.
+    """
+    return await parse_product_page(url, await download_product_page(url))
+
+
+@metrics.timed("filter", STAGE_SECONDS, stage="filter")
 def normalize(results_json, max_results: int) -> List[SearchResult]:
     """Normalize Tavily results to our format, filtering out excluded sites and non-shopping content"""
     out: List[SearchResult] = []
@@ -329,16 +640,22 @@ def normalize(results_json, max_results: int) -> List[SearchResult]:
         site = extract_site(url)
         
         # Skip excluded sites (YouTube, TikTok, blogs, etc.)
-        if site and any(excluded in site for excluded in EXCLUDED_SITES):
+        if site and SITE_INDEX.is_excluded(site):
+            FILTER_REJECTIONS.inc(reason="excluded_site")
             continue
             
-        # Skip content that contains non-shopping keywords
+        # One scan of "title snippet site" feeds every content filter below
         content_text = f"{title} {snippet}".lower()
-        if any(keyword in content_text for keyword in EXCLUDED_CONTENT_KEYWORDS):
+        matches = CONTENT_MATCHER.scan(f"{content_text} {site}")
+
+        # Skip content that contains non-shopping keywords
+        if matches.has("excluded", end=len(content_text)):
+            FILTER_REJECTIONS.inc(reason="excluded_content")
             continue
             
         # Only include results that seem to be from shopping sites
-        if not is_shopping_content(title, snippet, site):
+        if not is_shopping_content(title, snippet, site, matches):
+            FILTER_REJECTIONS.inc(reason="not_shopping")
             continue
         
         # Use Tavily's image as fallback - we'll fetch real ones in the dupes endpoint
@@ -357,28 +674,17 @@ def normalize(results_json, max_results: int) -> List[SearchResult]:
     return out
 
 
-async def normalize_with_images(results_json, max_results: int) -> List[SearchResult]:
-    """Normalize Tavily results - Focus on CLOTHING and FASHION items only, parallel image fetch"""
+@metrics.timed("filter", STAGE_SECONDS, stage="filter")
+def filter_clothing_results(results_json, max_results: int) -> List[SearchResult]:
+    """Keep CLOTHING and FASHION results only, with Tavily's images as initial fallbacks"""
     out: List[SearchResult] = []
     # Tavily can provide an images array alongside results; use as initial fallbacks
     images_fallback = results_json.get("images") or []
     
-    # Clothing/fashion keywords that MUST be present
-    clothing_keywords = {
-        'dress', 'shirt', 'pants', 'jeans', 'jacket', 'coat', 'sweater', 'hoodie',
-        'shorts', 'skirt', 'top', 'blouse', 'cardigan', 'blazer', 'suit',
-        'shoes', 'sneakers', 'boots', 'heels', 'sandals', 'flats',
-        'bag', 'handbag', 'purse', 'backpack', 'tote', 'clutch', 'wallet',
-        'sunglasses', 'glasses', 'hat', 'cap', 'beanie', 'scarf',
-        'jewelry', 'necklace', 'bracelet', 'earrings', 'ring', 'watch',
-        'belt', 'tie', 'gloves', 'socks', 'underwear', 'bra', 'lingerie',
-        'swimsuit', 'bikini', 'swimwear', 'activewear', 'leggings', 'sports bra',
-        'fashion', 'clothing', 'apparel', 'outfit', 'wear', 'style', 't-shirt',
-        'polo', 'tank', 'vest', 'parka', 'trench', 'denim', 'chinos'
-    }
     
     for idx, item in enumerate(results_json.get("results") or []):
-        if len(out) >= max_results:
+        # With dedup on, every result is kept until duplicates are collapsed
+        if len(out) >= max_results and not DEDUP_ENABLED:
             break
             
         url = item.get("url") or ""
@@ -387,19 +693,22 @@ async def normalize_with_images(results_json, max_results: int) -> List[SearchRe
         site = extract_site(url)
         
         # Skip excluded sites
-        if site and any(excluded in site.lower() for excluded in EXCLUDED_SITES):
+        if site and SITE_INDEX.is_excluded(site):
+            FILTER_REJECTIONS.inc(reason="excluded_site")
             continue
         
         # Skip blog/article URLs
         url_lower = url.lower()
         if '/blog/' in url_lower or '/article/' in url_lower or '/news/' in url_lower or '/guide/' in url_lower:
+            FILTER_REJECTIONS.inc(reason="article_url")
             continue
         
         # CLOTHING FILTER: Must have at least one clothing keyword
         content_text = f"{title} {snippet}".lower()
-        has_clothing_keyword = any(keyword in content_text for keyword in clothing_keywords)
+        has_clothing_keyword = CONTENT_MATCHER.scan(content_text).has("clothing")
         
         if not has_clothing_keyword:
+            FILTER_REJECTIONS.inc(reason="not_clothing")
             continue
         
         # Use tavily-provided image as initial fallback if available
@@ -415,88 +724,184 @@ async def normalize_with_images(results_json, max_results: int) -> List[SearchRe
                 image=initial_image,
             )
         )
-    
-    # Only fetch images for the items we'll actually use (in parallel, with timeout)
-    if out and len(out) > 0:
-        print(f"Fetching images for {min(len(out), max_results)} items in parallel...")
-        import asyncio
-        
-        # Limit to max_results to save time
-        items_to_fetch = out[:max_results]
+    return collapse_duplicates(out)[:max_results]
 
-        # Only fetch images for items that don't already have a valid image
-        indices_to_fetch = [i for i, it in enumerate(items_to_fetch) if not it.image or not str(it.image).startswith('http')]
 
-        async def fetch_with_fallback(url):
-            try:
-                img = await asyncio.wait_for(fetch_product_image(url), timeout=5.0)
-                return img if img else None
-            except asyncio.TimeoutError:
-                print(f"Image fetch timeout for {url[:50]}")
-                return None
-            except Exception as e:
-                print(f"Image fetch error: {e}")
-                return None
-
-        # Prepare tasks in the same order as indices_to_fetch
-        tasks = [fetch_with_fallback(items_to_fetch[i].url) for i in indices_to_fetch]
-        results = []
-        if tasks:
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Assign fetched images back to corresponding items
-        for idx_pos, i in enumerate(indices_to_fetch):
-            img = results[idx_pos] if idx_pos < len(results) else None
-            if isinstance(img, str) and img:
-                items_to_fetch[i].image = img
-            else:
-                # keep existing or use placeholder
-                if not items_to_fetch[i].image:
-                    items_to_fetch[i].image = "https://placehold.co/400x500/f3f4f6/9ca3af?text=No+Image"
+def collapse_duplicates(results: List[SearchResult]) -> List[SearchResult]:
+    """Keep the best-scoring copy of each product, in order of first appearance
+
+    A kept copy without a Tavily image takes one from a dropped copy.
+    """
+    if not DEDUP_ENABLED or len(results) < 2:
+        return results
+    groups = duplicate_groups([r.url for r in results], [r.title for r in results], DEDUP_TITLE_THRESHOLD)
+    if len(groups) == len(results):
+        return results
+
+    prices = comparable_amounts(parse_prices(r.snippet for r in results))
+    sites = [extract_site(r.url) or "" for r in results]
+    scores = score_batch(prices, [SITE_INDEX.retailer_weight(site) if site else 0 for site in sites]).scores
+    kept = []
+    for group in groups:
+        best = results[max(group, key=lambda i: (scores[i], -i))]
+        if not best.image:
+            best.image = next((results[i].image for i in group if results[i].image), None)
+        kept.append(best)
+    FILTER_REJECTIONS.inc(len(results) - len(kept), reason="duplicate")
+    log.debug("collapsed duplicates", extra={"candidates": len(results), "kept": len(kept)})
+    return kept
+
+
+async def resolve_product_image(url: str) -> Optional[str]:
+    """Scrape one product page under the scheduler's limits, recording the outcome in the image cache"""
+    host = extract_site(url) or ""
+
+    async def fetch():
+        # Timed inside the scheduler: host latency excludes waiting for a slot
+        with metrics.stage("scrape", SCRAPE_SECONDS, host=host):
+            return await download_product_page(url)
+
+    try:
+        # Only the download counts against the host's timeout; parsing runs
+        # after its slot is released
+        page = await scrape_scheduler.run(host, fetch)
+        hit = await parse_product_page(url, page)
+    except CircuitOpen:
+        # Host recently timed out/errored: keep the Tavily fallback image
+        scrape_log.info("scrape skipped, circuit open", extra={"url": url, "host": host})
+        SCRAPE_FAILURES.inc(reason="circuit_open")
+        return None
+    except asyncio.TimeoutError:
+        scrape_log.warning("scrape timeout", extra={"url": url, "host": host})
+        TIMEOUTS.inc(upstream="scrape")
+        image_cache.put_miss(url, image_cache_status.TIMEOUT)
+        return None
+    except ParseExecutorSaturated:
+        # Our parse queue was full, not the page's fault: retry on the next request
+        SCRAPE_FAILURES.inc(reason="parse_saturated")
+        return None
+    except Exception as e:
+        scrape_log.warning("scrape failed", extra={"url": url, "host": host, "error": str(e)[:200]})
+        SCRAPE_FAILURES.inc(reason="error")
+        image_cache.put_miss(url, image_cache_status.ERROR)
+        return None
+    if hit:
+        image_log.info("image found", extra={"url": url, "strategy": hit.strategy, "image": hit.url})
+        IMAGE_STRATEGY.inc(strategy=hit.strategy)
+        image_cache.put(url, hit.url, hit.strategy)
+        return hit.url
+    image_log.info("no image found", extra={"url": url})
+    IMAGE_STRATEGY.inc(strategy="none")
+    image_cache.put_miss(url, image_cache_status.NOT_FOUND)
+    return None
+
+
+# In-flight page lookups by canonical URL, so a page that shows up in several
+# concurrent requests (or several queries of one batch) is scraped once
+_image_lookups: Dict[str, "asyncio.Task[Optional[str]]"] = {}
+
+
+async def lookup_product_image(url: str) -> Optional[str]:
+    """Resolve a product page's image, joining a lookup already in flight for the same page
+
+    The scrape runs as its own task: a caller that goes away doesn't cancel it
+    for the others, and the result still lands in the image cache.
+    """
+    key = canonical_url(url)
+    task = _image_lookups.get(key)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(resolve_product_image(url))
+        _image_lookups[key] = task
+
+        def forget(done, key=key):
+            if _image_lookups.get(key) is done:
+                del _image_lookups[key]
+
+        task.add_done_callback(forget)
+    return await asyncio.shield(task)
+
+
+async def iter_product_images(items: List[SearchResult]) -> AsyncIterator[Tuple[int, str]]:
+    """Resolve real product images, yielding (index, image) as each one is found
+
+    Only items without a valid image are looked up. The persistent image cache
+    is consulted first; the remaining pages are scraped in parallel under the
+    scrape scheduler's limits.
+    """
+    # Only fetch images for items that don't already have a valid image
+    indices_to_fetch = [i for i, it in enumerate(items) if not it.image or not str(it.image).startswith('http')]
+
+    # Resolve from the persistent image cache before scheduling any scrape;
+    # a prefetch refresh also re-scrapes images that are about to expire,
+    # as far as its upstream budget allows
+    expiring_before = time.time() + prefetch_config.image_horizon if prefetching.get() else 0.0
+    pending = []
+    for i in indices_to_fetch:
+        cached = image_cache.get(items[i].url)
+        CACHE_LOOKUPS.inc(cache="image", result="miss" if cached is None else "hit")
+        expiring = cached is not None and cached.found and cached.expires_at < expiring_before
+        if cached is None or (expiring and prefetcher.spend()):
+            pending.append(i)
+        elif cached.found:
+            yield i, cached.image
+    if len(pending) < len(indices_to_fetch):
+        log.debug("image cache answered", extra={
+            "cached": len(indices_to_fetch) - len(pending), "lookups": len(indices_to_fetch),
+        })
+
+    async def fetch_with_fallback(i):
+        return i, await lookup_product_image(items[i].url)
+
+    tasks = [asyncio.ensure_future(fetch_with_fallback(i)) for i in pending]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            i, img = await next_done
+            if img:
+                yield i, img
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def normalize_with_images(results_json, max_results: int) -> List[SearchResult]:
+    """Normalize Tavily results - Focus on CLOTHING and FASHION items only, parallel image fetch"""
+    out = filter_clothing_results(results_json, max_results)
+
+    # Only fetch images for the items we'll actually use (in parallel, with timeout)
+    if out:
+        log.debug("fetching images", extra={"count": len(out)})
+        with metrics.stage("images", STAGE_SECONDS, stage="images"):
+            async for i, img in iter_product_images(out):
+                out[i].image = img
+
+        # Keep existing images or use a placeholder
+        for it in out:
+            if not it.image:
+                it.image = placeholder_url("No Image")
     
-    print(f"Filtered down to {len(out)} clothing/fashion results")
+    log.debug("filtered results", extra={"kept": len(out)})
     return out
 
 
-def is_shopping_content(title: str, snippet: str, site: str) -> bool:
-    """Check if content appears to be from a shopping/retail context - STRICT filtering"""
+def is_shopping_content(title: str, snippet: str, site: str, matches: Optional[KeywordMatches] = None) -> bool:
+    """Check if content appears to be from a shopping/retail context - STRICT filtering
+
+    ``matches`` may be a CONTENT_MATCHER scan of "title snippet site" that the
+    caller already made, so the text is not scanned twice.
+    """
     if not title or not snippet:
         return False
         
-    content_text = f"{title} {snippet} {site}".lower()
-    
-    # Strong shopping indicators
-    strong_shopping_keywords = {
-        "buy", "shop", "cart", "checkout", "purchase", "add to cart",
-        "buy now", "shop now", "add to bag", "in stock", "out of stock",
-        "free shipping", "free delivery", "order now"
-    }
-    
-    # Moderate shopping indicators
-    moderate_shopping_keywords = {
-        "price", "$", "sale", "discount", "deal", "offer",
-        "clearance", "promo", "coupon", "shipping", "delivery",
-        "store", "retailer", "available", "colors", "sizes"
-    }
+    if matches is None:
+        matches = CONTENT_MATCHER.scan(f"{title} {snippet} {site}".lower())
     
     # Count strong vs moderate signals
-    strong_count = sum(1 for keyword in strong_shopping_keywords if keyword in content_text)
-    moderate_count = sum(1 for keyword in moderate_shopping_keywords if keyword in content_text)
+    strong_count = matches.count("strong")
+    moderate_signals = matches.keywords("moderate")
+    moderate_count = len(moderate_signals)
     
     # Known shopping domains get priority
-    known_shopping_sites = {
-        "amazon", "walmart", "target", "ebay", "etsy", "aliexpress",
-        "shein", "alibaba", "temu", "dhgate", "wish", "asos",
-        "zara", "hm.com", "h&m", "uniqlo", "forever21", "boohoo",
-        "fashionnova", "prettylittlething", "missguided",
-        "zaful", "romwe", "yesstyle", "lightinthebox",
-        "nordstrom", "macys", "kohls", "jcpenney", "dillards",
-        "saks", "bloomingdales", "neiman", "shopbop",
-        "revolve", "nasty gal", "urban outfitters", "anthropologie",
-        "free people", "lulus", "showpo", "tobi"
-    }
-    
-    is_known_retailer = site and any(retailer in site.lower() for retailer in known_shopping_sites)
+    is_known_retailer = bool(site) and SITE_INDEX.classify(site).retailer
     
     # Less strict requirements to get more results:
     # Known retailer = automatic pass
@@ -507,7 +912,7 @@ def is_shopping_content(title: str, snippet: str, site: str) -> bool:
         return True
     elif strong_count >= 1 and moderate_count >= 1:
         return True
-    elif moderate_count >= 2 and '$' in content_text:
+    elif moderate_count >= 2 and '$' in moderate_signals:
         return True
     elif moderate_count >= 3:
         return True
@@ -517,16 +922,19 @@ def is_shopping_content(title: str, snippet: str, site: str) -> bool:
 
 @app.get("/search", response_model=SearchResponse)
 async def search(
+    request: Request,
     q: str = Query(..., min_length=2, max_length=256),
     max_results: int = Query(8, ge=1, le=20),
 ):
     """Search for items using Tavily"""
-    try:
-        raw = await tavily_search(q, max_results)
-    except httpx.HTTPError as e:
-        raise HTTPException(status_code=502, detail=f"Provider error: {e}") from e
-    
-    return SearchResponse(query=q, results=normalize(raw, max_results))
+    async def compute() -> bytes:
+        try:
+            raw = await tavily_search(q, max_results)
+        except httpx.HTTPError as e:
+            raise HTTPException(status_code=502, detail=f"Provider error: {e}") from e
+        return SearchResponse(query=q, results=normalize(raw, max_results)).model_dump_json().encode()
+
+    return await cached_json_response(request, ("search", normalize_query(q), max_results), compute)
 
 
 # Retailer scoring weights - focused on affordable clothing brands
@@ -612,6 +1020,59 @@ ARTICLE_URL_PATTERNS = {
     "/magazine/", "/journal/", "/press/", "/media/"
 }
 
+# Clothing/fashion keywords - at least one MUST be present for /dupes
+CLOTHING_KEYWORDS = {
+    'dress', 'shirt', 'pants', 'jeans', 'jacket', 'coat', 'sweater', 'hoodie',
+    'shorts', 'skirt', 'top', 'blouse', 'cardigan', 'blazer', 'suit',
+    'shoes', 'sneakers', 'boots', 'heels', 'sandals', 'flats',
+    'bag', 'handbag', 'purse', 'backpack', 'tote', 'clutch', 'wallet',
+    'sunglasses', 'glasses', 'hat', 'cap', 'beanie', 'scarf',
+    'jewelry', 'necklace', 'bracelet', 'earrings', 'ring', 'watch',
+    'belt', 'tie', 'gloves', 'socks', 'underwear', 'bra', 'lingerie',
+    'swimsuit', 'bikini', 'swimwear', 'activewear', 'leggings', 'sports bra',
+    'fashion', 'clothing', 'apparel', 'outfit', 'wear', 'style', 't-shirt',
+    'polo', 'tank', 'vest', 'parka', 'trench', 'denim', 'chinos'
+}
+
+# Strong shopping indicators
+STRONG_SHOPPING_KEYWORDS = {
+    "buy", "shop", "cart", "checkout", "purchase", "add to cart",
+    "buy now", "shop now", "add to bag", "in stock", "out of stock",
+    "free shipping", "free delivery", "order now"
+}
+
+# Moderate shopping indicators
+MODERATE_SHOPPING_KEYWORDS = {
+    "price", "$", "sale", "discount", "deal", "offer",
+    "clearance", "promo", "coupon", "shipping", "delivery",
+    "store", "retailer", "available", "colors", "sizes"
+}
+
+# Known shopping domains get priority
+KNOWN_SHOPPING_SITES = {
+    "amazon", "walmart", "target", "ebay", "etsy", "aliexpress",
+    "shein", "alibaba", "temu", "dhgate", "wish", "asos",
+    "zara", "hm.com", "h&m", "uniqlo", "forever21", "boohoo",
+    "fashionnova", "prettylittlething", "missguided",
+    "zaful", "romwe", "yesstyle", "lightinthebox",
+    "nordstrom", "macys", "kohls", "jcpenney", "dillards",
+    "saks", "bloomingdales", "neiman", "shopbop",
+    "revolve", "nasty gal", "urban outfitters", "anthropologie",
+    "free people", "lulus", "showpo", "tobi"
+}
+
+# Keyword lists compiled once into single-pass matchers. Content is scanned
+# once per result for every list.
+CONTENT_MATCHER = KeywordMatcher({
+    "excluded": EXCLUDED_CONTENT_KEYWORDS,
+    "clothing": CLOTHING_KEYWORDS,
+    "strong": STRONG_SHOPPING_KEYWORDS,
+    "moderate": MODERATE_SHOPPING_KEYWORDS,
+})
+
+# Site tables indexed by host label / domain suffix; lookups are memoized per host
+SITE_INDEX = DomainIndex(EXCLUDED_SITES, DUPE_SITES, KNOWN_SHOPPING_SITES)
+
 
 def extract_site(url: str) -> Optional[str]:
     """Extract domain from URL"""
@@ -623,10 +1084,8 @@ def extract_site(url: str) -> Optional[str]:
 
 
 def extract_price(text: str) -> Optional[float]:
-    """Extract price from text using regex"""
-    import re
-    m = re.search(r"\$(\d+(?:\.\d{1,2})?)", text)
-    return float(m.group(1)) if m else None
+    """Extract the advertised USD price from text (sale price over "was" price, low end of a range)"""
+    return comparable_amounts([parse_price(text)])[0]
 
 
 def score_dupe(result: SearchResult, avg_price: Optional[float] = None, max_price: Optional[float] = None) -> DupeItem:
@@ -636,11 +1095,8 @@ def score_dupe(result: SearchResult, avg_price: Optional[float] = None, max_pric
     bump = 0
     
     # Check if site is a recognized retailer
-    retailer_score = 0
-    for key, val in DUPE_SITES.items():
-        if key in site:
-            retailer_score = max(retailer_score, val)
-            bump += retailer_score
+    retailer_score = SITE_INDEX.retailer_weight(site) if site else 0
+    bump += retailer_score
     
     # Extract price
     price = extract_price(result.snippet or "")
@@ -673,7 +1129,18 @@ def score_dupe(result: SearchResult, avg_price: Optional[float] = None, max_pric
         bump += 5
     
     score = max(0, min(100, base + bump))
-    
+    return build_dupe_item(result, site, price, retailer_score, savings_percent, score)
+
+
+def build_dupe_item(
+    result: SearchResult,
+    site: str,
+    price: Optional[float],
+    retailer_score: int,
+    savings_percent: float,
+    score: int,
+) -> DupeItem:
+    """Build the response item (reason text and placeholder image) for a scored result"""
     # Generate detailed reason
     reasons = []
     if retailer_score > 0:
@@ -693,11 +1160,10 @@ def score_dupe(result: SearchResult, avg_price: Optional[float] = None, max_pric
     
     reason = " • ".join(reasons) if reasons else "Affordable option"
     
-    # If no image was scraped, use a category-appropriate placeholder
+    # If no image was scraped, use a locally served placeholder
     image_url = result.image
-    if not image_url or not image_url.startswith('http'):
-        # Use a simple colored placeholder
-        image_url = "https://placehold.co/400x500/e5e7eb/6b7280?text=Product+Image"
+    if not image_url or not image_url.startswith(('http', '/img/')):
+        image_url = placeholder_url("Product Image")
     
     return DupeItem(
         title=result.title,
@@ -708,66 +1174,183 @@ def score_dupe(result: SearchResult, avg_price: Optional[float] = None, max_pric
         dupeScore=score,
         reason=reason,
         image=image_url,
+        thumbnail=thumbnail_url(image_url),
     )
 
 
-@app.get("/dupes", response_model=DupeResponse)
-async def dupes(
-    q: str = Query(..., min_length=2, max_length=256),
-    max_results: int = Query(16, ge=1, le=30),
-):
-    """Find affordable CLOTHING/FASHION dupes - focuses on cheaper alternatives"""
+async def fetch_dupe_candidates(q: str, max_results: int):
+    """Run the Tavily search behind /dupes, mapping provider errors to 502"""
     # Enhanced query for clothing/fashion shopping with affordable focus
-    compound_query = f"{q} clothing fashion buy cheap affordable dupe alternative"
+    compound_query = f"{q} {' '.join(DUPE_QUERY_TERMS)}"
     
     try:
         # Get MORE results (5x) since we're filtering for clothing specifically
         initial_results = min(max_results * 5, 50)
-        print(f"Fetching {initial_results} initial results for query: {q}")
-        raw = await tavily_search(compound_query, initial_results)  
+        return await tavily_search(compound_query, initial_results)
     except httpx.HTTPError as e:
         raise HTTPException(status_code=502, detail=f"Provider error: {e}") from e
+
+
+@metrics.timed("score", STAGE_SECONDS, stage="score")
+def rank_dupes(normalized: List[SearchResult], max_results: int) -> Tuple[List[Tuple[int, DupeItem]], dict]:
+    """Score and order candidates; returns [(candidate index, item)] and price statistics
+
+    Prices are parsed once and the whole batch is scored and ordered in one
+    vectorized pass; DupeItems are only built for the top ``max_results``.
+    Prices in other currencies than USD are treated as unknown.
+    """
+    sites = [extract_site(r.url) or "" for r in normalized]
+    prices = comparable_amounts(parse_prices(r.snippet for r in normalized))
+    weights = [SITE_INDEX.retailer_weight(site) if site else 0 for site in sites]
+    batch = score_batch(prices, weights)
+
+    log.debug("price analysis", extra={
+        "min_price": batch.min_price, "max_price": batch.max_price, "avg_price": batch.avg_price,
+    })
+
+    final_items = [
+        (i, build_dupe_item(
+            normalized[i], sites[i], prices[i], weights[i], float(batch.savings[i]), int(batch.scores[i])
+        ))
+        for i in batch.order[:max_results].tolist()
+    ]
+    stats = {"min": batch.min_price, "max": batch.max_price, "avg": batch.avg_price, "count": batch.priced}
+    return final_items, stats
+
+
+async def find_dupes(q: str, max_results: int) -> List[DupeItem]:
+    """Search, filter, fetch images and rank for one query (the work behind /dupes)"""
+    raw = await fetch_dupe_candidates(q, max_results)
     
     # Filter for clothing/fashion and fetch images in parallel
     normalized = await normalize_with_images(raw, max_results * 2)
-    
-    print(f"After filtering, got {len(normalized)} clothing/fashion results")
-    
-    # Extract prices for comparison
-    prices = [extract_price(r.snippet or "") for r in normalized]
-    prices_with_values = [p for p in prices if p is not None]
-    
-    # Calculate price statistics
-    avg_price = sum(prices_with_values) / len(prices_with_values) if prices_with_values else None
-    max_price = max(prices_with_values) if prices_with_values else None
-    min_price = min(prices_with_values) if prices_with_values else None
-    
-    print(f"Price analysis: min=${min_price}, max=${max_price}, avg=${avg_price}")
-    
-    # Score each item with price comparison
-    items = [score_dupe(r, avg_price, max_price) for r in normalized]
-    
-    # Sort by score descending (best first)
-    items.sort(key=lambda x: x.dupeScore, reverse=True)
-    
-    # Return all items up to max_results - prioritize cheaper ones if prices exist
-    if prices_with_values:
-        # Separate items with and without prices
-        items_with_price = [item for item in items if item.price is not None]
-        items_without_price = [item for item in items if item.price is None]
-        
-        # Sort items with price by actual price (cheapest first) within same score
-        items_with_price.sort(key=lambda x: (x.price if x.price else 999999))
-        
-        # Combine: priced items first, then unpriced
-        final_items = items_with_price + items_without_price
-    else:
-        # No prices found, just return by score
-        final_items = items
-    
-    # Limit to requested results
-    final_items = final_items[:max_results]
-    
-    print(f"Returning {len(final_items)} affordable clothing/fashion results")
-    
-    return DupeResponse(query=q, items=final_items)
+
+    ranked, _ = rank_dupes(normalized, max_results)
+    final_items = [item for _, item in ranked]
+
+    log.info("dupes ranked", extra={"query": q, "candidates": len(normalized), "returned": len(final_items)})
+    return final_items
+
+
+@app.get("/dupes", response_model=DupeResponse)
+async def dupes(
+    request: Request,
+    q: str = Query(..., min_length=2, max_length=256),
+    max_results: int = Query(16, ge=1, le=30),
+):
+    """Find affordable CLOTHING/FASHION dupes - focuses on cheaper alternatives"""
+    async def compute() -> bytes:
+        return DupeResponse(query=q, items=await find_dupes(q, max_results)).model_dump_json().encode()
+
+    prefetcher.record(q, max_results)
+    return await cached_json_response(request, dupes_cache_key(q, max_results), compute, similar=True)
+
+
+def dupes_cache_key(q: str, max_results: int):
+    return ("dupes", normalize_query(q, DUPE_QUERY_TERMS), max_results)
+
+
+async def prefetch_dupes(q: str, max_results: int) -> None:
+    """Recompute and store a /dupes response with fresh Tavily results (run by the prefetcher)"""
+    prefetching.set(True)
+
+    async def compute() -> bytes:
+        return DupeResponse(query=q, items=await find_dupes(q, max_results)).model_dump_json().encode()
+
+    await response_cache.get_or_compute(dupes_cache_key(q, max_results), compute, revalidate=True)
+
+
+# Hot /dupes queries are refreshed in the background before their cached
+# responses expire (PREFETCH_* settings, see backend/services/prefetch.py)
+prefetch_config = PrefetchConfig.from_env()
+prefetcher = PrefetchScheduler(
+    prefetch_config,
+    key=dupes_cache_key,
+    age=response_cache.age,
+    refresh=prefetch_dupes,
+    ttl=response_cache.ttl,
+)
+
+
+@app.post("/dupes/batch")
+async def dupes_batch(req: DupesBatchRequest):
+    """Run /dupes for many queries in one call, streaming NDJSON
+
+    At most DUPES_BATCH_CONCURRENCY queries run at once. Product pages shared
+    between queries are scraped once (in-flight lookups are joined, finished
+    ones come from the image cache). Each line is ``{"index", "query",
+    "items"}`` (or ``"error"``), written as soon as that query completes.
+    """
+    budget = asyncio.Semaphore(DUPES_BATCH_CONCURRENCY)
+
+    async def run_one(index: int, q: str) -> dict:
+        prefetcher.record(q, req.max_results)
+        async with budget:
+            try:
+                items = await find_dupes(q, req.max_results)
+            except HTTPException as e:
+                log.warning("batch query failed", extra={"query": q, "error": e.detail})
+                return {"index": index, "query": q, "error": e.detail}
+            except Exception:
+                # One failing query must not end the stream for the others
+                log.error("batch query crashed", extra={"query": q}, exc_info=True)
+                return {"index": index, "query": q, "error": "Internal error"}
+        return {"index": index, "query": q, "items": [item.model_dump() for item in items]}
+
+    async def lines():
+        tasks = [asyncio.ensure_future(run_one(i, q)) for i, q in enumerate(req.queries)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.get("/dupes/stream")
+async def dupes_stream(
+    q: str = Query(..., min_length=2, max_length=256),
+    max_results: int = Query(16, ge=1, le=30),
+):
+    """Streaming /dupes (Server-Sent Events)
+
+    Emits an ``item`` event per ranked result as soon as it is filtered and
+    scored (with Tavily's or a placeholder image), an ``image`` event whenever
+    a real product image is resolved, and a final ``done`` event carrying the
+    ordering and price statistics.
+    """
+    prefetcher.record(q, max_results)
+    raw = await fetch_dupe_candidates(q, max_results)
+    candidates = filter_clothing_results(raw, max_results * 2)
+    ranked, price_stats = rank_dupes(candidates, max_results)
+
+    async def events():
+        for rank, (idx, item) in enumerate(ranked):
+            yield sse_event("item", {"id": idx, "rank": rank, "item": item.model_dump()})
+
+        # Only the items that made the cut are scraped
+        chosen = [candidates[idx] for idx, _ in ranked]
+        async for pos, img in iter_product_images(chosen):
+            idx, item = ranked[pos]
+            item.image = img
+            item.thumbnail = thumbnail_url(img)
+            yield sse_event("image", {"id": idx, "image": img, "thumbnail": item.thumbnail})
+
+        yield sse_event("done", {
+            "query": q,
+            "order": [idx for idx, _ in ranked],
+            "priceStats": price_stats,
+        })
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,364 @@
+"""Cache backends shared by the Tavily, image and response caches.
+
+A backend is a bytes key/value store with per-entry TTLs, chosen by URL:
+
+    memory://                        in-process LRU (one per worker)
+    sqlite:///.cache/shared.sqlite3  SQLite in WAL mode, shared by the workers on a host
+    redis://[:password@]host:6379/0  any Redis-protocol server, shared across hosts
+
+Each cache reads ``<NAME>_CACHE_BACKEND`` (TAVILY, IMAGE, RESPONSE) and falls
+back to ``CACHE_BACKEND``, then to its own default. Keys are namespaced by the
+caller, so several caches can share one store.
+
+Backend calls are synchronous, like the SQLite image cache before them: a
+local SQLite or Redis round trip is well under a millisecond. Errors count as
+misses and failed writes are dropped, so a cache outage degrades to
+recomputing results rather than failing requests; Redis is skipped for a few
+seconds after a connection error.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Hashable, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from backend.services.cache import TTLCache
+
+
+class CacheBackend(ABC):
+    kind = ""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    def purge_expired(self) -> int:
+        return 0
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"kind": self.kind}
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU with TTLs (not shared between workers)"""
+    kind = "memory"
+
+    def __init__(self, maxsize: int = 1024, clock: Callable[[], float] = time.time):
+        self._data = TTLCache(maxsize=maxsize, ttl=0, clock=clock)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._data.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        if ttl > 0:
+            self._data.set(key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        self._data.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._data.stats()
+        return {"kind": self.kind, "size": stats["size"], "maxsize": stats["maxsize"]}
+
+
+class SQLiteBackend(CacheBackend):
+    """Table of (key, value, expires_at) in a SQLite file opened in WAL mode.
+
+    Every worker process opens its own connection to the same file; WAL lets
+    readers proceed while one writer commits. Expired rows are deleted every
+    ``purge_every`` writes. Calls run on the event loop, so a locked database
+    is waited on for at most ``busy_timeout`` seconds; then, as on any other
+    SQLite error, a read is a miss and a write is dropped.
+    """
+    kind = "sqlite"
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time, purge_every: int = 1000,
+                 busy_timeout: float = 0.25):
+        self.path = path
+        self.purge_every = purge_every
+        self.busy_timeout = busy_timeout
+        self._clock = clock
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.errors = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=self.busy_timeout)
+            try:
+                if self.path != ":memory:":
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache_entries ("
+                    " key TEXT PRIMARY KEY,"
+                    " value BLOB NOT NULL,"
+                    " expires_at REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS cache_entries_expiry ON cache_entries (expires_at)")
+            except sqlite3.Error:
+                conn.close()
+                raise
+            self._conn = conn
+        return self._conn
+
+    def _execute(self, sql: str, params: tuple = (), fetch: bool = False) -> Any:
+        """The first row (``fetch``) or the row count of one statement
+
+        Returns None when SQLite fails (locked, disk full, corrupt...).
+        """
+        with self._lock:
+            try:
+                cur = self._connect().execute(sql, params)
+                return cur.fetchone() if fetch else cur.rowcount
+            except sqlite3.Error:
+                self.errors += 1
+                return None
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._execute("SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,), fetch=True)
+        if row is None or row[1] <= self._clock():
+            return None
+        return bytes(row[0])
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        written = self._execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, self._clock() + ttl),
+        )
+        if written is None:
+            return
+        with self._lock:
+            self._writes += 1
+            purge = self.purge_every and self._writes % self.purge_every == 0
+        if purge:
+            self.purge_expired()
+
+    def delete(self, key: str) -> None:
+        self._execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def purge_expired(self) -> int:
+        return self._execute("DELETE FROM cache_entries WHERE expires_at <= ?", (self._clock(),)) or 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        row = self._execute("SELECT COUNT(*) FROM cache_entries", fetch=True)
+        size = row[0] if row is not None else None
+        return {"kind": self.kind, "path": self.path, "size": size, "errors": self.errors}
+
+
+class RedisError(Exception):
+    """Error reply from a Redis-protocol server"""
+
+
+def encode_command(*args: Any) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+class RedisBackend(CacheBackend):
+    """Minimal blocking RESP2 client (GET / SET PX / DEL) for a Redis-compatible server"""
+    kind = "redis"
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0, password: Optional[str] = None,
+                 timeout: float = 0.25, retry_after: float = 5.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+        self.errors = 0
+
+    def _connect(self) -> None:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+        try:
+            if self.password:
+                self._roundtrip("AUTH", self.password)
+            if self.db:
+                self._roundtrip("SELECT", self.db)
+        except RedisError:
+            self._disconnect()
+            raise
+
+    def _disconnect(self) -> None:
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = self._reader = None
+
+    def _read_reply(self) -> Any:
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RedisError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("connection closed")
+            return data[:-2]
+        if kind == b"*":
+            count = int(rest)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise ConnectionError(f"unexpected reply {line[:20]!r}")
+
+    def _roundtrip(self, *args: Any) -> Any:
+        self._sock.sendall(encode_command(*args))
+        return self._read_reply()
+
+    def command(self, *args: Any) -> Any:
+        """Run one command, reconnecting once if the connection went away"""
+        with self._lock:
+            for attempt in (0, 1):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._roundtrip(*args)
+                except (OSError, ConnectionError):
+                    self._disconnect()
+                    if attempt:
+                        raise
+
+    def _call(self, *args: Any) -> Any:
+        if time.monotonic() < self._down_until:
+            return None
+        try:
+            return self.command(*args)
+        except (OSError, ConnectionError, RedisError):
+            self.errors += 1
+            self._down_until = time.monotonic() + self.retry_after
+            return None
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._call("GET", key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        ms = int(ttl * 1000)
+        if ms > 0:
+            self._call("SET", key, value, "PX", ms)
+
+    def delete(self, key: str) -> None:
+        self._call("DEL", key)
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "address": f"{self.host}:{self.port}/{self.db}", "errors": self.errors}
+
+
+def open_backend(url: str, maxsize: int = 1024, clock: Callable[[], float] = time.time) -> CacheBackend:
+    """Build a backend from a memory://, sqlite:///path or redis://host:port/db URL"""
+    if url.startswith("sqlite://"):
+        path = url[len("sqlite://"):]
+        # sqlite:///relative/path, sqlite:////absolute/path, sqlite:///:memory:
+        if path.startswith("/"):
+            path = path[1:]
+        return SQLiteBackend(path or ":memory:", clock=clock)
+    parts = urlsplit(url)
+    if parts.scheme == "memory":
+        size = parse_qs(parts.query).get("maxsize")
+        return MemoryBackend(int(size[0]) if size else maxsize, clock=clock)
+    if parts.scheme == "redis":
+        db = parts.path.strip("/")
+        return RedisBackend(
+            host=parts.hostname or "localhost",
+            port=parts.port or 6379,
+            db=int(db) if db else 0,
+            password=unquote(parts.password) if parts.password else None,
+        )
+    raise ValueError(f"Unknown cache backend URL: {url}")
+
+
+def backend_from_env(name: str, default_url: str, maxsize: int = 1024) -> CacheBackend:
+    """``<NAME>_CACHE_BACKEND``, else ``CACHE_BACKEND``, else ``default_url``"""
+    url = os.getenv(f"{name}_CACHE_BACKEND") or os.getenv("CACHE_BACKEND") or default_url
+    return open_backend(url, maxsize=maxsize)
+
+
+class JsonCache:
+    """JSON-serializable values stored in a backend under ``namespace``.
+
+    Drop-in for ``TTLCache`` where values may be shared between workers.
+    """
+
+    def __init__(self, backend: CacheBackend, namespace: str, ttl: float):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{json.dumps(key, separators=(',', ':'))}"
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        raw = self.backend.get(self._key(key))
+        if raw is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        body = json.dumps(value, separators=(",", ":")).encode()
+        self.backend.set(self._key(key), body, self.ttl if ttl is None else ttl)
+
+    def delete(self, key: Hashable) -> None:
+        self.backend.delete(self._key(key))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "backend": self.backend.stats()}
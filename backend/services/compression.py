@@ -0,0 +1,121 @@
+"""gzip/brotli content negotiation and response compression.
+
+``CompressionMiddleware`` compresses complete (non-streamed) text and JSON
+responses for clients that accept it. Streamed bodies such as the /dupes/stream
+SSE feed pass through untouched so events are not held back, and responses
+that already carry a Content-Encoding (the precompressed frontend) are left
+alone. Brotli needs the optional ``brotli`` package; without it only gzip is
+offered.
+"""
+import gzip
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli  # optional dependency, enables Content-Encoding: br
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Preferred first when the client rates encodings equally
+ENCODINGS = ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    """Compress for ``encoding``; ``best`` spends more CPU for static files built once"""
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else 4)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=9 if best else 6, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def choose_encoding(accept_encoding: Optional[str], available: Iterable[str] = ENCODINGS) -> Optional[str]:
+    """Best of ``available`` for an Accept-Encoding header (None means identity)"""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def add_vary(headers: MutableHeaders) -> None:
+    vary = headers.get("vary", "")
+    if "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing whole text/JSON responses of at least ``minimum_size`` bytes"""
+
+    def __init__(self, app, minimum_size: int = 1024, encodings: Iterable[str] = ENCODINGS):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = tuple(encodings)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            if is_compressible(headers.get("content-type", "")) and "content-encoding" not in headers:
+                add_vary(headers)
+                if not message.get("more_body") and len(body) >= self.minimum_size:
+                    compressed = compress(body, encoding)
+                    if len(compressed) < len(body):
+                        headers["Content-Encoding"] = encoding
+                        headers["Content-Length"] = str(len(compressed))
+                        # Same resource, different bytes: the ETag can only be weak
+                        etag = headers.get("etag")
+                        if etag and not etag.startswith("W/"):
+                            headers["ETag"] = "W/" + etag
+                        message = {**message, "body": compressed}
+            await send(start)
+            start = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
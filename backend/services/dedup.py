@@ -0,0 +1,112 @@
+"""Grouping of search results that point at the same product.
+
+Two results are duplicates when
+
+* their product keys match: the canonical URL with the scheme dropped,
+  ``www.``/``m.``-style host prefixes removed and colour/size variant
+  parameters stripped, so tracking links, mobile pages and variant links of
+  one product share a key; or
+* they are on the same site and their titles are near-identical: titles are
+  reduced to word and word-pair shingles (colour words removed, so colour
+  variants match), each shingle set gets a MinHash signature, and pairs
+  whose estimated Jaccard similarity reaches the threshold are merged.
+
+The same title at two different retailers is a different offer and is kept.
+A Tavily call returns at most 50 results, so signatures are compared
+pairwise in one NumPy operation; no LSH banding is needed.
+"""
+import re
+import zlib
+from typing import Dict, List, Sequence, Set
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import numpy as np
+
+from backend.services.urls import canonical_url
+
+HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+VARIANT_PARAMS = {
+    "color", "colour", "colorid", "colourid", "size", "variant", "variantid",
+    "swatch", "selectedcolor", "selectedsize", "fit", "width", "length",
+}
+COLOR_WORDS = {
+    "black", "white", "ivory", "cream", "beige", "tan", "camel", "brown", "chocolate",
+    "grey", "gray", "charcoal", "silver", "gold", "red", "burgundy", "wine", "pink",
+    "blush", "rose", "orange", "rust", "yellow", "mustard", "green", "olive", "sage",
+    "khaki", "blue", "navy", "denim", "teal", "purple", "lilac", "lavender", "multi",
+    "multicolor", "nude", "natural",
+}
+
+NUM_PERM = 64
+_PRIME = (1 << 32) + 15  # > every crc32 value; a * x + b stays below 2**63
+_rng = np.random.default_rng(20240523)
+_A = _rng.integers(1, 1 << 31, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 31, NUM_PERM, dtype=np.uint64)
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize_host(host: str) -> str:
+    host = host.lower()
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix) and host.count(".") > 1:
+            return host[len(prefix):]
+    return host
+
+
+def product_key(url: str) -> str:
+    """Key shared by every URL of one product page"""
+    parts = urlsplit(canonical_url(url))
+    host = normalize_host(parts.netloc)
+    params = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in VARIANT_PARAMS]
+    path = parts.path.rstrip("/") or "/"
+    return f"{host}{path}?{urlencode(params)}" if params else f"{host}{path}"
+
+
+def title_shingles(title: str) -> Set[str]:
+    words = [w for w in _WORD.findall(title.lower()) if w not in COLOR_WORDS]
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def minhash(shingles: Set[str]) -> np.ndarray:
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def duplicate_groups(urls: Sequence[str], titles: Sequence[str], threshold: float = 0.8) -> List[List[int]]:
+    """Partition result indices into groups of duplicates, ordered by first member"""
+    parent = list(range(len(urls)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i: int, j: int) -> None:
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    first_by_key: Dict[str, int] = {}
+    by_site: Dict[str, List[int]] = {}
+    signatures: Dict[int, np.ndarray] = {}
+    for i, (url, title) in enumerate(zip(urls, titles)):
+        key = product_key(url)
+        union(first_by_key.setdefault(key, i), i)
+        shingles = title_shingles(title)
+        if shingles:
+            signatures[i] = minhash(shingles)
+            by_site.setdefault(key.split("/", 1)[0], []).append(i)
+
+    for members in by_site.values():
+        if len(members) < 2:
+            continue
+        sigs = np.stack([signatures[i] for i in members])
+        similar = (sigs[:, None, :] == sigs[None, :, :]).mean(axis=2) >= threshold
+        for a, b in zip(*np.nonzero(np.triu(similar, k=1))):
+            union(members[a], members[b])
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(urls)):
+        groups.setdefault(find(i), []).append(i)
+    return sorted(groups.values(), key=lambda group: group[0])
@@ -0,0 +1,124 @@
+"""Host classification against the site tables (excluded / retailer / unknown).
+
+The site tables hold two kinds of keys:
+
+* brand names without a dot (``"amazon"``, ``"elle"``) match a whole host
+  label, so ``smile.amazon.co.uk`` is Amazon but ``michelle.com`` is not Elle;
+* keys with a dot (``"hm.com"``, ``"x.com"``) match as a domain suffix on a
+  label boundary, so ``www2.hm.com`` matches but ``netflix.com`` does not.
+
+``DomainIndex`` stores the suffix keys in a reversed-label trie and the brand
+keys in a label map, so classifying a host costs O(number of labels) instead of
+a substring test per table entry. Results are memoized per host.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Mapping, NamedTuple, Optional
+
+EXCLUDED = "excluded"
+RETAILER = "retailer"
+UNKNOWN = "unknown"
+
+# Characters that can't appear in a host label ("h&m", "free people")
+_NON_LABEL_RE = re.compile(r"[^a-z0-9.\-]")
+
+
+class HostClass(NamedTuple):
+    kind: str
+    weight: int = 0
+
+    @property
+    def excluded(self) -> bool:
+        return self.kind == EXCLUDED
+
+    @property
+    def retailer(self) -> bool:
+        return self.kind == RETAILER
+
+
+_UNKNOWN = HostClass(UNKNOWN)
+
+
+def normalize_host(host: str) -> str:
+    """Lower-case a host and drop any port and trailing dot"""
+    host = host.strip().lower()
+    if host.startswith("["):
+        return host
+    return host.split(":", 1)[0].rstrip(".")
+
+
+class DomainIndex:
+    """Classifies hosts as excluded, a known retailer (with weight) or unknown.
+
+    ``retailers`` maps retailer keys to a scoring weight; ``shopping`` lists
+    further known retailers without a weight (they classify with weight 0).
+    Exclusion wins when a host matches both tables.
+    """
+
+    def __init__(
+        self,
+        excluded: Iterable[str],
+        retailers: Mapping[str, int],
+        shopping: Iterable[str] = (),
+        cache_size: int = 4096,
+    ):
+        self._labels: Dict[str, HostClass] = {}
+        self._suffixes: dict = {}
+        for key in excluded:
+            self._add(key, HostClass(EXCLUDED))
+        for key in shopping:
+            self._add(key, HostClass(RETAILER))
+        for key, weight in retailers.items():
+            self._add(key, HostClass(RETAILER, weight))
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+
+    def _add(self, key: str, value: HostClass) -> None:
+        key = _NON_LABEL_RE.sub("", key.lower()).strip(".")
+        if not key:
+            return
+        if "." in key:
+            node = self._suffixes
+            for label in reversed(key.split(".")):
+                node = node.setdefault(label, {})
+            node[""] = self._merge(node.get(""), value)
+        else:
+            self._labels[key] = self._merge(self._labels.get(key), value)
+
+    @staticmethod
+    def _merge(current: Optional[HostClass], new: HostClass) -> HostClass:
+        if current is None:
+            return new
+        if current.excluded or new.excluded:
+            return HostClass(EXCLUDED)
+        return HostClass(RETAILER, max(current.weight, new.weight))
+
+    def _classify(self, host: str) -> HostClass:
+        labels = normalize_host(host).split(".")
+        found: Optional[HostClass] = None
+
+        # Domain-suffix keys: walk the trie from the TLD inwards
+        node = self._suffixes
+        for label in reversed(labels):
+            node = node.get(label)
+            if node is None:
+                break
+            if "" in node:
+                found = self._merge(found, node[""])
+
+        # Brand keys: any label except the TLD
+        for label in labels[:-1]:
+            match = self._labels.get(label)
+            if match is not None:
+                found = self._merge(found, match)
+
+        return found or _UNKNOWN
+
+    def is_excluded(self, host: str) -> bool:
+        return self.classify(host).excluded
+
+    def retailer_weight(self, host: str) -> int:
+        return self.classify(host).weight
+
+    def stats(self) -> Dict[str, int]:
+        info = self.classify.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "size": info.currsize}
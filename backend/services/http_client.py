@@ -0,0 +1,260 @@
+"""Shared, pooled HTTP client used for Tavily calls and product-page scraping.
+
+One ``httpx.AsyncClient`` is created per purpose for the lifetime of the app so
+that TCP/TLS connections are reused across requests instead of being
+re-established on every ``/dupes`` call.
+"""
+import asyncio
+import os
+import socket
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import httpcore
+import httpx
+
+try:
+    import h2  # noqa: F401  (optional dependency, enables HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    from httpcore import AsyncNetworkBackend
+    from httpcore._backends.auto import AutoBackend
+except ImportError:  # pragma: no cover - very old httpcore
+    AsyncNetworkBackend = object
+    AutoBackend = None
+
+
+SCRAPE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+}
+
+
+def parse_resolve_overrides(value: Optional[str]) -> Dict[str, str]:
+    """Parse ``HTTP_RESOLVE`` ("host=address,*=address") into a host -> address map"""
+    overrides: Dict[str, str] = {}
+    for entry in (value or "").split(","):
+        host, sep, address = entry.strip().partition("=")
+        if sep and host.strip() and address.strip():
+            overrides[host.strip().lower()] = address.strip()
+    return overrides
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass
+class HttpClientConfig:
+    """Connection-pool settings, read from the environment by ``from_env``."""
+    max_connections: int = 100
+    max_keepalive_connections: int = 40
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    dns_cache_ttl: float = 300.0
+    tavily_timeout: float = 20.0
+    scrape_timeout: float = 6.0
+    # Fixed host -> address answers, like curl --resolve ("*" matches any host);
+    # used to point scraping at a local fixture server
+    resolve_overrides: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def from_env(cls) -> "HttpClientConfig":
+        return cls(
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", cls.max_connections)),
+            max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", cls.max_keepalive_connections)),
+            keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", cls.keepalive_expiry)),
+            http2=_env_bool("HTTP_HTTP2", cls.http2),
+            dns_cache_ttl=float(os.getenv("HTTP_DNS_CACHE_TTL", cls.dns_cache_ttl)),
+            tavily_timeout=float(os.getenv("TAVILY_TIMEOUT", cls.tavily_timeout)),
+            scrape_timeout=float(os.getenv("SCRAPE_TIMEOUT", cls.scrape_timeout)),
+            resolve_overrides=parse_resolve_overrides(os.getenv("HTTP_RESOLVE")),
+        )
+
+
+class DNSCache:
+    """In-process cache of ``getaddrinfo`` results with a fixed TTL."""
+
+    def __init__(self, ttl: float = 300.0, overrides: Optional[Dict[str, str]] = None):
+        self.ttl = ttl
+        self.overrides = overrides or {}
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self._locks: Dict[Tuple[str, int], asyncio.Lock] = {}
+
+    async def resolve(self, host: str, port: int) -> List[str]:
+        override = self.overrides.get(host.lower()) or self.overrides.get("*")
+        if override:
+            return [override]
+
+        key = (host, port)
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            loop = asyncio.get_running_loop()
+            infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            addresses = []
+            for info in infos:
+                address = info[4][0]
+                if address not in addresses:
+                    addresses.append(address)
+            self._entries[key] = (time.monotonic() + self.ttl, addresses)
+            return addresses
+
+    def reset_locks(self) -> None:
+        """Drop per-host locks, which are bound to the loop that created them."""
+        self._locks.clear()
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._locks.clear()
+
+
+def _is_ip_address(host: str) -> bool:
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, host)
+            return True
+        except (OSError, ValueError):
+            continue
+    return False
+
+
+class CachingResolverBackend(AsyncNetworkBackend):
+    """httpcore network backend that resolves hostnames through a ``DNSCache``.
+
+    Only the TCP connect target is replaced by the cached IP address; TLS still
+    uses the original hostname for SNI and certificate verification.
+    """
+
+    def __init__(self, dns_cache: DNSCache, backend=None):
+        self.dns_cache = dns_cache
+        self._backend = backend or AutoBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        if _is_ip_address(host) or host == "localhost":
+            return await self._backend.connect_tcp(
+                host, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+            )
+
+        # Raise httpcore errors, which httpx maps to httpx.ConnectError; a raw
+        # OSError would escape every ``except httpx.HTTPError`` handler
+        try:
+            addresses = await self.dns_cache.resolve(host, port)
+        except OSError as e:
+            raise httpcore.ConnectError(f"Could not resolve {host}: {e}") from e
+        last_error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+                )
+            except OSError as e:
+                last_error = httpcore.ConnectError(str(e))
+                last_error.__cause__ = e
+            except Exception as e:
+                last_error = e
+        if last_error is not None:
+            raise last_error
+        raise httpcore.ConnectError(f"Could not resolve {host}")
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class HttpClientManager:
+    """Owns the app-lifetime HTTP clients.
+
+    ``startup``/``shutdown`` are wired to the FastAPI lifespan; clients are also
+    created lazily on first use so code paths that run without the lifespan
+    (scripts, ``TestClient`` without a context manager) still share a pool.
+    """
+
+    def __init__(self, config: Optional[HttpClientConfig] = None):
+        self.config = config or HttpClientConfig.from_env()
+        self.dns_cache = DNSCache(ttl=self.config.dns_cache_ttl, overrides=self.config.resolve_overrides)
+        self._tavily: Optional[httpx.AsyncClient] = None
+        self._scrape: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _check_loop(self) -> None:
+        # Pooled connections are bound to the loop that opened them; if we are
+        # now running on a different loop the old clients cannot be reused.
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._loop is not loop:
+            self._tavily = None
+            self._scrape = None
+            self._loop = loop
+            self.dns_cache.reset_locks()
+
+    def _build_transport(self) -> httpx.AsyncHTTPTransport:
+        limits = httpx.Limits(
+            max_connections=self.config.max_connections,
+            max_keepalive_connections=self.config.max_keepalive_connections,
+            keepalive_expiry=self.config.keepalive_expiry,
+        )
+        transport = httpx.AsyncHTTPTransport(
+            limits=limits,
+            http2=self.config.http2 and HTTP2_AVAILABLE,
+        )
+        # httpx does not expose the network backend, so install the DNS cache
+        # on the underlying httpcore pool before any connection is opened.
+        pool = getattr(transport, "_pool", None)
+        if AutoBackend is not None and hasattr(pool, "_network_backend"):
+            pool._network_backend = CachingResolverBackend(self.dns_cache)
+        return transport
+
+    def _build_client(self, **kwargs) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=self._build_transport(), **kwargs)
+
+    @property
+    def tavily(self) -> httpx.AsyncClient:
+        """Client for Tavily API calls."""
+        self._check_loop()
+        if self._tavily is None:
+            self._tavily = self._build_client(timeout=self.config.tavily_timeout)
+        return self._tavily
+
+    @property
+    def scrape(self) -> httpx.AsyncClient:
+        """Client for product-page scraping (follows redirects, browser headers)."""
+        self._check_loop()
+        if self._scrape is None:
+            self._scrape = self._build_client(
+                timeout=self.config.scrape_timeout,
+                follow_redirects=True,
+                headers=SCRAPE_HEADERS,
+            )
+        return self._scrape
+
+    async def startup(self) -> None:
+        # Touch both clients so the pools exist before the first request.
+        self.tavily
+        self.scrape
+
+    async def shutdown(self) -> None:
+        for client in (self._tavily, self._scrape):
+            if client is not None and hasattr(client, "aclose"):
+                await client.aclose()
+        self._tavily = None
+        self._scrape = None
+        self._loop = None
+        self.dns_cache.clear()
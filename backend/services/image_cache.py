@@ -0,0 +1,108 @@
+"""Cache mapping canonical product URLs to their resolved image.
+
+Entries record which extraction strategy found the image. Failed lookups are
+stored too (negative caching) with shorter TTLs so that pages that time out or
+have no usable image are not re-scraped on every request.
+"""
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from backend.services.cache_backends import CacheBackend, SQLiteBackend, backend_from_env
+from backend.services.urls import canonical_url
+
+FOUND = "found"
+NOT_FOUND = "not_found"
+TIMEOUT = "timeout"
+ERROR = "error"
+
+KEY_PREFIX = "img:"
+
+
+@dataclass
+class CachedImage:
+    url: str
+    image: Optional[str]
+    strategy: Optional[str]
+    status: str
+    expires_at: float
+
+    @property
+    def found(self) -> bool:
+        return self.status == FOUND and bool(self.image)
+
+
+class ImageCache:
+    """URL -> image cache with per-status TTLs.
+
+    Entries live in a cache backend: by default a SQLite file at ``path``;
+    ``IMAGE_CACHE_BACKEND`` / ``CACHE_BACKEND`` can point every worker at a
+    shared store instead (see cache_backends).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 7 * 24 * 3600,
+        not_found_ttl: float = 6 * 3600,
+        timeout_ttl: float = 10 * 60,
+        error_ttl: float = 30 * 60,
+        clock: Callable[[], float] = time.time,
+        backend: Optional[CacheBackend] = None,
+    ):
+        self.path = path
+        self.ttls = {FOUND: ttl, NOT_FOUND: not_found_ttl, TIMEOUT: timeout_ttl, ERROR: error_ttl}
+        self._clock = clock
+        self.backend = backend or SQLiteBackend(path, clock=clock)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "ImageCache":
+        path = os.getenv("IMAGE_CACHE_PATH", os.path.join(".cache", "image_cache.sqlite3"))
+        return cls(
+            path=path,
+            ttl=float(os.getenv("IMAGE_CACHE_TTL", 7 * 24 * 3600)),
+            not_found_ttl=float(os.getenv("IMAGE_CACHE_NOT_FOUND_TTL", 6 * 3600)),
+            timeout_ttl=float(os.getenv("IMAGE_CACHE_TIMEOUT_TTL", 10 * 60)),
+            error_ttl=float(os.getenv("IMAGE_CACHE_ERROR_TTL", 30 * 60)),
+            backend=backend_from_env("IMAGE", f"sqlite:///{path}"),
+        )
+
+    def get(self, url: str) -> Optional[CachedImage]:
+        """Return the live entry for ``url`` (found or negative), or None"""
+        key = canonical_url(url)
+        raw = self.backend.get(KEY_PREFIX + key)
+        entry = json.loads(raw) if raw is not None else None
+        if entry is None or entry["expires_at"] <= self._clock():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CachedImage(url=key, **entry)
+
+    def put(self, url: str, image: Optional[str], strategy: Optional[str] = None, status: str = FOUND) -> None:
+        if status == FOUND and not image:
+            status = NOT_FOUND
+        ttl = self.ttls[status]
+        entry = {
+            "image": image if status == FOUND else None,
+            "strategy": strategy,
+            "status": status,
+            "expires_at": self._clock() + ttl,
+        }
+        self.backend.set(KEY_PREFIX + canonical_url(url), json.dumps(entry).encode(), ttl)
+
+    def put_miss(self, url: str, status: str = NOT_FOUND) -> None:
+        """Record a short-lived negative entry (no image, timeout or error)"""
+        self.put(url, None, None, status)
+
+    def purge_expired(self) -> int:
+        return self.backend.purge_expired()
+
+    def close(self) -> None:
+        self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "backend": self.backend.stats()}
@@ -0,0 +1,484 @@
+"""Product image extraction from HTML pages.
+
+``extract_image_fast`` runs the strategy cascade over a single regex pass of
+the raw bytes; ``extract_image_bs4`` runs the same cascade over a parsed
+BeautifulSoup document and is kept as a configurable fallback.
+``HeadScanner`` looks at the document incrementally while it downloads so that
+the fetch can stop as soon as a high-confidence image is known.
+"""
+import html as html_lib
+import json
+import re
+from typing import NamedTuple, Optional
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+
+
+class ImageHit(NamedTuple):
+    """An image scraped from a product page and the strategy that found it"""
+    url: str
+    strategy: str
+
+
+class ProductPage(NamedTuple):
+    """A downloaded product page whose image is still to be extracted"""
+    body: bytes
+    encoding: Optional[str]
+
+
+def _usable(img_url, allow_svg: bool = False) -> bool:
+    return isinstance(img_url, str) and img_url.startswith('http') and (allow_svg or not img_url.endswith('.svg'))
+
+
+def jsonld_image(raw: str) -> Optional[str]:
+    """Return the first usable image from a JSON-LD block, if any"""
+    try:
+        data = json.loads(raw or '{}')
+    except Exception:
+        return None
+    # data can be a list or dict
+    candidates = data if isinstance(data, list) else [data]
+    for node in candidates:
+        # Look for product.image or image fields
+        if isinstance(node, dict):
+            img = node.get('image') or node.get('images')
+            if _usable(img):
+                return img
+            if isinstance(img, list) and img:
+                for iurl in img:
+                    if _usable(iurl):
+                        return iurl
+    return None
+
+
+# Strategy 5 selectors, tried in order: (img attribute, pattern)
+PRODUCT_SELECTORS = [
+    ('class', re.compile(r'product.*image', re.I)),
+    ('class', re.compile(r'main.*image', re.I)),
+    ('id', re.compile(r'product.*image', re.I)),
+    ('class', re.compile(r'gallery.*main', re.I)),
+]
+PRODUCT_HINT_RE = re.compile(r'(product|main|hero|large|full|detail)')
+SKIP_IMAGE_HINTS = ['logo', 'icon', 'sprite', 'avatar', 'placeholder', 'blank']
+
+
+def largest_image(images, url: str) -> Optional[ImageHit]:
+    """Pick the most product-like image from ``img`` elements (tags or attr dicts)"""
+    best_img = None
+    best_score = 0
+    
+    for img in images:
+        src = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
+        if not src:
+            continue
+        
+        # Skip obvious non-product images
+        src_lower = src.lower()
+        if any(skip in src_lower for skip in SKIP_IMAGE_HINTS):
+            continue
+        
+        if src.endswith('.svg'):
+            continue
+        
+        # Normalize URL
+        src = normalize_url(src, url)
+        if not src or not src.startswith('http'):
+            continue
+
+        # If srcset exists, prefer the largest candidate from it
+        srcset = img.get('srcset') or img.get('data-srcset')
+        if srcset:
+            try:
+                candidate = pick_largest_from_srcset(srcset, base=url)
+                if candidate:
+                    candidate = normalize_url(candidate, url)
+                    if candidate and candidate.startswith('http') and not candidate.endswith('.svg'):
+                        return ImageHit(candidate, "srcset")
+            except Exception:
+                pass
+        
+        # Score based on dimensions and URL hints
+        score = 0
+        width = img.get('width', '')
+        height = img.get('height', '')
+        
+        if width and width.isdigit():
+            score += int(width)
+        if height and height.isdigit():
+            score += int(height)
+        
+        # Boost for product-related keywords
+        if PRODUCT_HINT_RE.search(src_lower):
+            score += 500
+        
+        if score > best_score:
+            best_score = score
+            best_img = src
+    
+    if best_img:
+        return ImageHit(best_img, "largest")
+    return None
+
+
+def extract_image_bs4(html, url: str) -> Optional[ImageHit]:
+    """Run the full BeautifulSoup strategy cascade over a page"""
+    soup = BeautifulSoup(html, 'lxml')
+
+    # Strategy 0: JSON-LD (ld+json) - structured product data often contains images
+    for script in soup.find_all('script', type='application/ld+json'):
+        img = jsonld_image(script.string)
+        if img:
+            return ImageHit(img, "json-ld")
+
+    # Strategy 1: Open Graph image (most reliable for e-commerce)
+    og_image = soup.find('meta', property='og:image')
+    if og_image and og_image.get('content'):
+        img_url = og_image.get('content')
+        if img_url and img_url.startswith('http') and not img_url.endswith('.svg'):
+            return ImageHit(img_url, "og:image")
+    
+    # Strategy 2: Twitter card image
+    twitter_image = soup.find('meta', attrs={'name': 'twitter:image'})
+    if twitter_image and twitter_image.get('content'):
+        img_url = twitter_image.get('content')
+        if img_url and img_url.startswith('http') and not img_url.endswith('.svg'):
+            return ImageHit(img_url, "twitter:image")
+    
+    # Strategy 3: Product meta tag
+    product_image = soup.find('meta', attrs={'property': 'product:image'})
+    if product_image and product_image.get('content'):
+        img_url = product_image.get('content')
+        if img_url and img_url.startswith('http'):
+            return ImageHit(img_url, "product:image")
+    
+    # Strategy 4: itemprop="image" (schema.org)
+    itemprop_image = soup.find('img', attrs={'itemprop': 'image'})
+    if itemprop_image:
+        img_url = itemprop_image.get('src') or itemprop_image.get('data-src')
+        if img_url:
+            img_url = normalize_url(img_url, url)
+            if img_url and img_url.startswith('http'):
+                return ImageHit(img_url, "itemprop")
+
+    # Strategy 4b: link rel=image_src
+    link_img = soup.find('link', rel=re.compile(r'image_src', re.I))
+    if link_img and link_img.get('href'):
+        li = normalize_url(link_img.get('href'), url)
+        if li and li.startswith('http') and not li.endswith('.svg'):
+            return ImageHit(li, "image_src")
+
+    # Strategy 4c: og:image:secure_url
+    og_secure = soup.find('meta', property='og:image:secure_url')
+    if og_secure and og_secure.get('content'):
+        osrc = og_secure.get('content')
+        if osrc and osrc.startswith('http') and not osrc.endswith('.svg'):
+            return ImageHit(osrc, "og:image:secure_url")
+    
+    # Strategy 5: Common product image selectors
+    for attr, pattern in PRODUCT_SELECTORS:
+        img = soup.find('img', {attr: pattern})
+        if img:
+            img_url = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
+            if img_url:
+                img_url = normalize_url(img_url, url)
+                if img_url and img_url.startswith('http') and not img_url.endswith('.svg'):
+                    return ImageHit(img_url, "selector")
+    
+    # Strategy 6: Find largest image (likely the product)
+    return largest_image(soup.find_all('img', src=True, limit=20), url)
+
+
+def normalize_url(img_url: str, base_url: str) -> str:
+    """Convert relative URLs to absolute"""
+    if img_url.startswith('http'):
+        return img_url
+    elif img_url.startswith('//'):
+        return 'https:' + img_url
+    elif img_url.startswith('/'):
+        parsed = urlparse(base_url)
+        return f"{parsed.scheme}://{parsed.netloc}{img_url}"
+    return img_url
+
+
+def pick_largest_from_srcset(srcset: str, base: str = '') -> Optional[str]:
+    """Parse a srcset string and return the URL with the largest width descriptor.
+
+    Example: 'a.jpg 400w, b.jpg 800w' -> returns b.jpg
+    """
+    try:
+        candidates = []
+        parts = [p.strip() for p in srcset.split(',') if p.strip()]
+        for p in parts:
+            tokens = p.split()
+            if not tokens:
+                continue
+            url = tokens[0]
+            desc = tokens[1] if len(tokens) > 1 else ''
+            width = 0
+            if desc.endswith('w'):
+                try:
+                    width = int(desc[:-1])
+                except Exception:
+                    width = 0
+            elif desc.endswith('x'):
+                try:
+                    # scale 'x' descriptors to an approximate width by multiplier
+                    width = int(float(desc[:-1]) * 1000)
+                except Exception:
+                    width = 0
+            candidates.append((width, url))
+
+        if not candidates:
+            return None
+        # pick largest
+        candidates.sort(key=lambda x: x[0], reverse=True)
+        chosen = candidates[0][1]
+        # Normalize if needed
+        if chosen.startswith('//'):
+            return 'https:' + chosen
+        if chosen.startswith('/') and base:
+            return normalize_url(chosen, base)
+        return chosen
+    except Exception:
+        return None
+
+
+# Byte-level patterns shared by the HeadScanner and the fast extractor
+TAG_RE = re.compile(
+    rb'<(?:(script)\b([^>]*)>(.*?)</script\s*>|(meta|link|img)\b([^>]*)>)',
+    re.I | re.S,
+)
+META_TAG_RE = re.compile(rb'<meta\b([^>]*)>', re.I)
+ATTR_RE = re.compile(rb'([a-zA-Z_:][-a-zA-Z0-9_:.]*)\s*=\s*("[^"]*"|\'[^\']*\'|[^\s"\'>]+)')
+JSONLD_RE = re.compile(
+    rb'<script\b[^>]*type\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>',
+    re.I | re.S,
+)
+HEAD_END_RE = re.compile(rb'</head\s*>|<body\b', re.I)
+SCRIPT_OPEN_RE = re.compile(rb'<script\b', re.I)
+SCRIPT_CLOSE_RE = re.compile(rb'</script\s*>', re.I)
+JSONLD_TYPE_RE = re.compile(rb'type\s*=\s*["\']?application/ld\+json', re.I)
+IMAGE_SRC_REL_RE = re.compile(r'image_src', re.I)
+
+
+def _decode(raw: bytes, encoding: Optional[str]) -> str:
+    try:
+        return raw.decode(encoding or 'utf-8', errors='replace')
+    except LookupError:
+        return raw.decode('utf-8', errors='replace')
+
+
+def parse_attrs(raw: bytes, encoding: Optional[str] = None) -> dict:
+    """Parse the attribute section of a start tag into a dict keyed by lower-cased name"""
+    attrs = {}
+    for name, value in ATTR_RE.findall(raw):
+        if value[:1] in (b'"', b"'"):
+            value = value[1:-1]
+        key = name.decode('ascii', errors='replace').lower()
+        if key not in attrs:
+            attrs[key] = html_lib.unescape(_decode(value, encoding).strip())
+    return attrs
+
+
+class PageMetadata:
+    """Image-relevant tags collected from a page in one pass over the bytes"""
+
+    def __init__(self):
+        self.jsonld = []  # raw JSON-LD block contents, in document order
+        self.meta = {}  # first content per og/twitter/product key
+        self.image_src: Optional[str] = None  # first link rel=image_src href
+        self.images = []  # attr dicts of every img, in document order
+
+
+def scan_page(body: bytes, encoding: Optional[str] = None) -> PageMetadata:
+    """Collect JSON-LD blocks, meta/link tags and img candidates in a single pass"""
+    page = PageMetadata()
+    for m in TAG_RE.finditer(body):
+        if m.group(1):
+            attrs = parse_attrs(m.group(2), encoding)
+            if attrs.get('type', '').lower() == 'application/ld+json':
+                page.jsonld.append(_decode(m.group(3), encoding))
+            continue
+
+        tag = m.group(4).lower().decode('ascii')
+        attrs = parse_attrs(m.group(5), encoding)
+        if tag == 'img':
+            page.images.append(attrs)
+        elif tag == 'meta':
+            # Mirrors soup.find: og/product keys by property, twitter by name
+            for key, attr in (('og:image', 'property'), ('og:image:secure_url', 'property'),
+                              ('product:image', 'property'), ('twitter:image', 'name')):
+                if key not in page.meta and attrs.get(attr) == key:
+                    page.meta[key] = attrs.get('content')
+        elif tag == 'link' and page.image_src is None:
+            if any(IMAGE_SRC_REL_RE.search(rel) for rel in attrs.get('rel', '').split()):
+                page.image_src = attrs.get('href') or ''
+    return page
+
+
+def _class_matches(img: dict, attr: str, pattern) -> bool:
+    value = img.get(attr)
+    if value is None:
+        return False
+    if attr == 'class':
+        # BeautifulSoup matches multi-valued class against each value and the whole string
+        return bool(pattern.search(value)) or any(pattern.search(c) for c in value.split())
+    return bool(pattern.search(value))
+
+
+def extract_image_fast(body: bytes, url: str, encoding: Optional[str] = None) -> Optional[ImageHit]:
+    """Run the strategy cascade over a single-pass scan of the raw bytes.
+
+    Same priority order as ``extract_image_bs4`` without building a tree.
+    """
+    page = scan_page(body, encoding)
+
+    # Strategy 0: JSON-LD
+    for raw in page.jsonld:
+        img = jsonld_image(raw)
+        if img:
+            return ImageHit(img, "json-ld")
+
+    # Strategies 1-3: og:image, twitter:image, product:image
+    if _usable(page.meta.get('og:image')):
+        return ImageHit(page.meta['og:image'], "og:image")
+    if _usable(page.meta.get('twitter:image')):
+        return ImageHit(page.meta['twitter:image'], "twitter:image")
+    if _usable(page.meta.get('product:image'), allow_svg=True):
+        return ImageHit(page.meta['product:image'], "product:image")
+
+    # Strategy 4: itemprop="image"
+    itemprop = next((img for img in page.images if img.get('itemprop') == 'image'), None)
+    if itemprop:
+        img_url = itemprop.get('src') or itemprop.get('data-src')
+        if img_url:
+            img_url = normalize_url(img_url, url)
+            if _usable(img_url, allow_svg=True):
+                return ImageHit(img_url, "itemprop")
+
+    # Strategy 4b: link rel=image_src
+    if page.image_src:
+        li = normalize_url(page.image_src, url)
+        if _usable(li):
+            return ImageHit(li, "image_src")
+
+    # Strategy 4c: og:image:secure_url
+    if _usable(page.meta.get('og:image:secure_url')):
+        return ImageHit(page.meta['og:image:secure_url'], "og:image:secure_url")
+
+    # Strategy 5: Common product image selectors
+    for attr, pattern in PRODUCT_SELECTORS:
+        img = next((i for i in page.images if _class_matches(i, attr, pattern)), None)
+        if img:
+            img_url = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
+            if img_url:
+                img_url = normalize_url(img_url, url)
+                if _usable(img_url):
+                    return ImageHit(img_url, "selector")
+
+    # Strategy 6: largest of the first 20 images with a src attribute
+    return largest_image([img for img in page.images if 'src' in img][:20], url)
+
+
+def extract_image(body: bytes, url: str, encoding: Optional[str] = None,
+                  parser: str = "fast", bs4_fallback: bool = False) -> Optional[ImageHit]:
+    """Extract the product image with the configured parser.
+
+    ``parser`` is "fast" (single-pass byte scanner) or "bs4". With
+    ``bs4_fallback`` the BeautifulSoup cascade also runs when the fast path
+    finds nothing. This usually runs in a parse worker process, so outcomes
+    are logged by the caller.
+    """
+    if parser == "bs4":
+        return extract_image_bs4(body, url)
+    hit = extract_image_fast(body, url, encoding)
+    if hit is None and bs4_fallback:
+        hit = extract_image_bs4(body, url)
+    return hit
+
+
+class HeadScanner:
+    """Incrementally scans a downloading page for head metadata.
+
+    Feed raw chunks with ``feed``; ``done`` becomes true once a JSON-LD image
+    is seen, or the head has closed and an og:image is known. In that case
+    ``best`` holds the result and the rest of the body need not be downloaded.
+    """
+
+    def __init__(self, encoding: Optional[str] = None):
+        self.encoding = encoding
+        self._buffer = bytearray()
+        self._meta_pos = 0
+        self._jsonld_pos = 0
+        self.head_closed = False
+        self.jsonld: Optional[str] = None
+        self.og_image: Optional[str] = None
+        self.done = False
+
+    def feed(self, chunk: bytes) -> bool:
+        """Consume a chunk; return True once a high-confidence image is known"""
+        self._buffer += chunk
+        if self.done:
+            return True
+
+        # JSON-LD blocks can appear anywhere, keep looking until one is found
+        if self.jsonld is None:
+            pos = self._jsonld_pos
+            for m in JSONLD_RE.finditer(self._buffer, pos):
+                pos = m.end()
+                img = jsonld_image(_decode(m.group(1), self.encoding))
+                if img:
+                    self.jsonld = img
+                    self.done = True
+                    return True
+            self._jsonld_pos = self._jsonld_resume(pos)
+
+        if not self.head_closed:
+            end = HEAD_END_RE.search(self._buffer, self._meta_pos)
+            limit = end.start() if end else len(self._buffer)
+            pos = self._meta_pos
+            for m in META_TAG_RE.finditer(self._buffer, pos, limit):
+                pos = m.end()
+                if self.og_image is None:
+                    attrs = parse_attrs(m.group(1), self.encoding)
+                    if attrs.get('property') == 'og:image' and _usable(attrs.get('content')):
+                        self.og_image = attrs['content']
+            if end:
+                self.head_closed = True
+            else:
+                # Only a tag still missing its '>' can match once more bytes arrive
+                start = self._buffer.rfind(b'<', pos, limit)
+                self._meta_pos = start if start != -1 and self._buffer.find(b'>', start) == -1 else limit
+
+        if self.head_closed and self.og_image:
+            self.done = True
+        return self.done
+
+    def _jsonld_resume(self, pos: int) -> int:
+        """Where the next JSON-LD scan must start so each byte is scanned about once
+
+        That is the first JSON-LD ``<script`` (or one whose tag is still
+        incomplete) whose closing tag has not arrived, or else just far enough
+        back to catch a ``<script`` split across chunks.
+        """
+        buf = self._buffer
+        for m in SCRIPT_OPEN_RE.finditer(buf, pos):
+            tag_end = buf.find(b'>', m.end())
+            if tag_end == -1:
+                return m.start()
+            if JSONLD_TYPE_RE.search(buf, m.end(), tag_end) and not SCRIPT_CLOSE_RE.search(buf, tag_end):
+                return m.start()
+        return max(pos, len(buf) - len(b'<script'))
+
+    def finish(self) -> bytes:
+        """Return everything received so far"""
+        return bytes(self._buffer)
+
+    @property
+    def best(self) -> Optional[ImageHit]:
+        if self.jsonld:
+            return ImageHit(self.jsonld, "json-ld")
+        if self.done and self.og_image:
+            return ImageHit(self.og_image, "og:image")
+        return None
@@ -0,0 +1,128 @@
+"""Single-pass multi-keyword matching for the content filters.
+
+``KeywordMatcher`` compiles several categorized keyword lists once into one
+trie-shaped regular expression. A single scan of a text returns every keyword
+occurrence (with its position), so all filters and signal counts for a result
+come from one pass instead of one substring search per keyword.
+
+Matching is plain substring matching, exactly like ``keyword in text``.
+"""
+import re
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, Tuple
+
+
+def _trie_pattern(node: dict) -> str:
+    """Build a regex for a trie node; longest alternatives are tried first"""
+    terminal = "" in node
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch != ""]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if terminal:
+        # Greedy optional: prefer the longer keyword, fall back to this one
+        return "(?:" + body + ")?"
+    return body
+
+
+class KeywordMatches:
+    """Keyword occurrences found in one scan, queryable by category"""
+
+    def __init__(self, hits: Iterable[Tuple[int, str]], categories: Mapping[str, FrozenSet[str]]):
+        self.hits = hits
+        self._categories = categories
+        self._by_category: Optional[Dict[str, List[Tuple[int, str]]]] = None
+
+    def _category_hits(self, category: str) -> List[Tuple[int, str]]:
+        # Group hits as (end offset, keyword) per category once, on first query
+        if self._by_category is None:
+            grouped: Dict[str, List[Tuple[int, str]]] = {}
+            for pos, kw in self.hits:
+                for name in self._categories[kw]:
+                    grouped.setdefault(name, []).append((pos + len(kw), kw))
+            self._by_category = grouped
+        return self._by_category.get(category, [])
+
+    def keywords(self, category: str, end: Optional[int] = None) -> Set[str]:
+        """Distinct keywords of ``category`` found (optionally only within text[:end])"""
+        hits = self._category_hits(category)
+        if end is None:
+            return {kw for _, kw in hits}
+        return {kw for stop, kw in hits if stop <= end}
+
+    def has(self, category: str, end: Optional[int] = None) -> bool:
+        hits = self._category_hits(category)
+        if end is None:
+            return bool(hits)
+        return any(stop <= end for stop, _ in hits)
+
+    def count(self, category: str, end: Optional[int] = None) -> int:
+        return len(self.keywords(category, end))
+
+
+class KeywordMatcher:
+    """Matches many categorized keywords in one pass over a text.
+
+    ``categories`` maps a category name to its keywords; a keyword may belong
+    to several categories. Texts are expected to be lower-cased already, as
+    are the keywords.
+    """
+
+    def __init__(self, categories: Mapping[str, Iterable[str]]):
+        by_keyword: Dict[str, Set[str]] = {}
+        for category, words in categories.items():
+            for word in words:
+                if word:
+                    by_keyword.setdefault(word, set()).add(category)
+        self.categories: Dict[str, FrozenSet[str]] = {k: frozenset(v) for k, v in by_keyword.items()}
+
+        trie: dict = {}
+        for word in self.categories:
+            node = trie
+            for ch in word:
+                node = node.setdefault(ch, {})
+            node[""] = True
+        self._pattern = re.compile(_trie_pattern(trie)) if trie else None
+
+        # The regex reports the longest keyword at the leftmost position and
+        # resumes after it. Keywords nested inside a match are added from
+        # ``_contained``; if the tail of a match can begin another keyword the
+        # search resumes at that offset instead (``_resume``), so every
+        # occurrence is still found.
+        words = list(self.categories)
+        self._contained: Dict[str, Tuple[Tuple[int, str], ...]] = {}
+        self._resume: Dict[str, int] = {}
+        for word in words:
+            nested = []
+            for other in words:
+                if other == word:
+                    continue
+                start = word.find(other)
+                while start != -1:
+                    nested.append((start, other))
+                    start = word.find(other, start + 1)
+            self._contained[word] = tuple(nested)
+            self._resume[word] = next(
+                (
+                    offset for offset in range(1, len(word))
+                    if any(other.startswith(word[offset:]) and len(other) > len(word) - offset for other in words)
+                ),
+                len(word),
+            )
+
+    def scan(self, text: str) -> KeywordMatches:
+        hits: Set[Tuple[int, str]] = set()
+        if self._pattern is None:
+            return KeywordMatches(hits, self.categories)
+        search = self._pattern.search
+        pos = 0
+        while True:
+            m = search(text, pos)
+            if m is None:
+                break
+            word = m.group()
+            start = m.start()
+            hits.add((start, word))
+            for offset, other in self._contained[word]:
+                hits.add((start + offset, other))
+            pos = start + self._resume[word]
+        return KeywordMatches(hits, self.categories)
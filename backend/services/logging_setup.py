@@ -0,0 +1,231 @@
+"""Structured, non-blocking logging for the backend.
+
+Log calls only put the record on a queue (``QueueHandler``); a
+``QueueListener`` thread formats and writes it, so a slow stdout or log file
+never stalls the event loop. Lines are JSON objects (``LOG_FORMAT=text`` for a
+console-friendly format) carrying the correlation ID of the request that
+produced them, so one slow ``/dupes`` call can be followed across its scrapes.
+
+Subsystem loggers live under ``dupefinder``:
+
+    dupefinder.api      one line per request, pipeline summaries
+    dupefinder.search   Tavily calls
+    dupefinder.scrape   product page fetch failures and skips
+    dupefinder.images   per-image outcomes (sampled, see LOG_SAMPLE_RATE)
+
+Environment:
+
+    LOG_LEVEL        level for dupefinder.* (default INFO)
+    LOG_LEVELS       per-subsystem overrides, e.g. "scrape=DEBUG,images=WARNING"
+    LOG_FORMAT       json (default) or text
+    LOG_SAMPLE_RATE  fraction of requests whose per-image lines are kept (default 0.1)
+"""
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import uuid
+import zlib
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, Optional, TextIO
+
+ROOT_LOGGER = "dupefinder"
+NO_REQUEST = "-"
+
+_request_id: ContextVar[str] = ContextVar("request_id", default=NO_REQUEST)
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+def get_logger(subsystem: str) -> logging.Logger:
+    return logging.getLogger(f"{ROOT_LOGGER}.{subsystem}")
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def request_id_from_header(value: Optional[str]) -> str:
+    """Use a caller-supplied X-Request-ID if it is sane, otherwise make a new one"""
+    if value and _VALID_REQUEST_ID.match(value):
+        return value
+    return new_request_id()
+
+
+def set_request_id(request_id: str) -> Token:
+    return _request_id.set(request_id)
+
+
+def get_request_id() -> str:
+    return _request_id.get()
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request's correlation ID (runs in the logging call's context)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = _request_id.get()
+        return True
+
+
+class SampleFilter(logging.Filter):
+    """Keep a fraction of sub-WARNING records.
+
+    Sampling is per request: the decision is a hash of the correlation ID, so a
+    sampled request keeps all of its lines. Records logged outside a request
+    are sampled individually. Warnings and errors always pass.
+    """
+
+    def __init__(self, rate: float, rng: Callable[[], float] = random.random):
+        super().__init__()
+        self.rate = rate
+        self.rng = rng
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        if self.rate <= 0:
+            return False
+        request_id = _request_id.get()
+        if request_id == NO_REQUEST:
+            return self.rng() < self.rate
+        return zlib.crc32(request_id.encode()) % 10000 < self.rate * 10000
+
+
+# Attributes every LogRecord has; anything else came in through ``extra=``
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id", "taskName"}
+
+
+def _extra_fields(record: logging.LogRecord) -> Dict[str, object]:
+    return {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, request_id, msg, then any extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", NO_REQUEST),
+            "msg": record.getMessage(),
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines with extra fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s [%(request_id)s] %(message)s")
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        line = super().formatMessage(record)
+        extra = _extra_fields(record)
+        if extra:
+            line += " " + " ".join(f"{k}={v}" for k, v in extra.items())
+        return line
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Freeze the message now (args may be mutated later) but leave the
+        # formatting of the line itself to the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """Parse "scrape=DEBUG,images=WARNING" into {subsystem: level}"""
+    levels = {}
+    for part in spec.split(","):
+        if "=" in part:
+            name, level = part.split("=", 1)
+            if name.strip() and level.strip():
+                levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+@dataclass
+class LogConfig:
+    level: str = "INFO"
+    levels: Dict[str, str] = field(default_factory=dict)
+    format: str = "json"
+    sample_rate: float = 0.1
+
+    @classmethod
+    def from_env(cls) -> "LogConfig":
+        return cls(
+            level=os.getenv("LOG_LEVEL", "INFO").upper(),
+            levels=parse_levels(os.getenv("LOG_LEVELS", "")),
+            format=os.getenv("LOG_FORMAT", "json").lower(),
+            sample_rate=float(os.getenv("LOG_SAMPLE_RATE", "0.1")),
+        )
+
+
+_listener: Optional[QueueListener] = None
+_configured: Dict[str, logging.Logger] = {}
+
+
+def setup_logging(config: Optional[LogConfig] = None, stream: Optional[TextIO] = None) -> QueueListener:
+    """Route dupefinder.* logs through a queue to a background writer thread"""
+    global _listener
+    config = config or LogConfig.from_env()
+    shutdown_logging()
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(TextFormatter() if config.format == "text" else JsonFormatter())
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = _QueueHandler(records)
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.addHandler(queue_handler)
+    root.setLevel(config.level)
+    root.propagate = False
+    for subsystem, level in config.levels.items():
+        logger = _configured[subsystem] = get_logger(subsystem)
+        logger.setLevel(level)
+    get_logger("images").addFilter(SampleFilter(config.sample_rate))
+
+    _listener = QueueListener(records, handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Flush queued records, stop the writer thread and undo ``setup_logging``"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    root = logging.getLogger(ROOT_LOGGER)
+    for handler in [h for h in root.handlers if isinstance(h, _QueueHandler)]:
+        root.removeHandler(handler)
+    root.setLevel(logging.NOTSET)
+    root.propagate = True
+    for logger in _configured.values():
+        logger.setLevel(logging.NOTSET)
+    _configured.clear()
+    images = get_logger("images")
+    for sampler in [f for f in images.filters if isinstance(f, SampleFilter)]:
+        images.removeFilter(sampler)
@@ -0,0 +1,270 @@
+"""In-process metrics with Prometheus text exposition, plus Server-Timing.
+
+``Counter``, ``Gauge`` and ``Histogram`` keep labelled series in memory;
+``MetricsRegistry.render`` produces the Prometheus text format (0.0.4) for the
+``/metrics`` endpoint. Each metric caps its number of label sets
+(``max_series``); values beyond the cap are folded into an ``other`` series so
+per-host labels can't grow without bound.
+
+``begin_request`` / ``stage`` / ``server_timing_header`` collect per-request
+stage durations in a context variable. Tasks spawned while handling a request
+inherit it, so their stages are reported on that request's ``Server-Timing``
+header. ``begin_timeline`` additionally keeps every individual stage (start,
+duration, labels) for request profiling.
+"""
+import functools
+import inspect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+OVERFLOW_LABEL = "other"
+_INF_BUCKET = 'le="+Inf"'
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), max_series: int = 500):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.max_series = max_series
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        if key not in self._series and len(self._series) >= self.max_series:
+            key = tuple(OVERFLOW_LABEL for _ in self.labelnames)
+        return key
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        with self._lock:
+            key = self._key(labels)
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._series.get(tuple(str(labels[n]) for n in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            for key, value in sorted(self._series.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Gauge whose value is set directly or read from ``fn`` at render time"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Optional[Callable[[], float]] = None, **kwargs):
+        super().__init__(name, help, **kwargs)
+        self.fn = fn
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        if self.fn is not None:
+            lines.append(f"{self.name} {_format_value(float(self.fn()))}")
+            return lines
+        with self._lock:
+            for key, value in sorted(self._series.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, max_series: int = 500):
+        super().__init__(name, help, labelnames, max_series)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        with self._lock:
+            key = self._key(labels)
+            series = self._series.get(key)
+            if series is None:
+                # per-bucket counts (non-cumulative), then sum and count
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(tuple(str(labels[n]) for n in self.labelnames))
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, _INF_BUCKET)} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = (), **kwargs) -> Counter:
+        return self.register(Counter(name, help, labelnames, **kwargs))
+
+    def gauge(self, name: str, help: str, fn: Optional[Callable[[], float]] = None, **kwargs) -> Gauge:
+        return self.register(Gauge(name, help, fn, **kwargs))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), **kwargs) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, **kwargs))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+# Per-request stage timings for the Server-Timing header
+_timings: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar("server_timing", default=None)
+# Individual stages (name, perf_counter start, seconds, labels), only while profiling
+_timeline: ContextVar[Optional[List[Tuple[str, float, float, Dict[str, str]]]]] = ContextVar(
+    "stage_timeline", default=None
+)
+
+
+def begin_request() -> Dict[str, List[float]]:
+    """Start collecting stage timings for the current request"""
+    timings: Dict[str, List[float]] = {}
+    _timings.set(timings)
+    return timings
+
+
+def begin_timeline() -> List[Tuple[str, float, float, Dict[str, str]]]:
+    """Also keep each stage of the current request, in order of completion"""
+    timeline: List[Tuple[str, float, float, Dict[str, str]]] = []
+    _timeline.set(timeline)
+    return timeline
+
+
+def record_stage(name: str, seconds: float) -> None:
+    timings = _timings.get()
+    if timings is not None:
+        entry = timings.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+
+@contextmanager
+def stage(name: str, histogram: Optional[Histogram] = None, **labels: str) -> Iterator[None]:
+    """Time a block as a Server-Timing stage (and optionally observe it in ``histogram``)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        record_stage(name, elapsed)
+        timeline = _timeline.get()
+        if timeline is not None:
+            timeline.append((name, started, elapsed, labels))
+        if histogram is not None:
+            histogram.observe(elapsed, **labels)
+
+
+def timed(name: str, histogram: Optional[Histogram] = None, **labels: str):
+    """Decorator form of ``stage`` for sync and async functions"""
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name, histogram, **labels):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name, histogram, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def server_timing_header(timings: Dict[str, List[float]], total: Optional[float] = None) -> str:
+    """Format stage timings as a Server-Timing header value (durations in ms)"""
+    parts = []
+    for name, (seconds, calls) in timings.items():
+        part = f"{name};dur={seconds * 1000:.1f}"
+        if calls > 1:
+            part += f';desc="{calls} calls"'
+        parts.append(part)
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
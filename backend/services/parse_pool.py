@@ -0,0 +1,108 @@
+"""Executor that runs HTML parsing off the event loop.
+
+Parsing a product page is CPU-bound; running it inline in an async handler
+stalls every other request on the worker. ``ParseExecutor`` hands the work to
+a process pool (default) or thread pool and bounds how much can be queued.
+"""
+import asyncio
+import os
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class ParseExecutorSaturated(RuntimeError):
+    """Raised when the parse queue is full and new work is shed."""
+
+
+class ParseExecutor:
+    """Bounded process/thread pool for parse jobs.
+
+    At most ``max_workers`` jobs run at once and at most ``max_queue`` more
+    wait for a worker; submissions beyond that raise
+    ``ParseExecutorSaturated`` instead of piling up. ``kind="inline"`` runs
+    jobs directly on the calling thread (useful for debugging).
+    """
+
+    def __init__(self, kind: str = "process", max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        if kind not in ("process", "thread", "inline"):
+            raise ValueError(f"Unknown parse executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_queue = self.max_workers * 4 if max_queue is None else max_queue
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+
+    @classmethod
+    def from_env(cls) -> "ParseExecutor":
+        workers = os.getenv("PARSE_WORKERS")
+        queue = os.getenv("PARSE_QUEUE_DEPTH")
+        return cls(
+            kind=os.getenv("PARSE_EXECUTOR", "process").lower(),
+            max_workers=int(workers) if workers else None,
+            max_queue=int(queue) if queue else None,
+        )
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self.kind == "inline":
+            return None
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="parse")
+        return self._executor
+
+    def start(self) -> None:
+        self._get_executor()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` in the pool and await its result without blocking the loop"""
+        if self._pending >= self.capacity:
+            self.rejected += 1
+            raise ParseExecutorSaturated(f"parse queue full ({self._pending}/{self.capacity})")
+
+        self._pending += 1
+        try:
+            executor = self._get_executor()
+            if executor is None:
+                result = fn(*args)
+            else:
+                try:
+                    result = await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+                except BrokenExecutor:
+                    # A worker died (OOM, segfault in a parser); start a fresh pool next time
+                    self._executor = None
+                    raise
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        running = min(self._pending, self.max_workers)
+        return {
+            "kind": self.kind,
+            "workers": self.max_workers,
+            "running": running,
+            "queued": self._pending - running,
+            "capacity": self.capacity,
+            "saturation": round(self._pending / self.capacity, 3) if self.capacity else 1.0,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "failed": self.failed,
+        }
@@ -0,0 +1,263 @@
+"""Background refresh of the most requested /dupes queries.
+
+Every /dupes request is counted in a ``DecayingCounter`` (a hit ``half_life``
+seconds ago weighs half as much as one now), so the counter follows what is
+popular lately rather than all time. Every ``interval`` seconds the
+scheduler takes the ``top_n`` queries and refreshes those whose cached
+response is missing or has used ``refresh_at`` of its TTL. Only queries
+still in demand qualify: a score of at least ``min_score`` and a hit within
+the last TTL, so a query nobody asks for any more is left to expire instead
+of being refreshed forever. A refresh recomputes the response with a new
+Tavily search and re-scrapes product images that are about to expire, so
+hot queries keep hitting a fresh cache and users never wait on upstream
+calls for them.
+
+Refreshes draw from a token bucket of ``budget_per_minute`` upstream calls:
+one per search plus one per image re-scrape (``spend``). When it is empty
+the rest of the cycle waits for the next one, hottest first, and images
+keep their cached entry until it expires. At startup the seed queries
+(``PREFETCH_SEEDS``, ``PREFETCH_SEED_FILE``) are warmed under the same
+budget and start with one hit each.
+
+Counters and budgets are per worker process.
+"""
+import asyncio
+import contextvars
+import heapq
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from backend.services.logging_setup import get_logger
+
+log = get_logger("prefetch")
+
+
+class DecayingCounter:
+    """Exponentially decaying hit counts for up to ``maxsize`` keys, each with a payload"""
+
+    def __init__(self, half_life: float = 3600.0, maxsize: int = 4096,
+                 clock: Callable[[], float] = time.monotonic):
+        self.half_life = half_life
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries: Dict[Hashable, Tuple[float, float, Any]] = {}  # key -> (score, last hit, payload)
+
+    def _decayed(self, score: float, at: float, now: float) -> float:
+        return score * 0.5 ** ((now - at) / self.half_life)
+
+    def hit(self, key: Hashable, payload: Any = None, weight: float = 1.0) -> None:
+        now = self._clock()
+        score, at, _ = self._entries.get(key, (0.0, now, None))
+        self._entries[key] = (self._decayed(score, at, now) + weight, now, payload)
+        if len(self._entries) > self.maxsize:
+            # Drop the coldest quarter at once so pruning stays rare
+            keep = self.top(self.maxsize * 3 // 4)
+            self._entries = {key: self._entries[key] for key, _, _ in keep}
+
+    def score(self, key: Hashable) -> float:
+        entry = self._entries.get(key)
+        return self._decayed(entry[0], entry[1], self._clock()) if entry else 0.0
+
+    def last_hit(self, key: Hashable) -> Optional[float]:
+        entry = self._entries.get(key)
+        return entry[1] if entry else None
+
+    def top(self, n: int) -> List[Tuple[Hashable, float, Any]]:
+        """The ``n`` highest (key, current score, payload), hottest first"""
+        now = self._clock()
+        return heapq.nlargest(
+            n,
+            ((key, self._decayed(score, at, now), payload) for key, (score, at, payload) in self._entries.items()),
+            key=lambda entry: entry[1],
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class Budget:
+    """Token bucket allowing ``per_minute`` upstream calls, with bursts up to the same amount"""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.per_minute = per_minute
+        self._clock = clock
+        self._tokens = float(per_minute)
+        self._updated = clock()
+
+    def take(self) -> bool:
+        now = self._clock()
+        self._tokens = min(self.per_minute, self._tokens + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+@dataclass
+class PrefetchConfig:
+    enabled: bool = True
+    top_n: int = 50
+    interval: float = 30.0
+    refresh_at: float = 0.8
+    budget_per_minute: float = 30.0
+    half_life: float = 3600.0
+    min_score: float = 2.0
+    concurrency: int = 2
+    seeds: List[str] = field(default_factory=list)
+    seed_max_results: int = 24  # what the frontend asks for
+    image_horizon: float = 3600.0
+
+    @classmethod
+    def from_env(cls) -> "PrefetchConfig":
+        defaults = cls()
+        seeds = [s.strip() for s in os.getenv("PREFETCH_SEEDS", "").split(",") if s.strip()]
+        seed_file = os.getenv("PREFETCH_SEED_FILE")
+        if seed_file:
+            with open(seed_file, encoding="utf-8") as f:
+                seeds += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        return cls(
+            enabled=os.getenv("PREFETCH_ENABLED", "1").lower() not in ("0", "false", "no"),
+            top_n=int(os.getenv("PREFETCH_TOP_N", str(defaults.top_n))),
+            interval=float(os.getenv("PREFETCH_INTERVAL", str(defaults.interval))),
+            refresh_at=float(os.getenv("PREFETCH_REFRESH_AT", str(defaults.refresh_at))),
+            budget_per_minute=float(os.getenv("PREFETCH_BUDGET_PER_MINUTE", str(defaults.budget_per_minute))),
+            half_life=float(os.getenv("PREFETCH_HALF_LIFE", str(defaults.half_life))),
+            min_score=float(os.getenv("PREFETCH_MIN_SCORE", str(defaults.min_score))),
+            concurrency=int(os.getenv("PREFETCH_CONCURRENCY", str(defaults.concurrency))),
+            seeds=seeds,
+            seed_max_results=int(os.getenv("PREFETCH_SEED_MAX_RESULTS", str(defaults.seed_max_results))),
+            image_horizon=float(os.getenv("PREFETCH_IMAGE_HORIZON", str(defaults.image_horizon))),
+        )
+
+
+class PrefetchScheduler:
+    """Counts queries and keeps the hottest ones' cached responses fresh.
+
+    ``key(query, max_results)`` is the response-cache key, ``age(key)`` the
+    age in seconds of its entry (None when absent) and ``refresh(query,
+    max_results)`` recomputes it.
+    """
+
+    def __init__(
+        self,
+        config: PrefetchConfig,
+        key: Callable[[str, int], Hashable],
+        age: Callable[[Hashable], Optional[float]],
+        refresh: Callable[[str, int], Awaitable[Any]],
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.config = config
+        self._key = key
+        self._age = age
+        self._refresh = refresh
+        self.ttl = ttl
+        self._clock = clock
+        self.counter = DecayingCounter(config.half_life, clock=clock)
+        self.budget = Budget(config.budget_per_minute, clock=clock)
+        self._task: Optional[asyncio.Task] = None
+        self.cycles = 0
+        self.refreshed = 0
+        self.failed = 0
+        self.over_budget = 0
+
+    def record(self, query: str, max_results: int, weight: float = 1.0) -> None:
+        self.counter.hit(self._key(query, max_results), (query, max_results), weight)
+
+    def due(self) -> List[Tuple[str, int]]:
+        """Top queries still in demand whose response is missing or near expiry, hottest first"""
+        due = []
+        now = self._clock()
+        for key, score, payload in self.counter.top(self.config.top_n):
+            if score < self.config.min_score:
+                break  # the rest are colder still
+            if now - self.counter.last_hit(key) > self.ttl:
+                continue  # not asked for within a TTL: let it expire
+            age = self._age(key)
+            if age is None or age >= self.ttl * self.config.refresh_at:
+                due.append(payload)
+        return due
+
+    async def refresh_due(self, queries: Optional[List[Tuple[str, int]]] = None) -> int:
+        """Refresh ``queries`` (default: ``due()``) within the budget; returns how many ran"""
+        queries = self.due() if queries is None else queries
+        allowed = []
+        for query in queries:
+            if not self.budget.take():
+                self.over_budget += len(queries) - len(allowed)
+                break
+            allowed.append(query)
+        limit = asyncio.Semaphore(self.config.concurrency)
+
+        async def run(query: str, max_results: int) -> None:
+            async with limit:
+                try:
+                    await self._refresh(query, max_results)
+                    self.refreshed += 1
+                except Exception as e:
+                    self.failed += 1
+                    log.warning("prefetch failed", extra={"query": query, "error": str(e)[:200]})
+
+        await asyncio.gather(*(run(q, n) for q, n in allowed))
+        return len(allowed)
+
+    def spend(self) -> bool:
+        """Take one upstream call from the budget for a refresh's extra work (an image re-scrape)"""
+        if self.budget.take():
+            return True
+        self.over_budget += 1
+        return False
+
+    async def warmup(self) -> int:
+        seeds = [(seed, self.config.seed_max_results) for seed in self.config.seeds]
+        for query, max_results in seeds:
+            self.record(query, max_results)
+        cold = [(q, n) for q, n in seeds if self._age(self._key(q, n)) is None]
+        warmed = await self.refresh_due(cold)
+        if seeds:
+            log.info("prefetch warmup", extra={"seeds": len(seeds), "warmed": warmed})
+        return warmed
+
+    async def _run(self) -> None:
+        await self.warmup()
+        while True:
+            await asyncio.sleep(self.config.interval)
+            self.cycles += 1
+            try:
+                refreshed = await self.refresh_due()
+            except Exception as e:  # keep the loop alive whatever a cycle does
+                log.error("prefetch cycle failed", extra={"error": str(e)[:200]})
+                continue
+            if refreshed:
+                log.debug("prefetch cycle", extra={"refreshed": refreshed, "tracked": len(self.counter)})
+
+    def start(self) -> None:
+        if self._task is None:
+            # A fresh context: background refreshes belong to no request's timings or logs
+            self._task = asyncio.get_running_loop().create_task(self._run(), context=contextvars.Context())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "tracked": len(self.counter),
+            "top": [
+                {"query": payload[0], "max_results": payload[1], "score": round(score, 2)}
+                for _, score, payload in self.counter.top(10)
+            ],
+            "cycles": self.cycles,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "over_budget": self.over_budget,
+        }
@@ -0,0 +1,164 @@
+"""Price extraction from result titles and snippets.
+
+Patterns are compiled once at import. Supported:
+
+* currency symbols and codes before or after the amount ("$39", "US$39",
+  "£20", "39,99 €", "EUR 20", "20 USD");
+* thousands separators in either convention ("$1,299.99", "1.299,99 €");
+* ranges ("$20 - $40", "$20-40", "$20 to $40"), reported as the low end
+  with ``high`` set;
+* "now"/"sale" precedence: a price marked "now", "sale", "only", ... wins
+  over an unmarked one, and prices marked "was", "reg", "MSRP", ... are only
+  used when nothing else is found ("was $120 now $39" is $39).
+
+``parse_prices`` parses a whole result list with a single regex pass.
+``comparable_amounts`` keeps only amounts in one currency (USD, what the
+frontend shows), since amounts in different currencies can't be compared.
+"""
+import re
+import string
+from bisect import bisect_right
+from typing import Iterable, List, NamedTuple, Optional
+
+CURRENCY_SYMBOLS = {
+    "$": "USD", "US$": "USD", "C$": "CAD", "CA$": "CAD", "A$": "AUD", "AU$": "AUD",
+    "NZ$": "NZD", "HK$": "HKD", "S$": "SGD", "€": "EUR", "£": "GBP", "¥": "JPY", "₹": "INR",
+}
+CURRENCY_CODES = ("USD", "EUR", "GBP", "CAD", "AUD", "NZD", "JPY", "INR")
+# Currency prices are scored and displayed in; others count as unknown
+DISPLAY_CURRENCY = "USD"
+
+_SYMBOL = "|".join(re.escape(s) for s in sorted(CURRENCY_SYMBOLS, key=len, reverse=True))
+_CODE = "|".join(CURRENCY_CODES)
+# Grouped thousands ("1,299.99", "1.299,99") or a plain amount ("39.99", "39,99")
+_NUMBER = r"(?<![\d.,])(?:\d{1,3}(?:[,.]\d{3})+(?:[.,]\d{1,2})?|\d+(?:[.,]\d{1,2})?)(?![\d])"
+_RANGE_SEP = r"\s*(?:-|–|—|to)\s*"
+
+PRICE_RE = re.compile(
+    # Cheap first-character guard so most positions are rejected at once
+    r"(?=[$€£¥₹0-9ACEGHIJNSU])(?:"
+    # Currency first: "$20", "US$ 20", "EUR 20", "$20 - $40", "$20-40"
+    rf"(?P<cur>{_SYMBOL}|\b(?:{_CODE})\b)\s?(?P<num>{_NUMBER})"
+    rf"(?:{_RANGE_SEP}(?:{_SYMBOL}|\b(?:{_CODE})\b)?\s?(?P<high>{_NUMBER}))?"
+    # Currency last: "39,99 €", "20-40 EUR"
+    rf"|(?P<num2>{_NUMBER})(?:{_RANGE_SEP}(?P<high2>{_NUMBER}))?\s?(?P<cur2>€|£|\b(?:{_CODE})\b)"
+    r")"
+)
+
+# Words just before a price that change its precedence ("sale price $5",
+# "Was: $9"); checked with str.endswith on the lower-cased text before it
+SALE_MARKERS = ("now", "sale", "only", "our", "deal", "today", "just")
+REFERENCE_MARKERS = (
+    "was", "orig", "original", "reg", "regular", "list", "msrp", "rrp", "retail", "compare at", "valued at",
+)
+_MARKER_WINDOW = 20
+_NON_WORD = string.punctuation + string.whitespace
+
+# Precedence of a price by its marker
+SALE, PLAIN, REFERENCE = 2, 1, 0
+_KINDS = {SALE: "sale", PLAIN: "price", REFERENCE: "was"}
+
+# Separates texts in the batch pass; never part of a price match
+_SEPARATOR = "\x00"
+
+
+class Price(NamedTuple):
+    amount: float  # price to use; the low end of a range
+    currency: str  # ISO 4217 code
+    high: Optional[float] = None  # upper end of a range
+    kind: str = "price"  # "sale", "price" or "was" (only a reference price was found)
+    was: Optional[float] = None  # reference ("was"/"reg"/MSRP) price, if one was given
+
+    @property
+    def is_range(self) -> bool:
+        return self.high is not None
+
+
+def parse_amount(raw: str) -> float:
+    """Parse "1,299.99", "1.299,99", "39,99" or "39.99" into a float"""
+    if "," in raw and "." in raw:
+        # Both separators: whichever comes last is the decimal point
+        decimal = "," if raw.rfind(",") > raw.rfind(".") else "."
+        thousands = "." if decimal == "," else ","
+        return float(raw.replace(thousands, "").replace(decimal, "."))
+    for sep in ",.":
+        if sep in raw:
+            parts = raw.split(sep)
+            if len(parts) > 2 or len(parts[-1]) == 3:
+                return float(raw.replace(sep, ""))
+            return float(raw.replace(sep, "."))
+    return float(raw)
+
+
+def _ends_with_word(tail: str, words) -> bool:
+    if not tail.endswith(words):
+        return False
+    return any(
+        tail.endswith(w) and (len(tail) == len(w) or not tail[-len(w) - 1].isalnum())
+        for w in words
+    )
+
+
+def _precedence(text: str, start: int, floor: int) -> int:
+    tail = text[max(floor, start - _MARKER_WINDOW):start].rstrip(_NON_WORD).lower()
+    if tail.endswith(" price"):
+        tail = tail[:-6].rstrip(_NON_WORD)
+    if _ends_with_word(tail, SALE_MARKERS):
+        return SALE
+    if _ends_with_word(tail, REFERENCE_MARKERS):
+        return REFERENCE
+    return PLAIN
+
+
+def _candidate(text: str, m: "re.Match[str]", floor: int):
+    cur, num, high, cur2, num2, high2 = m.group("cur", "num", "high", "cur2", "num2", "high2")
+    if num is None:
+        cur, num, high = cur2, num2, high2
+    currency = CURRENCY_SYMBOLS.get(cur, cur)
+    low = parse_amount(num)
+    high_value = parse_amount(high) if high else None
+    if high_value is not None and high_value <= low:
+        high_value = None
+    return _precedence(text, m.start(), floor), low, currency, high_value
+
+
+def _choose(candidates) -> Optional[Price]:
+    # Highest precedence wins; the first one among equals
+    if not candidates:
+        return None
+    if len(candidates) == 1:
+        rank, amount, currency, high = candidates[0]
+        return Price(amount, currency, high, _KINDS[rank])
+    best = max(candidates, key=lambda c: c[0])
+    rank, amount, currency, high = best
+    was = next((c[1] for c in candidates if c[0] == REFERENCE), None) if rank != REFERENCE else None
+    return Price(amount, currency, high, _KINDS[rank], was)
+
+
+def parse_price(text: str) -> Optional[Price]:
+    """Parse the price a text advertises, or None"""
+    if not text:
+        return None
+    return _choose([_candidate(text, m, 0) for m in PRICE_RE.finditer(text)])
+
+
+def parse_prices(texts: Iterable[str]) -> List[Optional[Price]]:
+    """Parse many texts (e.g. every snippet of a Tavily response) in one regex pass"""
+    texts = [t or "" for t in texts]
+    joined = _SEPARATOR.join(texts)
+    starts = []
+    offset = 0
+    for t in texts:
+        starts.append(offset)
+        offset += len(t) + 1
+
+    found: List[list] = [[] for _ in texts]
+    for m in PRICE_RE.finditer(joined):
+        i = bisect_right(starts, m.start()) - 1
+        found[i].append(_candidate(joined, m, starts[i]))
+    return [_choose(c) for c in found]
+
+
+def comparable_amounts(prices: Iterable[Optional[Price]], currency: str = DISPLAY_CURRENCY) -> List[Optional[float]]:
+    """The amount of each price in ``currency``, None for missing prices and other currencies"""
+    return [p.amount if p is not None and p.currency == currency else None for p in prices]
@@ -0,0 +1,219 @@
+"""Opt-in profiling of individual requests.
+
+With ``PROFILING_ENABLED=1`` a request that sends ``X-Profile: 1`` (or
+``?profile=1``) runs under cProfile and its per-stage timeline is recorded.
+When ``PROFILING_TOKEN`` is set the header/parameter must carry the token
+instead of ``1``, and the admin endpoints require it in ``X-Profile-Token``.
+
+Each capture is written to ``PROFILE_DIR`` as two files: ``<id>.json``
+(request details, stage totals, timeline and the top functions) and
+``<id>.prof`` (raw pstats, for ``python -m pstats`` or snakeviz). The
+directory is pruned oldest-first to ``PROFILE_MAX_FILES`` captures and
+``PROFILE_MAX_MB`` megabytes.
+
+cProfile sees the whole event-loop thread, so work for other requests that
+interleaves with the profiled one shows up too; parsing in the process pool
+only appears as the "parse" stage. One request is profiled at a time.
+"""
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import re
+import secrets
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+_PROFILE_ID = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}$")
+
+
+@dataclass
+class ProfileConfig:
+    enabled: bool = False
+    token: str = ""
+    directory: str = os.path.join(tempfile.gettempdir(), "dupefinder-profiles")
+    max_files: int = 50
+    max_bytes: int = 50 * 1024 * 1024
+    top_functions: int = 40
+
+    @classmethod
+    def from_env(cls) -> "ProfileConfig":
+        defaults = cls()
+        return cls(
+            enabled=os.getenv("PROFILING_ENABLED", "0").lower() in ("1", "true", "yes"),
+            token=os.getenv("PROFILING_TOKEN", ""),
+            directory=os.getenv("PROFILE_DIR", defaults.directory),
+            max_files=int(os.getenv("PROFILE_MAX_FILES", str(defaults.max_files))),
+            max_bytes=int(float(os.getenv("PROFILE_MAX_MB", "50")) * 1024 * 1024),
+        )
+
+    def requested(self, value: Optional[str]) -> bool:
+        """Whether an X-Profile header / profile parameter turns profiling on"""
+        if not self.enabled or not value:
+            return False
+        if self.token:
+            return _same_token(value, self.token)
+        return value.lower() in ("1", "true", "yes")
+
+    def authorized(self, token: Optional[str]) -> bool:
+        """Whether an X-Profile-Token may use the admin endpoints"""
+        return not self.token or _same_token(token or "", self.token)
+
+
+def _same_token(given: str, expected: str) -> bool:
+    # Compared as bytes: compare_digest refuses non-ASCII str
+    return hmac.compare_digest(given.encode("utf-8", "replace"), expected.encode("utf-8", "replace"))
+
+
+_active = threading.Lock()
+
+
+class RequestProfiler:
+    """cProfile plus the stage timeline for one request.
+
+    ``start`` returns None while another request is being profiled.
+    """
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.elapsed = 0.0
+
+    @classmethod
+    def start(cls) -> Optional["RequestProfiler"]:
+        if not _active.acquire(blocking=False):
+            return None
+        profiler = cls()
+        try:
+            profiler.profile.enable()
+        except ValueError:
+            # another profiler (e.g. a debugger's) is already active
+            _active.release()
+            return None
+        return profiler
+
+    def stop(self) -> None:
+        self.profile.disable()
+        self.elapsed = time.perf_counter() - self.started
+        _active.release()
+
+    def top_functions(self, limit: int) -> List[Dict[str, Any]]:
+        stats = pstats.Stats(self.profile)
+        rows = []
+        for (filename, line, func), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            rows.append({
+                "function": f"{func} ({os.path.basename(filename)}:{line})" if line else func,
+                "calls": calls,
+                "tottime_ms": round(tottime * 1000, 3),
+                "cumtime_ms": round(cumtime * 1000, 3),
+            })
+        rows.sort(key=lambda row: row["cumtime_ms"], reverse=True)
+        return rows[:limit]
+
+    def report(
+        self,
+        request: Dict[str, Any],
+        timings: Dict[str, List[float]],
+        timeline: List[Tuple[str, float, float, Dict[str, str]]],
+        top: int,
+    ) -> Dict[str, Any]:
+        return {
+            "request": request,
+            "started_at": datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(timespec="milliseconds"),
+            "duration_ms": round(self.elapsed * 1000, 3),
+            "stages": {
+                name: {"ms": round(seconds * 1000, 3), "calls": calls} for name, (seconds, calls) in timings.items()
+            },
+            "timeline": [
+                {"stage": name, "start_ms": round((start - self.started) * 1000, 3),
+                 "duration_ms": round(seconds * 1000, 3), **labels}
+                for name, start, seconds, labels in sorted(timeline, key=lambda entry: entry[1])
+            ],
+            "top_functions": self.top_functions(top),
+        }
+
+
+class ProfileStore:
+    """Bounded directory of profile captures"""
+
+    def __init__(self, directory: str, max_files: int = 50, max_bytes: int = 50 * 1024 * 1024):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+
+    def path(self, profile_id: str, ext: str) -> Optional[str]:
+        """Path of an existing capture file, or None (ids are validated, never joined blindly)"""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.{ext}")
+        return path if os.path.exists(path) else None
+
+    def save(self, profiler: RequestProfiler, report: Dict[str, Any]) -> str:
+        """Write a capture; its id is the start time plus a random suffix, so ids never collide"""
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = time.strftime("%Y%m%d-%H%M%S", time.gmtime(profiler.started_at)) + f"-{secrets.token_hex(4)}"
+        report = {"id": profile_id, **report}
+        profiler.profile.dump_stats(os.path.join(self.directory, f"{profile_id}.prof"))
+        with open(os.path.join(self.directory, f"{profile_id}.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        self.prune()
+        return profile_id
+
+    def _captures(self) -> List[Tuple[float, str, int]]:
+        """(mtime, id, bytes) for every capture, oldest first"""
+        captures: Dict[str, List[float]] = {}
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        for name in names:
+            profile_id, ext = os.path.splitext(name)
+            if ext not in (".json", ".prof") or not _PROFILE_ID.match(profile_id):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entry = captures.setdefault(profile_id, [st.st_mtime, 0])
+            entry[0] = min(entry[0], st.st_mtime)
+            entry[1] += st.st_size
+        return sorted((mtime, profile_id, int(size)) for profile_id, (mtime, size) in captures.items())
+
+    def prune(self) -> None:
+        captures = self._captures()
+        total = sum(size for _, _, size in captures)
+        while captures and (len(captures) > self.max_files or total > self.max_bytes):
+            _, profile_id, size = captures.pop(0)
+            for ext in ("json", "prof"):
+                try:
+                    os.remove(os.path.join(self.directory, f"{profile_id}.{ext}"))
+                except FileNotFoundError:
+                    pass
+            total -= size
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Newest first: id, request line, duration and size"""
+        out = []
+        for _, profile_id, size in reversed(self._captures()):
+            path = self.path(profile_id, "json")
+            if path is None:
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    report = json.load(f)
+            except (OSError, ValueError):
+                continue
+            out.append({
+                "id": profile_id,
+                "started_at": report.get("started_at"),
+                "duration_ms": report.get("duration_ms"),
+                "request": report.get("request"),
+                "bytes": size,
+            })
+        return out
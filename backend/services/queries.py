@@ -0,0 +1,118 @@
+"""Query normalization and lookup of recently answered, near-identical queries.
+
+``normalize_query`` reduces a query to sorted, de-duplicated, case-folded
+tokens with plurals stemmed, so "Lululemon Align leggings" and "align
+legging lululemon" share cache keys. Given ``stop_words`` (for /dupes, the
+terms its Tavily query appends) those are dropped too.
+
+``SimilarQueryIndex`` remembers normalized queries that were answered
+recently and finds others whose token sets overlap by at least a Jaccard
+threshold, so "lululemon align legging black" can be served the result of
+"lululemon align legging" instead of a fresh search and scrape. Queries that
+differ in a qualifier (a gender, age group or size word, or any token with
+a digit such as a model number) are never matched: "nike air max 90 women"
+is not "nike air max 90".
+"""
+import re
+from collections import Counter, OrderedDict
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Set, Tuple
+
+# Appended to every /dupes query before it is sent to Tavily
+DUPE_QUERY_TERMS = ("clothing", "fashion", "buy", "cheap", "affordable", "dupe", "alternative")
+
+# Tokens (stemmed) that change which products a query is after
+QUALIFIER_TERMS = (
+    "men", "women", "man", "woman", "male", "female", "unisex", "kid", "child", "children", "boy", "girl",
+    "baby", "toddler", "infant", "junior", "teen", "youth", "adult",
+    "petite", "plus", "tall", "maternity", "xxs", "xs", "small", "medium", "large", "xl", "xxl", "xxxl",
+)
+
+_TOKEN = re.compile(r"[^\W_]+(?:'[^\W_]+)?")
+# Words ending in "s" that are not plurals of a shorter word
+_SINGULAR_S = ("ss", "us", "is", "ous")
+
+
+def stem(word: str) -> str:
+    """Strip English plural endings (dresses -> dress, leggings -> legging)"""
+    if len(word) <= 3 or not word.endswith("s") or word.endswith(_SINGULAR_S):
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "shes", "ches", "xes", "zes")):
+        return word[:-2]
+    return word[:-1]
+
+
+def query_tokens(query: str, stop_words: Iterable[str] = ()) -> List[str]:
+    stops = {stem(w) for w in stop_words}
+    tokens = {stem(t.replace("'s", "").replace("'", "")) for t in _TOKEN.findall(query.casefold())}
+    return sorted(tokens - stops)
+
+
+def is_qualifier(token: str, qualifiers: FrozenSet[str] = frozenset(QUALIFIER_TERMS)) -> bool:
+    """Whether a normalized token narrows a query to different products (gender, size, model)"""
+    return token in qualifiers or any(c.isdigit() for c in token)
+
+
+def normalize_query(query: str, stop_words: Iterable[str] = ()) -> str:
+    """Order-, case- and plural-insensitive form of a query, for cache keys
+
+    Falls back to the case-folded query when every token is a stop word.
+    """
+    return " ".join(query_tokens(query, stop_words)) or " ".join(query.casefold().split())
+
+
+class SimilarQueryIndex:
+    """Normalized queries by token, per scope, bounded to the ``maxsize`` most recent"""
+
+    def __init__(self, threshold: float = 0.8, maxsize: int = 2048, qualifiers: Iterable[str] = QUALIFIER_TERMS):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.qualifiers = frozenset(stem(q) for q in qualifiers)
+        self._entries: "OrderedDict[Tuple[Hashable, str], FrozenSet[str]]" = OrderedDict()
+        self._postings: Dict[Tuple[Hashable, str], Set[str]] = {}
+        self.matches = 0
+
+    def add(self, scope: Hashable, query: str) -> None:
+        key = (scope, query)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        tokens = frozenset(query.split())
+        self._entries[key] = tokens
+        for token in tokens:
+            self._postings.setdefault((scope, token), set()).add(query)
+        while len(self._entries) > self.maxsize:
+            self.discard(*next(iter(self._entries)))
+
+    def discard(self, scope: Hashable, query: str) -> None:
+        tokens = self._entries.pop((scope, query), frozenset())
+        for token in tokens:
+            queries = self._postings.get((scope, token))
+            if queries is not None:
+                queries.discard(query)
+                if not queries:
+                    del self._postings[(scope, token)]
+
+    def similar(self, scope: Hashable, query: str) -> List[Tuple[str, float]]:
+        """Other known queries at or above the threshold that differ in no qualifier, most similar first"""
+        tokens = frozenset(query.split())
+        shared: Counter = Counter()
+        for token in tokens:
+            shared.update(self._postings.get((scope, token), ()))
+        found = []
+        for other, common in shared.items():
+            if other == query:
+                continue
+            other_tokens = self._entries[(scope, other)]
+            score = common / (len(tokens) + len(other_tokens) - common)
+            if score < self.threshold:
+                continue
+            if any(is_qualifier(t, self.qualifiers) for t in tokens ^ other_tokens):
+                continue
+            found.append((other, round(score, 3)))
+        found.sort(key=lambda match: -match[1])
+        return found
+
+    def stats(self) -> dict:
+        return {"queries": len(self._entries), "threshold": self.threshold, "matches": self.matches}
@@ -0,0 +1,171 @@
+"""Cache of serialized API responses with ETags and stale-while-revalidate.
+
+Entries hold the response body bytes plus a strong ETag derived from them, so
+a hit skips filtering, scoring and serialization entirely. An entry is fresh
+for ``ttl`` seconds; for a further ``stale_ttl`` seconds it is still served
+while one background task recomputes it, so hot queries never wait on the
+pipeline. Concurrent misses for the same key share one computation.
+
+Entries are stored in a cache backend (in-process by default, see
+cache_backends), so workers sharing a backend share hits; coalescing and
+background refreshes stay per worker.
+"""
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from backend.services.cache import SingleFlight
+from backend.services.cache_backends import CacheBackend, MemoryBackend, backend_from_env
+from backend.services.logging_setup import get_logger
+
+log = get_logger("cache")
+
+HIT = "hit"
+STALE = "stale"
+MISS = "miss"
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    etag: str
+    stored_at: float
+
+    def encode(self) -> bytes:
+        return f"{self.stored_at!r} {self.etag}\n".encode() + self.body
+
+    @classmethod
+    def decode(cls, raw: bytes) -> "CachedBody":
+        header, body = raw.split(b"\n", 1)
+        stored_at, etag = header.decode().split(" ", 1)
+        return cls(body, etag, float(stored_at))
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against ``etag``"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+class ResponseCache:
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl: float = 300.0, stale_ttl: float = 600.0,
+                 maxsize: int = 512, clock: Callable[[], float] = time.time):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self.backend = backend or MemoryBackend(maxsize, clock=clock)
+        self._inflight = SingleFlight()
+        self._refreshing: Dict[Hashable, "asyncio.Task[None]"] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        return cls(
+            backend=backend_from_env("RESPONSE", "memory://", maxsize=int(os.getenv("RESPONSE_CACHE_SIZE", "512"))),
+            ttl=float(os.getenv("RESPONSE_CACHE_TTL", "300")),
+            stale_ttl=float(os.getenv("RESPONSE_CACHE_STALE", "600")),
+        )
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return "resp:" + json.dumps(key, separators=(",", ":"))
+
+    def get(self, key: Hashable) -> Optional[CachedBody]:
+        raw = self.backend.get(self._key(key))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CachedBody.decode(raw)
+
+    def contains(self, key: Hashable) -> bool:
+        """Whether an entry (fresh or stale) exists, without counting a lookup"""
+        return self.backend.get(self._key(key)) is not None
+
+    def age(self, key: Hashable) -> Optional[float]:
+        """Seconds since the entry for ``key`` was stored (None if absent), without counting a lookup"""
+        raw = self.backend.get(self._key(key))
+        return None if raw is None else self._clock() - CachedBody.decode(raw).stored_at
+
+    def fresh(self, key: Hashable) -> Optional[CachedBody]:
+        """The entry for ``key`` if it is still fresh (counted as a hit), else None"""
+        raw = self.backend.get(self._key(key))
+        if raw is None:
+            return None
+        entry = CachedBody.decode(raw)
+        if self._clock() - entry.stored_at >= self.ttl:
+            return None
+        self.hits += 1
+        return entry
+
+    async def get_or_compute(
+        self, key: Hashable, compute: Callable[[], Awaitable[bytes]], revalidate: bool = False
+    ) -> Tuple[CachedBody, str]:
+        """Return (entry, HIT/STALE/MISS); ``revalidate`` skips the lookup (Cache-Control: no-cache)"""
+        if not revalidate:
+            entry = self.get(key)
+            if entry is not None:
+                if self._clock() - entry.stored_at < self.ttl:
+                    return entry, HIT
+                self.stale_hits += 1
+                self._refresh(key, compute)
+                return entry, STALE
+        return await self._inflight.do(key, lambda: self._compute(key, compute)), MISS
+
+    async def _compute(self, key: Hashable, compute: Callable[[], Awaitable[bytes]]) -> CachedBody:
+        body = await compute()
+        entry = CachedBody(body, make_etag(body), self._clock())
+        # Kept for the fresh and stale windows; freshness is judged from stored_at
+        self.backend.set(self._key(key), entry.encode(), self.ttl + self.stale_ttl)
+        return entry
+
+    def _refresh(self, key: Hashable, compute: Callable[[], Awaitable[bytes]]) -> None:
+        loop = asyncio.get_running_loop()
+        task = self._refreshing.get(key)
+        if task is not None and not task.done() and task.get_loop() is loop:
+            return
+        # A fresh context: the refresh belongs to no request's timings or logs
+        task = loop.create_task(self._run_refresh(key, compute), context=contextvars.Context())
+        self._refreshing[key] = task
+
+        def forget(done, key=key):
+            if self._refreshing.get(key) is done:
+                del self._refreshing[key]
+
+        task.add_done_callback(forget)
+
+    async def _run_refresh(self, key: Hashable, compute: Callable[[], Awaitable[bytes]]) -> None:
+        self.refreshes += 1
+        try:
+            await self._inflight.do(key, lambda: self._compute(key, compute))
+        except Exception as e:
+            # Keep serving the stale entry until it expires
+            self.refresh_errors += 1
+            log.warning("background refresh failed", extra={"key": repr(key), "error": str(e)[:200]})
+
+    def cache_control(self, entry: CachedBody) -> str:
+        max_age = max(0, int(self.ttl - (self._clock() - entry.stored_at)))
+        return f"public, max-age={max_age}, stale-while-revalidate={int(self.stale_ttl)}"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "backend": self.backend.stats(),
+        }
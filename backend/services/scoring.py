@@ -0,0 +1,81 @@
+"""Vectorized dupe scoring.
+
+``score_batch`` scores a whole candidate list at once: prices and retailer
+weights go into NumPy columns, savings buckets, scores and the final order are
+computed in one pass, and only the caller builds response models, for the top
+rows it actually returns.
+
+The rules match the per-item ``score_dupe`` in ``backend.app``:
+
+* score = 50 + retailer weight + savings bonus + 5 if a price is known,
+  clamped to [0, 100];
+* savings are measured against the highest price in the batch and bucketed
+  at 10/20/30/50/70 percent;
+* results are ordered by score, then -- if any price was found -- priced
+  items move to the front ordered by price (cheapest first; a zero price
+  sorts last among them) while unpriced items keep their score order.
+"""
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+
+BASE_SCORE = 50
+PRICE_BONUS = 5
+# (minimum savings percent, bonus), checked from the top down
+SAVINGS_BUCKETS = ((70, 30), (50, 25), (30, 20), (20, 15), (10, 10))
+# Sort key used for a zero price, as the old ``price if price else 999999``
+_ZERO_PRICE_KEY = 999999.0
+
+
+class BatchScores(NamedTuple):
+    order: np.ndarray  # candidate indices, best first
+    prices: np.ndarray  # NaN where no price was found
+    savings: np.ndarray  # savings percent vs the batch maximum (0 without a price)
+    scores: np.ndarray  # integer dupe scores
+    min_price: Optional[float]
+    max_price: Optional[float]
+    avg_price: Optional[float]
+    priced: int
+
+
+def savings_bonus(savings: np.ndarray) -> np.ndarray:
+    """Map savings percentages to their score bonus"""
+    conditions = [savings >= threshold for threshold, _ in SAVINGS_BUCKETS]
+    return np.select(conditions, [bonus for _, bonus in SAVINGS_BUCKETS], default=0)
+
+
+def score_batch(prices: Sequence[Optional[float]], weights: Sequence[int]) -> BatchScores:
+    """Score and order candidates given their parsed prices and retailer weights"""
+    price = np.array([np.nan if p is None else p for p in prices], dtype=np.float64)
+    weight = np.asarray(weights, dtype=np.int64)
+    has_price = ~np.isnan(price)
+    priced = int(has_price.sum())
+
+    if priced:
+        known = price[has_price]
+        min_price, max_price, avg_price = float(known.min()), float(known.max()), float(known.mean())
+    else:
+        min_price = max_price = avg_price = None
+
+    savings = np.zeros(len(price))
+    if max_price is not None and max_price > 0:
+        savings[has_price] = (max_price - price[has_price]) / max_price * 100
+        bonus = savings_bonus(savings) * has_price
+    else:
+        bonus = np.zeros(len(price), dtype=np.int64)
+
+    scores = np.clip(BASE_SCORE + weight + bonus + PRICE_BONUS * has_price, 0, 100).astype(np.int64)
+
+    # Stable sort by score (best first); position in it breaks later ties
+    by_score = np.argsort(-scores, kind="stable")
+    if priced:
+        score_rank = np.empty(len(price), dtype=np.int64)
+        score_rank[by_score] = np.arange(len(price))
+        price_key = np.where(has_price & (price != 0), price, _ZERO_PRICE_KEY)
+        price_key[~has_price] = 0
+        # lexsort: last key is primary -> priced first, then price, then score order
+        order = np.lexsort((score_rank, price_key, ~has_price))
+    else:
+        order = by_score
+
+    return BatchScores(order, price, savings, scores, min_price, max_price, avg_price, priced)
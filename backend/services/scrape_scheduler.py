@@ -0,0 +1,246 @@
+"""Concurrency limits, circuit breakers and adaptive timeouts for scraping.
+
+Every product-page fetch goes through ``ScrapeScheduler.run``, which enforces
+a global concurrency cap plus a per-host cap, skips hosts whose circuit is
+open after repeated failures, and sizes each host's timeout from the
+latencies it has actually shown.
+
+Only errors that say the host is unhealthy (connection errors, timeouts and
+5xx responses) count against its breaker; a 404 or a page we could not use
+still shows the host is answering. Host state is kept for the
+``max_hosts`` most recently used hosts.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+
+class CircuitOpen(Exception):
+    """Raised when a host's circuit breaker is open and the call is skipped."""
+
+
+class CircuitBreaker:
+    """Classic closed / open / half-open breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens for
+    ``cooldown`` seconds. Then a single trial call is let through; success
+    closes it again, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._clock() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Give back a half-open trial slot that ended without a verdict"""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = self._clock()
+
+
+class AdaptiveTimeout:
+    """Per-host timeout derived from observed latency (TCP RTO style).
+
+    ``timeout = srtt + 4 * rttvar``, clamped to ``[min_timeout, max_timeout]``;
+    a timeout doubles the current value so slow hosts are not starved.
+    """
+
+    def __init__(self, initial: float = 5.0, min_timeout: float = 1.5, max_timeout: float = 5.0):
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.value = min(max(initial, min_timeout), max_timeout)
+
+    def observe(self, latency: float) -> None:
+        if self.srtt is None:
+            self.srtt = latency
+            self.rttvar = latency / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - latency)
+            self.srtt = 0.875 * self.srtt + 0.125 * latency
+        self.value = min(max(self.srtt + 4 * self.rttvar, self.min_timeout), self.max_timeout)
+
+    def backoff(self) -> None:
+        self.value = min(self.value * 2, self.max_timeout)
+
+
+def is_host_failure(exc: BaseException) -> bool:
+    """Whether ``exc`` means the host is down or struggling, as opposed to a bad page"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, (httpx.TransportError, OSError))
+
+
+class HostState:
+    def __init__(self, per_host_limit: int, breaker: CircuitBreaker, timeout: AdaptiveTimeout):
+        self.semaphore = asyncio.Semaphore(per_host_limit)
+        self.active = 0
+        self.breaker = breaker
+        self.timeout = timeout
+        self.requests = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.skipped = 0
+
+
+class ScrapeScheduler:
+    """Schedules scrape calls under global and per-host limits."""
+
+    def __init__(
+        self,
+        global_limit: int = 16,
+        per_host_limit: int = 2,
+        failure_threshold: int = 3,
+        cooldown: float = 60.0,
+        min_timeout: float = 1.5,
+        max_timeout: float = 5.0,
+        max_hosts: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.global_limit = global_limit
+        self.per_host_limit = per_host_limit
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.max_hosts = max_hosts
+        self._clock = clock
+        self._hosts: "OrderedDict[str, HostState]" = OrderedDict()
+        self._global: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_env(cls) -> "ScrapeScheduler":
+        return cls(
+            global_limit=int(os.getenv("SCRAPE_CONCURRENCY", "16")),
+            per_host_limit=int(os.getenv("SCRAPE_PER_HOST", "2")),
+            failure_threshold=int(os.getenv("SCRAPE_BREAKER_FAILURES", "3")),
+            cooldown=float(os.getenv("SCRAPE_BREAKER_COOLDOWN", "60")),
+            min_timeout=float(os.getenv("SCRAPE_TIMEOUT_MIN", "1.5")),
+            max_timeout=float(os.getenv("SCRAPE_TIMEOUT_MAX", "5.0")),
+            max_hosts=int(os.getenv("SCRAPE_MAX_HOSTS", "1024")),
+        )
+
+    def _check_loop(self) -> None:
+        # Semaphores bind to the running loop; start fresh ones on a new loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._global = asyncio.Semaphore(self.global_limit)
+            for state in self._hosts.values():
+                state.semaphore = asyncio.Semaphore(self.per_host_limit)
+
+    def host(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is not None:
+            self._hosts.move_to_end(host)
+            return state
+        state = HostState(
+            self.per_host_limit,
+            CircuitBreaker(self.failure_threshold, self.cooldown, clock=self._clock),
+            AdaptiveTimeout(self.max_timeout, self.min_timeout, self.max_timeout),
+        )
+        self._hosts[host] = state
+        if len(self._hosts) > self.max_hosts:
+            # Forget the least recently used idle host; busy ones keep their slots
+            for name, old in self._hosts.items():
+                if old.active == 0 and old is not state:
+                    del self._hosts[name]
+                    break
+        return state
+
+    async def run(self, host: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn`` for ``host`` under the limits.
+
+        Raises ``CircuitOpen`` if the host is being skipped and
+        ``asyncio.TimeoutError`` if the call exceeds the host's timeout. The
+        timeout covers all of ``fn``, so it should do network I/O only.
+        """
+        self._check_loop()
+        state = self.host(host)
+        trial = state.breaker.state == "half-open"
+        if not state.breaker.allow():
+            state.skipped += 1
+            raise CircuitOpen(host)
+
+        state.active += 1
+        try:
+            async with self._global, state.semaphore:
+                state.requests += 1
+                timeout = state.timeout.value
+                started = time.monotonic()
+                try:
+                    result = await asyncio.wait_for(fn(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    state.timeouts += 1
+                    state.timeout.backoff()
+                    state.breaker.record_failure()
+                    raise
+                except Exception as e:
+                    if is_host_failure(e):
+                        state.errors += 1
+                        state.breaker.record_failure()
+                    else:
+                        # The host answered (a 404, not an image...): it is healthy
+                        state.breaker.record_success()
+                    raise
+                state.timeout.observe(time.monotonic() - started)
+                state.breaker.record_success()
+                return result
+        except asyncio.CancelledError:
+            # Cancelled by the caller, while waiting for a slot or during the
+            # call: neither a success nor a host failure, but a half-open
+            # trial must be handed back or the host stays skipped
+            if trial:
+                state.breaker.release_trial()
+            raise
+        finally:
+            state.active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            host: {
+                "state": s.breaker.state,
+                "timeout": round(s.timeout.value, 3),
+                "requests": s.requests,
+                "timeouts": s.timeouts,
+                "errors": s.errors,
+                "skipped": s.skipped,
+            }
+            for host, s in self._hosts.items()
+        }
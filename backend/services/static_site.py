@@ -0,0 +1,119 @@
+"""The frontend, served by the API with hashed asset names and precompression.
+
+``StaticSite.load`` reads every file under the frontend directory into
+memory once. Assets other than HTML pages get a content-hashed URL
+(``/assets/raccoon-logo.3f2a9c1d0b.webp``) that can be cached as immutable;
+the pages are rewritten to reference those names and are revalidated by ETag
+on every visit, so a deploy shows up immediately while the assets are never
+fetched twice. Compressible files are gzip- (and brotli-) compressed at the
+highest level here, once, instead of per request.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from typing import Dict, NamedTuple, Optional
+
+from backend.services.compression import ENCODINGS, compress, is_compressible
+
+ASSET_PREFIX = "/assets/"
+PAGE_EXTENSIONS = (".html",)
+SKIPPED_EXTENSIONS = (".log",)
+
+
+class StaticFile(NamedTuple):
+    body: bytes
+    media_type: str
+    etag: str
+    immutable: bool
+    variants: Dict[str, bytes]  # Content-Encoding -> compressed body
+
+
+def hashed_name(path: str, body: bytes) -> str:
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{hashlib.sha256(body).hexdigest()[:10]}{ext}"
+
+
+def _media_type(path: str) -> str:
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type in ("application/javascript", "image/svg+xml"):
+        media_type += "; charset=utf-8"
+    return media_type
+
+
+def _static_file(path: str, body: bytes, immutable: bool) -> StaticFile:
+    media_type = _media_type(path)
+    variants = {}
+    if is_compressible(media_type):
+        for encoding in ENCODINGS:
+            compressed = compress(body, encoding, best=True)
+            if len(compressed) < len(body):
+                variants[encoding] = compressed
+    # Weak: every encoding of the file shares it
+    etag = 'W/"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+    return StaticFile(body, media_type, etag, immutable, variants)
+
+
+class StaticSite:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.files: Dict[str, StaticFile] = {}
+        self.manifest: Dict[str, str] = {}  # source path -> hashed URL
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _sources(self):
+        for root, dirs, names in os.walk(self.directory):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for name in sorted(names):
+                if name.startswith(".") or name.endswith(SKIPPED_EXTENSIONS):
+                    continue
+                full = os.path.join(root, name)
+                yield os.path.relpath(full, self.directory).replace(os.sep, "/"), full
+
+    def load(self) -> None:
+        """Read, hash and precompress the frontend (safe to call more than once)"""
+        with self._lock:
+            if self._loaded:
+                return
+            files, manifest, pages = {}, {}, {}
+            for path, full in self._sources():
+                with open(full, "rb") as f:
+                    body = f.read()
+                if path.endswith(PAGE_EXTENSIONS):
+                    pages[path] = body
+                    continue
+                url = ASSET_PREFIX + hashed_name(path, body)
+                manifest[path] = url
+                files[url[1:]] = _static_file(path, body, immutable=True)
+            for path, body in pages.items():
+                files[path] = _static_file(path, self.rewrite(body, manifest), immutable=False)
+            self.files, self.manifest = files, manifest
+            self._loaded = True
+
+    @staticmethod
+    def rewrite(page: bytes, manifest: Dict[str, str]) -> bytes:
+        """Point quoted references to assets (src="raccoon-logo.webp") at their hashed URLs"""
+        if not manifest:
+            return page
+        pattern = re.compile(
+            rb"""(?<=["'(])(?:\./)?(""" + b"|".join(re.escape(p.encode()) for p in manifest) + rb""")(?=["')])"""
+        )
+        return pattern.sub(lambda m: manifest[m.group(1).decode()].encode(), page)
+
+    def get(self, path: str) -> Optional[StaticFile]:
+        if not self._loaded:
+            self.load()
+        return self.files.get(path)
+
+    def stats(self) -> dict:
+        return {
+            "directory": self.directory,
+            "loaded": self._loaded,
+            "files": len(self.files),
+            "bytes": sum(len(f.body) for f in self.files.values()),
+            "precompressed": {
+                encoding: sum(1 for f in self.files.values() if encoding in f.variants) for encoding in ENCODINGS
+            },
+        }
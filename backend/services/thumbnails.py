@@ -0,0 +1,201 @@
+"""Product-image thumbnails for the image proxy, and local placeholders.
+
+``make_thumbnail`` shrinks a downloaded image to fit a box and re-encodes it
+as WebP (or JPEG). It needs Pillow, an optional dependency; without it the
+original bytes are passed through unchanged, which still gives one cached,
+same-origin copy per image. ``ThumbnailCache`` keeps the results on disk,
+bounded by total size with least-recently-used eviction. ``placeholder_svg``
+draws the "No Image" tiles that used to come from placehold.co.
+
+Proxy URLs are signed (``sign_url``) so the endpoint only fetches images the
+backend itself handed out.
+"""
+import hashlib
+import hmac
+import html
+import io
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps, features  # optional dependency, enables resizing
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Content types we pass through when Pillow is missing, by file extension
+PASSTHROUGH_TYPES = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/gif": "gif",
+    "image/avif": "avif",
+}
+MEDIA_TYPES = {ext: media_type for media_type, ext in PASSTHROUGH_TYPES.items()}
+
+
+def sign_url(secret: bytes, url: str) -> str:
+    return hmac.new(secret, url.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def verify_url(secret: bytes, url: str, signature: str) -> bool:
+    # Compared as bytes: compare_digest refuses non-ASCII str
+    return hmac.compare_digest(sign_url(secret, url).encode(), signature.encode("utf-8", "replace"))
+
+
+def thumbnail_format(requested: str) -> str:
+    """Output format: webp when Pillow can write it, otherwise jpeg"""
+    if requested == "webp" and PIL_AVAILABLE and features.check("webp"):
+        return "webp"
+    return "jpeg"
+
+
+def make_thumbnail(data: bytes, width: int, height: int, fmt: str = "webp",
+                   content_type: str = "") -> Tuple[bytes, str]:
+    """Fit ``data`` into width x height; returns (bytes, file extension).
+
+    Runs in the parse executor. Without Pillow the original is returned as
+    long as it is a known image type; anything undecodable raises ValueError.
+    """
+    if not PIL_AVAILABLE:
+        ext = PASSTHROUGH_TYPES.get(content_type.split(";")[0].strip().lower())
+        if ext is None:
+            raise ValueError(f"Not an image: {content_type or 'unknown type'}")
+        return data, ext
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.draft("RGB", (width * 2, height * 2))  # cheap JPEG downscale on decode
+        image = ImageOps.exif_transpose(image)
+    except Exception as e:
+        raise ValueError(f"Undecodable image: {e}") from e
+    image.thumbnail((width, height), Image.LANCZOS)
+
+    out = io.BytesIO()
+    if fmt == "webp":
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        image.save(out, "WEBP", quality=80, method=4)
+        return out.getvalue(), "webp"
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    image.save(out, "JPEG", quality=82, optimize=True, progressive=True)
+    return out.getvalue(), "jpg"
+
+
+def placeholder_svg(width: int, height: int, text: str = "No Image",
+                    background: str = "#f3f4f6", foreground: str = "#9ca3af") -> bytes:
+    font_size = max(10, min(width, height) // 12)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}">'
+        f'<rect width="100%" height="100%" fill="{background}"/>'
+        f'<text x="50%" y="50%" fill="{foreground}" font-family="system-ui, sans-serif" '
+        f'font-size="{font_size}" text-anchor="middle" dominant-baseline="middle">{html.escape(text)}</text>'
+        f'</svg>'
+    ).encode()
+
+
+class ThumbnailCache:
+    """Directory of thumbnails bounded by ``max_bytes``, evicting least recently used.
+
+    Recency is kept in memory (seeded from file mtimes at startup, and files
+    are touched on use), so workers sharing the directory each enforce the
+    bound on what they know of; a file removed by another worker is simply a
+    miss.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._files: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            entries = []
+            for name in os.listdir(self.directory):
+                if name.startswith("."):
+                    continue
+                st = os.stat(os.path.join(self.directory, name))
+                entries.append((st.st_mtime, name, st.st_size))
+        except FileNotFoundError:
+            return
+        for _, name, size in sorted(entries):
+            self._files[name] = size
+            self.total_bytes += size
+
+    @staticmethod
+    def key(url: str, width: int, height: int, fmt: str) -> str:
+        return hashlib.sha256(f"{url}|{width}x{height}|{fmt}".encode()).hexdigest()[:40]
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of the cached thumbnail for ``key``, or None"""
+        for ext in MEDIA_TYPES:
+            name = f"{key}.{ext}"
+            path = os.path.join(self.directory, name)
+            if name in self._files or os.path.exists(path):
+                try:
+                    os.utime(path)
+                except FileNotFoundError:
+                    self._forget(name)
+                    continue
+                with self._lock:
+                    if name not in self._files:
+                        size = os.path.getsize(path)
+                        self._files[name] = size
+                        self.total_bytes += size
+                    self._files.move_to_end(name)
+                self.hits += 1
+                return path
+        self.misses += 1
+        return None
+
+    def _forget(self, name: str) -> None:
+        with self._lock:
+            size = self._files.pop(name, None)
+            if size is not None:
+                self.total_bytes -= size
+
+    def put(self, key: str, data: bytes, ext: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{key}.{ext}"
+        path = os.path.join(self.directory, name)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self.total_bytes += len(data) - self._files.pop(name, 0)
+            self._files[name] = len(data)
+            victims = []
+            while self.total_bytes > self.max_bytes and len(self._files) > 1:
+                victim, size = self._files.popitem(last=False)
+                self.total_bytes -= size
+                victims.append(victim)
+        for victim in victims:
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.directory, victim))
+            except FileNotFoundError:
+                pass
+        return path
+
+    def stats(self) -> dict:
+        return {
+            "files": len(self._files),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "resizing": PIL_AVAILABLE,
+        }
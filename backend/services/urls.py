@@ -0,0 +1,41 @@
+"""URL canonicalization helpers."""
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only carry tracking/attribution data
+TRACKING_PARAMS = {
+    "gclid", "fbclid", "msclkid", "dclid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_", "referrer", "source", "affiliate", "aff_id", "cmp", "campaign",
+    "_ga", "_gl", "spm", "scm", "srsltid", "tag", "psc", "th",
+}
+TRACKING_PREFIXES = ("utm_", "pd_rd_", "pf_rd_")
+
+
+def canonical_url(url: str) -> str:
+    """Return a canonical form of ``url`` suitable as a cache key.
+
+    Lower-cases scheme and host, drops default ports, fragments and tracking
+    query parameters, and sorts the remaining parameters.
+    Malformed URLs (bad brackets, a non-numeric or out-of-range port) are
+    returned unchanged.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+        hostname = parts.hostname
+    except ValueError:
+        return url
+    scheme = (parts.scheme or "https").lower()
+    host = (hostname or "").lower()
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+
+    params = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    ]
+    params.sort()
+
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+    return urlunsplit((scheme, host, path, urlencode(params), ""))
@@ -0,0 +1,51 @@
+import argparse
+import asyncio
+
+import httpx
+
+from benchmarks.common import percentile
+from benchmarks.compare import compare
+from benchmarks.load import load_backend, run_scenario
+
+
+def test_percentile_interpolates():
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([5], 99) == 5
+
+
+def test_compare_flags_regressions():
+    """Slower ops and lower throughput beyond the threshold are regressions"""
+    old = {"kind": "micro", "benchmarks": {"a": {"us_per_op": 10.0}, "b": {"us_per_op": 10.0}}}
+    new = {"kind": "micro", "benchmarks": {"a": {"us_per_op": 12.0}, "b": {"us_per_op": 9.0}}}
+    _, regressions = compare(old, new, threshold=10)
+    assert regressions == ["a"]
+
+
+def test_load_scenario_reports_latency_and_fanout(monkeypatch):
+    """A small in-process /dupes run reports percentiles and scrape fan-out"""
+    import backend.app as appmod
+
+    # load_backend rewires these module globals; restore them afterwards
+    for name in ("http_clients", "image_cache", "scrape_scheduler", "TAVILY_API_KEY", "TAVILY_API_URL"):
+        monkeypatch.setattr(appmod, name, getattr(appmod, name))
+
+    args = argparse.Namespace(
+        tavily_latency_ms=0, tavily_jitter_ms=0, tavily_error_rate=0,
+        shop_latency_ms=0, shop_jitter_ms=0, shop_error_rate=0,
+        seed=1, page_kb=10, cold=True,
+    )
+    load_backend(args)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=appmod.app), base_url="http://backend") as client:
+            first = await run_scenario(client, "/dupes", 2, 8, 4, ["quilted bag"])
+            # A second cold scenario must not be served by the first one's caches
+            second = await run_scenario(client, "/dupes", 2, 8, 4, ["quilted bag"])
+            return first, second
+
+    result, second = asyncio.run(run())
+    assert second["tavily_calls_per_request"] == 1
+    assert result["requests"] == 4 and result["errors"] == 0
+    assert result["latency"]["p50_ms"] <= result["latency"]["p99_ms"]
+    assert result["scrape_fanout"] > 0
+    assert result["tavily_calls_per_request"] == 1
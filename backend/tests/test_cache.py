@@ -0,0 +1,125 @@
+import asyncio
+
+from backend.services.cache import SingleFlight, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expires_entries():
+    """Entries disappear once their TTL has passed"""
+    clock = FakeClock()
+    cache = TTLCache(maxsize=4, ttl=10, clock=clock)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """The least recently used entry is evicted when full"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    """Concurrent callers for the same key share one upstream call"""
+    calls = []
+
+    async def run():
+        flight = SingleFlight()
+
+        async def upstream():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"results": []}
+
+        return await asyncio.gather(*[flight.do("k", upstream) for _ in range(5)])
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(r == {"results": []} for r in results)
+
+
+def test_single_flight_propagates_errors():
+    """Waiters receive the leader's exception and the key is released"""
+    async def run():
+        flight = SingleFlight()
+
+        async def boom():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream down")
+
+        results = await asyncio.gather(flight.do("k", boom), flight.do("k", boom), return_exceptions=True)
+        return results, len(flight)
+
+    results, inflight = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert inflight == 0
+
+
+def test_single_flight_survives_cancelled_leader():
+    """Cancelling the first caller leaves the call running for the others"""
+    calls = []
+
+    async def run():
+        flight = SingleFlight()
+
+        async def upstream():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return "done"
+
+        leader = asyncio.ensure_future(flight.do("k", upstream))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("k", upstream))
+        await asyncio.sleep(0.005)
+        leader.cancel()
+        result = await follower
+        return leader.cancelled(), result, len(flight)
+
+    assert asyncio.run(run()) == (True, "done", 0)
+    assert len(calls) == 1
+
+
+def test_tavily_search_uses_cache(monkeypatch):
+    """Repeated identical Tavily queries hit the upstream only once"""
+    monkeypatch.setenv("TAVILY_API_KEY", "fake")
+    import importlib
+    import backend.app as appmod
+    importlib.reload(appmod)
+
+    posts = []
+
+    class FakeResp:
+        def raise_for_status(self): ...
+        def json(self):
+            return {"results": []}
+
+    class FakeClient:
+        async def post(self, *a, **k):
+            posts.append(k["json"]["query"])
+            return FakeResp()
+
+    monkeypatch.setattr(type(appmod.http_clients), "tavily", property(lambda self: FakeClient()))
+
+    async def run():
+        await appmod.tavily_search("Lululemon  Leggings", 5)
+        await appmod.tavily_search("lululemon leggings", 5)
+        await appmod.tavily_search("lululemon leggings", 10)
+
+    asyncio.run(run())
+    assert posts == ["Lululemon  Leggings", "lululemon leggings"]
@@ -0,0 +1,174 @@
+import asyncio
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+
+import pytest
+
+from backend.services.cache_backends import (
+    CacheBackend,
+    JsonCache,
+    MemoryBackend,
+    RedisBackend,
+    SQLiteBackend,
+    open_backend,
+)
+from backend.services.image_cache import ImageCache
+from backend.services.response_cache import HIT, MISS, ResponseCache
+from benchmarks.resp_stub import start_in_thread
+
+
+@pytest.fixture
+def resp_server():
+    stand_in, port, stop = start_in_thread()
+    yield stand_in, port
+    stop.set()
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path, resp_server):
+    if request.param == "memory":
+        b = MemoryBackend(16)
+    elif request.param == "sqlite":
+        b = SQLiteBackend(str(tmp_path / "shared.sqlite3"))
+    else:
+        b = RedisBackend(port=resp_server[1])
+    yield b
+    b.close()
+
+
+def test_backend_round_trip(backend):
+    assert backend.get("k") is None
+    backend.set("k", b"\x00value\r\n", 60)
+    assert backend.get("k") == b"\x00value\r\n"
+    backend.set("k", b"new", 60)
+    assert backend.get("k") == b"new"
+    backend.delete("k")
+    assert backend.get("k") is None
+
+    backend.set("never", b"x", 0)
+    assert backend.get("never") is None
+
+    backend.set("brief", b"x", 0.05)
+    time.sleep(0.1)
+    assert backend.get("brief") is None
+    assert backend.stats()["kind"] == backend.kind
+
+
+def test_sqlite_backend_is_shared_across_processes(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    backend = SQLiteBackend(path)
+    backend.set("parent", b"1", 60)
+    child = (
+        "from backend.services.cache_backends import SQLiteBackend\n"
+        f"b = SQLiteBackend({path!r})\n"
+        "assert b.get('parent') == b'1'\n"
+        "b.set('child', b'2', 60)\n"
+    )
+    subprocess.run([sys.executable, "-c", child], check=True)
+    assert backend.get("child") == b"2"
+    journal = backend._connect().execute("PRAGMA journal_mode").fetchone()[0]
+    assert journal == "wal"
+
+
+def test_sqlite_purge_uses_the_clock(tmp_path):
+    now = [1000.0]
+    backend = SQLiteBackend(str(tmp_path / "c.sqlite3"), clock=lambda: now[0])
+    backend.set("a", b"1", 10)
+    backend.set("b", b"2", 100)
+    now[0] += 50
+    assert backend.get("a") is None
+    assert backend.purge_expired() == 1
+    assert backend.stats()["size"] == 1
+
+
+def test_sqlite_errors_are_misses_and_dropped_writes(tmp_path):
+    """A locked database fails fast instead of raising or stalling the event loop"""
+    path = str(tmp_path / "locked.sqlite3")
+    backend = SQLiteBackend(path)
+    backend.set("a", b"1", 60)
+    blocker = sqlite3.connect(path, isolation_level=None)
+    blocker.execute("BEGIN EXCLUSIVE")
+    try:
+        started = time.monotonic()
+        backend.set("b", b"2", 60)
+        assert time.monotonic() - started < 1
+        backend.delete("a")
+    finally:
+        blocker.execute("ROLLBACK")
+        blocker.close()
+    assert backend.stats()["errors"] == 2
+    assert backend.get("a") == b"1" and backend.get("b") is None
+
+    backend.close()
+    (tmp_path / "locked.sqlite3").write_bytes(b"not a database" * 100)
+    assert backend.get("a") is None
+
+
+def test_incomplete_backends_fail_at_creation():
+    class GetOnly(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
+
+
+def test_open_backend_urls(tmp_path):
+    assert isinstance(open_backend("memory://?maxsize=3"), MemoryBackend)
+    assert open_backend("memory://?maxsize=3").stats()["maxsize"] == 3
+    assert open_backend("sqlite:///.cache/x.sqlite3").path == ".cache/x.sqlite3"
+    assert open_backend(f"sqlite:///{tmp_path}/x.sqlite3").path == f"{tmp_path}/x.sqlite3"
+    redis = open_backend("redis://:pw@cache.internal:6390/2")
+    assert (redis.host, redis.port, redis.db, redis.password) == ("cache.internal", 6390, 2, "pw")
+    with pytest.raises(ValueError):
+        open_backend("memcached://localhost")
+
+
+def test_unreachable_redis_degrades_to_misses():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    backend = RedisBackend(port=port, retry_after=60)
+    backend.set("k", b"v", 60)
+    assert backend.get("k") is None
+    assert backend.errors == 1  # skipped while marked down
+
+
+def test_json_cache_and_image_cache_share_a_redis_store(resp_server):
+    port = resp_server[1]
+    worker_a = JsonCache(RedisBackend(port=port), "tavily", 60)
+    worker_b = JsonCache(RedisBackend(port=port), "tavily", 60)
+    worker_a.set(("red bag", "basic", 5), {"results": [1, 2]})
+    assert worker_b.get(("red bag", "basic", 5)) == {"results": [1, 2]}
+    assert worker_b.get(("blue bag", "basic", 5)) is None
+    assert (worker_b.stats()["hits"], worker_b.stats()["misses"]) == (1, 1)
+
+    images_a = ImageCache(":memory:", backend=RedisBackend(port=port))
+    images_b = ImageCache(":memory:", backend=RedisBackend(port=port))
+    images_a.put("https://shop.example/p?utm_source=x", "https://cdn.example/p.jpg", "og:image")
+    entry = images_b.get("https://shop.example/p")
+    assert entry.found and entry.strategy == "og:image"
+
+
+def test_response_cache_hits_across_workers(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    worker_a = ResponseCache(SQLiteBackend(path), ttl=60, stale_ttl=60)
+    worker_b = ResponseCache(SQLiteBackend(path), ttl=60, stale_ttl=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return b'{"items":[]}'
+
+    async def go():
+        first, status_a = await worker_a.get_or_compute(("dupes", "red bag", 16), compute)
+        second, status_b = await worker_b.get_or_compute(("dupes", "red bag", 16), compute)
+        return first, status_a, second, status_b
+
+    first, status_a, second, status_b = asyncio.run(go())
+    assert (status_a, status_b) == (MISS, HIT)
+    assert second.etag == first.etag and second.body == first.body
+    assert len(calls) == 1
@@ -0,0 +1,63 @@
+import importlib
+
+from backend.services.dedup import duplicate_groups, minhash, product_key, title_shingles
+
+
+def test_product_key_ignores_tracking_hosts_and_variants():
+    key = product_key("https://www.shop.example/p/quilted-bag?utm_source=x&color=black")
+    assert key == "shop.example/p/quilted-bag"
+    assert product_key("http://m.shop.example/p/quilted-bag/?gclid=1&size=M") == key
+    assert product_key("https://shop.example/p/quilted-bag?id=7") != key
+    assert product_key("https://other.example/p/quilted-bag") != key
+
+
+def test_minhash_estimates_title_similarity():
+    a = minhash(title_shingles("Quilted Chain Shoulder Bag - Black"))
+    b = minhash(title_shingles("Quilted Chain Shoulder Bag - Beige"))
+    c = minhash(title_shingles("Linen Wide Leg Trousers"))
+    assert (a == b).mean() == 1.0  # colour words are ignored
+    assert (a == c).mean() < 0.2
+
+
+def test_duplicate_groups_stay_within_a_site():
+    urls = [
+        "https://www.amazon.com/dp/B01?tag=aff",
+        "https://shop.example/bag-1",
+        "https://amazon.com/dp/B01",
+        "https://shop.example/bag-2",
+        "https://other.example/bag",
+        "https://shop.example/dress-1",
+        "https://shop.example/dress-2",
+    ]
+    titles = [
+        "Quilted bag",
+        "Quilted Crossbody Chain Bag in Black",
+        "Amazon listing",
+        "Quilted Crossbody Chain Bag in Pink",
+        "Quilted Crossbody Chain Bag in Black",
+        "Red dress 1",
+        "Red dress 2",
+    ]
+    assert duplicate_groups(urls, titles) == [[0, 2], [1, 3], [4], [5], [6]]
+
+
+def test_filter_keeps_best_copy_and_frees_slots(monkeypatch):
+    import backend.app as appmod
+    importlib.reload(appmod)
+    raw = {
+        "results": [
+            {"title": "Quilted chain bag - Black", "url": "https://shop.example/bag?utm_source=a",
+             "content": "Quilted shoulder bag $40"},
+            {"title": "Quilted chain bag - Tan", "url": "https://m.shop.example/bag?color=tan",
+             "content": "Quilted shoulder bag $25"},
+            {"title": "Leather tote", "url": "https://other.example/tote", "content": "Tote bag $60"},
+        ],
+        "images": ["https://cdn.example/bag.jpg", None, "https://cdn.example/tote.jpg"],
+    }
+
+    out = appmod.filter_clothing_results(raw, 2)
+    assert [r.url for r in out] == ["https://m.shop.example/bag?color=tan", "https://other.example/tote"]
+    assert out[0].image == "https://cdn.example/bag.jpg"  # borrowed from the dropped copy
+
+    monkeypatch.setattr(appmod, "DEDUP_ENABLED", False)
+    assert len(appmod.filter_clothing_results(raw, 3)) == 3
@@ -0,0 +1,50 @@
+from backend.services.domains import EXCLUDED, RETAILER, UNKNOWN, DomainIndex
+
+
+def make_index():
+    return DomainIndex(
+        excluded={"elle", "x.com", "youtu.be", "blogspot"},
+        retailers={"amazon": 9, "wish": 5, "hm.com": 7},
+        shopping={"etsy", "h&m", "urban outfitters"},
+    )
+
+
+def test_brand_keys_match_whole_labels_only():
+    """'elle' and 'wish' no longer match hosts that merely contain them"""
+    index = make_index()
+    assert index.classify("www.elle.com").kind == EXCLUDED
+    assert index.classify("michelle.com").kind == UNKNOWN
+    assert index.classify("wish.com") == (RETAILER, 5)
+    assert index.classify("swishboutique.com").kind == UNKNOWN
+    assert index.classify("smile.amazon.co.uk") == (RETAILER, 9)
+    assert index.classify("someone.blogspot.com").excluded
+
+
+def test_dotted_keys_match_domain_suffixes():
+    """Keys with a dot match on a label boundary"""
+    index = make_index()
+    assert index.is_excluded("x.com")
+    assert not index.is_excluded("netflix.com")
+    assert index.is_excluded("youtu.be")
+    assert index.retailer_weight("www2.hm.com") == 7
+    assert index.retailer_weight("rhythm.com") == 0
+
+
+def test_hosts_are_normalized_and_memoized():
+    """Case, ports and trailing dots don't matter; repeated hosts hit the memo"""
+    index = make_index()
+    assert index.classify("WWW.Amazon.com:443") == (RETAILER, 9)
+    assert index.classify("www.etsy.com.").retailer
+    assert index.classify("www.urbanoutfitters.com").retailer
+    index.classify("www.etsy.com.")
+    assert index.stats()["hits"] == 1
+
+
+def test_app_tables_classify_hosts():
+    """The app's tables give retailers their DUPE_SITES weight"""
+    import backend.app as appmod
+
+    assert appmod.SITE_INDEX.classify("www.shein.com") == (RETAILER, appmod.DUPE_SITES["shein"])
+    assert appmod.SITE_INDEX.classify("www.nordstrom.com") == (RETAILER, 0)
+    assert appmod.SITE_INDEX.is_excluded("www.youtube.com")
+    assert not appmod.SITE_INDEX.is_excluded("www.belle-boutique.com")
@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from backend.services.image_cache import ImageCache
+
+
+def test_dupes_batch_streams_ndjson_and_scrapes_shared_pages_once(monkeypatch, tmp_path):
+    """Every query gets a line; a page found by several queries is scraped once"""
+    monkeypatch.setenv("TAVILY_API_KEY", "fake")
+    import importlib
+    import backend.app as appmod
+    importlib.reload(appmod)
+    monkeypatch.setattr(appmod, "image_cache", ImageCache(str(tmp_path / "images.sqlite3")))
+
+    async def fake_tavily(query, max_results, search_depth="basic"):
+        if query.startswith("broken"):
+            raise httpx.ConnectError("provider down")
+        if query.startswith("buggy"):
+            raise KeyError("results")
+        own = query.split()[0]
+        return {"results": [
+            {"title": "Shared quilted bag", "url": "https://shop.example/bag?utm_source=x", "content": "Bag $25"},
+            {"title": f"{own} dress", "url": f"https://shop.example/{own}", "content": "Midi dress $40"},
+        ]}
+
+    scraped = []
+
+    async def fake_fetch(url):
+        scraped.append(url)
+        await asyncio.sleep(0.05)
+        return appmod.ImageHit(f"https://cdn.example/{len(scraped)}.jpg", "og:image")
+
+    monkeypatch.setattr(appmod, "tavily_search", fake_tavily)
+    monkeypatch.setattr(appmod, "download_product_page", fake_fetch)
+
+    client = TestClient(appmod.app)
+    r = client.post("/dupes/batch", json={"queries": ["red bag", "blue bag", "broken query", "buggy query"], "max_results": 5})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = {line["index"]: line for line in map(json.loads, r.text.splitlines())}
+    assert sorted(lines) == [0, 1, 2, 3]
+    assert "Provider error" in lines[2]["error"]
+    assert lines[3]["error"] == "Internal error"
+    for index in (0, 1):
+        urls = {item["url"] for item in lines[index]["items"]}
+        assert len(urls) == 2
+        assert all(item["image"].startswith("https://cdn.example/") for item in lines[index]["items"])
+
+    # bag (shared), red, blue: three distinct pages, three scrapes
+    assert len(scraped) == 3
+
+
+def test_dupes_batch_validates_queries(monkeypatch):
+    """Empty batches and too-short queries are rejected"""
+    monkeypatch.setenv("TAVILY_API_KEY", "fake")
+    from backend.app import app
+    client = TestClient(app)
+    assert client.post("/dupes/batch", json={"queries": []}).status_code == 422
+    assert client.post("/dupes/batch", json={"queries": ["ok query", "a"]}).status_code == 422
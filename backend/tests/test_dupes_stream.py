@@ -0,0 +1,63 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from backend.services.image_cache import ImageCache
+
+
+def parse_events(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_dupes_stream_emits_items_then_images_then_done(monkeypatch, tmp_path):
+    """Items arrive first with fallback images, real images are patched in, then a summary"""
+    monkeypatch.setenv("TAVILY_API_KEY", "fake")
+    import importlib
+    import backend.app as appmod
+    importlib.reload(appmod)
+    monkeypatch.setattr(appmod, "image_cache", ImageCache(str(tmp_path / "images.sqlite3")))
+
+    async def fake_tavily(query, max_results, search_depth="basic"):
+        return {
+            "results": [
+                {"title": "Quilted bag $25", "url": "https://www.amazon.com/bag", "content": "Chain bag $25"},
+                {"title": "Leather tote", "url": "https://shop.example/tote", "content": "Tote bag $80"},
+            ],
+            "images": ["https://tavily.example/bag.jpg"],
+        }
+
+    async def fake_fetch(url):
+        return appmod.ImageHit("https://cdn.example/tote.jpg", "og:image")
+
+    monkeypatch.setattr(appmod, "tavily_search", fake_tavily)
+    monkeypatch.setattr(appmod, "download_product_page", fake_fetch)
+
+    client = TestClient(appmod.app)
+    r = client.get("/dupes/stream", params={"q": "quilted bag", "max_results": 5})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_events(r.text)
+    kinds = [kind for kind, _ in events]
+    assert kinds == ["item", "item", "image", "done"]
+
+    first = events[0][1]
+    assert first["rank"] == 0
+    assert first["item"]["price"] == 25.0
+    assert first["item"]["image"] == "https://tavily.example/bag.jpg"
+
+    assert first["item"]["thumbnail"] == appmod.thumbnail_url("https://tavily.example/bag.jpg")
+
+    assert events[2][1] == {
+        "id": 1,
+        "image": "https://cdn.example/tote.jpg",
+        "thumbnail": appmod.thumbnail_url("https://cdn.example/tote.jpg"),
+    }
+    done = events[3][1]
+    assert done["order"] == [0, 1]
+    assert done["priceStats"]["min"] == 25.0
+    assert done["priceStats"]["max"] == 80.0
@@ -0,0 +1,66 @@
+import asyncio
+import socket
+
+import httpx
+import pytest
+
+from backend.services.http_client import DNSCache, HttpClientConfig, HttpClientManager
+
+
+def test_dns_cache_reuses_lookups(monkeypatch):
+    """Resolved addresses are served from the cache until the TTL expires"""
+    calls = []
+
+    async def run():
+        loop = asyncio.get_running_loop()
+
+        async def fake_getaddrinfo(host, port, **kwargs):
+            calls.append(host)
+            return [(2, 1, 6, "", ("10.0.0.1", port)), (2, 1, 6, "", ("10.0.0.1", port))]
+
+        monkeypatch.setattr(loop, "getaddrinfo", fake_getaddrinfo)
+        cache = DNSCache(ttl=60)
+        first = await cache.resolve("shop.example", 443)
+        second = await cache.resolve("shop.example", 443)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second == ["10.0.0.1"]
+    assert calls == ["shop.example"]
+
+
+def test_unresolvable_host_raises_httpx_connect_error(monkeypatch):
+    """A failed lookup surfaces as httpx.ConnectError, which callers map to a 502"""
+    async def run():
+        loop = asyncio.get_running_loop()
+
+        async def failing_getaddrinfo(host, port, **kwargs):
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+
+        monkeypatch.setattr(loop, "getaddrinfo", failing_getaddrinfo)
+        manager = HttpClientManager(HttpClientConfig())
+        try:
+            with pytest.raises(httpx.ConnectError):
+                await manager.tavily.post("https://api.tavily.invalid/search", json={})
+        finally:
+            await manager.shutdown()
+
+    asyncio.run(run())
+
+
+def test_client_manager_shares_clients_and_closes():
+    """The same pooled client is returned until shutdown"""
+    async def run():
+        manager = HttpClientManager(HttpClientConfig(max_connections=5))
+        await manager.startup()
+        tavily = manager.tavily
+        scrape = manager.scrape
+        same = manager.tavily is tavily and manager.scrape is scrape
+        follows = scrape.follow_redirects
+        await manager.shutdown()
+        return same, follows, tavily.is_closed
+
+    same, follows, closed = asyncio.run(run())
+    assert same
+    assert follows
+    assert closed
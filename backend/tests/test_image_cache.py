@@ -0,0 +1,133 @@
+import asyncio
+
+from backend.services.image_cache import ERROR, NOT_FOUND, TIMEOUT, ImageCache
+from backend.services.urls import canonical_url
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_canonical_url_strips_tracking():
+    """Tracking params, fragments and host case don't change the cache key"""
+    a = canonical_url("https://WWW.Shein.com/dress-p-1.html?utm_source=x&color=red#reviews")
+    b = canonical_url("https://www.shein.com/dress-p-1.html?color=red&gclid=abc")
+    assert a == b == "https://www.shein.com/dress-p-1.html?color=red"
+
+
+def test_canonical_url_keeps_malformed_urls():
+    """A bad or out-of-range port leaves the URL as is instead of raising"""
+    for url in ("https://shop.example:abc/bag", "https://shop.example:99999/bag", "https://[shop.example/bag"):
+        assert canonical_url(url) == url
+
+
+def test_image_cache_round_trip_and_persistence(tmp_path):
+    """Found images survive reopening the database"""
+    path = str(tmp_path / "images.sqlite3")
+    cache = ImageCache(path)
+    cache.put("https://shop.example/p/1?utm_medium=ad", "https://cdn.example/1.jpg", "og:image")
+    cache.close()
+
+    reopened = ImageCache(path)
+    entry = reopened.get("https://shop.example/p/1")
+    assert entry.found
+    assert entry.image == "https://cdn.example/1.jpg"
+    assert entry.strategy == "og:image"
+
+
+def test_image_cache_negative_entries_expire_sooner(tmp_path):
+    """Timeouts are cached briefly, missing images for longer"""
+    clock = FakeClock()
+    cache = ImageCache(str(tmp_path / "images.sqlite3"), ttl=1000, not_found_ttl=100, timeout_ttl=10, clock=clock)
+    cache.put_miss("https://a.example/p", TIMEOUT)
+    cache.put_miss("https://b.example/p", NOT_FOUND)
+    assert cache.get("https://a.example/p").status == TIMEOUT
+    assert not cache.get("https://a.example/p").found
+
+    clock.now += 50
+    assert cache.get("https://a.example/p") is None
+    assert cache.get("https://b.example/p").status == NOT_FOUND
+    assert cache.purge_expired() == 1
+
+
+def test_normalize_with_images_skips_cached_urls(monkeypatch, tmp_path):
+    """Cached URLs (positive or negative) are never scraped again"""
+    import backend.app as appmod
+
+    cache = ImageCache(str(tmp_path / "images.sqlite3"))
+    cache.put("https://shop.example/dress-1", "https://cdn.example/dress-1.jpg", "json-ld")
+    cache.put_miss("https://shop.example/dress-2", ERROR)
+    monkeypatch.setattr(appmod, "image_cache", cache)
+
+    scraped = []
+
+    async def fake_fetch(url):
+        scraped.append(url)
+        return appmod.ImageHit("https://cdn.example/dress-3.jpg", "og:image")
+
+    monkeypatch.setattr(appmod, "download_product_page", fake_fetch)
+
+    raw = {"results": [
+        {"title": f"Red dress {n}", "url": f"https://shop.example/dress-{n}", "content": "Midi dress"}
+        for n in (1, 2, 3)
+    ]}
+    out = asyncio.run(appmod.normalize_with_images(raw, 5))
+
+    assert scraped == ["https://shop.example/dress-3"]
+    assert out[0].image == "https://cdn.example/dress-1.jpg"
+    assert "placehold" in out[1].image
+    assert out[2].image == "https://cdn.example/dress-3.jpg"
+    assert cache.get("https://shop.example/dress-3").strategy == "og:image"
+
+
+def test_parse_failures_are_not_cached_as_missing_images(monkeypatch, tmp_path):
+    """A failed parse is cached as an error; a full parse queue is not cached at all"""
+    import backend.app as appmod
+    from backend.services.parse_pool import ParseExecutorSaturated
+    from backend.services.scrape_scheduler import ScrapeScheduler
+
+    cache = ImageCache(str(tmp_path / "images.sqlite3"))
+    monkeypatch.setattr(appmod, "image_cache", cache)
+
+    async def fake_fetch(url):
+        return appmod.ProductPage(b"<html></html>", None)
+
+    async def fake_parse(fn, body, url, *args):
+        if url.endswith("busy"):
+            raise ParseExecutorSaturated("parse queue full")
+        raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+
+    monkeypatch.setattr(appmod, "download_product_page", fake_fetch)
+    monkeypatch.setattr(appmod.parse_executor, "run", fake_parse)
+    monkeypatch.setattr(appmod, "scrape_scheduler", ScrapeScheduler())
+
+    async def run():
+        return (await appmod.resolve_product_image("https://shop.example/busy"),
+                await appmod.resolve_product_image("https://shop.example/broken"))
+
+    assert asyncio.run(run()) == (None, None)
+    assert cache.get("https://shop.example/busy") is None
+    assert cache.get("https://shop.example/broken").status == ERROR
+    assert appmod.scrape_scheduler.stats()["shop.example"]["errors"] == 0
+
+
+def test_normalize_with_images_survives_malformed_urls(monkeypatch, tmp_path):
+    import backend.app as appmod
+
+    monkeypatch.setattr(appmod, "image_cache", ImageCache(str(tmp_path / "images.sqlite3")))
+
+    async def fake_fetch(url):
+        return appmod.ImageHit("https://cdn.example/bag.jpg", "og:image")
+
+    monkeypatch.setattr(appmod, "download_product_page", fake_fetch)
+    raw = {"results": [
+        {"title": "Leather bag", "url": "https://shop.example:abc/bag", "content": "Bag $20"},
+        {"title": "Canvas bag", "url": "https://shop.example/canvas-bag", "content": "Bag $15"},
+    ]}
+    out = asyncio.run(appmod.normalize_with_images(raw, 5))
+    assert [r.url for r in out][-1] == "https://shop.example/canvas-bag"
+    assert out[-1].image == "https://cdn.example/bag.jpg"
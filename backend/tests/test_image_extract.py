@@ -0,0 +1,119 @@
+import asyncio
+
+import httpx
+
+from backend.services.image_extract import HeadScanner, extract_image_bs4
+
+HEAD = (
+    '<html><head><title>Dress</title>'
+    '<meta property="og:image" content="https://cdn.example/og.jpg?w=800&amp;h=1000">'
+    '</head><body>'
+)
+
+
+def chunks(data: bytes, size: int = 16):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_head_scanner_stops_after_head_with_og_image():
+    """og:image is accepted once the head has closed, across chunk boundaries"""
+    scanner = HeadScanner()
+    done_at = None
+    page = (HEAD + '<img src="/a.jpg">' * 100 + '</body></html>').encode()
+    for n, chunk in enumerate(chunks(page)):
+        if scanner.feed(chunk):
+            done_at = n
+            break
+    assert done_at is not None
+    assert done_at * 16 < len(HEAD) + 16
+    assert scanner.best == ("https://cdn.example/og.jpg?w=800&h=1000", "og:image")
+
+
+def test_head_scanner_prefers_json_ld():
+    """A JSON-LD image wins immediately, even before the head closes"""
+    scanner = HeadScanner()
+    page = (
+        '<html><head><script type="application/ld+json">'
+        '{"@type": "Product", "image": ["https://cdn.example/ld.jpg"]}</script>'
+        '<meta property="og:image" content="https://cdn.example/og.jpg">'
+    ).encode()
+    assert any(scanner.feed(c) for c in chunks(page))
+    assert scanner.best.strategy == "json-ld"
+
+
+def test_head_scanner_scans_each_chunk_once():
+    """The scan position keeps up with the download; split tags are still found"""
+    scanner = HeadScanner()
+    filler = ('<div>' + 'x' * 80 + '</div>') * 200
+    page = (
+        '<html><head><meta name="a" content="b">' + filler
+        + '<script>var s = "<script>";</script>' + filler
+        + '<script type="application/ld+json">{"@type": "Product", "image": "https://cdn.example/ld.jpg"}</script>'
+    ).encode()
+    for chunk in chunks(page, 7):
+        if scanner.feed(chunk):
+            break
+        # Only an unclosed tag's tail is ever left to rescan
+        assert len(scanner._buffer) - scanner._jsonld_pos < 120
+        assert len(scanner._buffer) - scanner._meta_pos < 40
+    assert scanner.best == ("https://cdn.example/ld.jpg", "json-ld")
+
+
+def test_head_scanner_waits_without_high_confidence_image():
+    """Without JSON-LD/og:image the scanner never stops the download"""
+    scanner = HeadScanner()
+    page = b'<html><head><meta name="twitter:image" content="https://x.example/t.jpg"></head><body>'
+    assert not any(scanner.feed(c) for c in chunks(page))
+    assert scanner.best is None
+    assert extract_image_bs4(scanner.finish(), "https://shop.example/p").strategy == "twitter:image"
+
+
+def test_fetch_product_image_streams_and_honours_byte_cap(monkeypatch):
+    """Early hits skip the full parse; pages without one are read only up to the cap"""
+    import backend.app as appmod
+
+    pages = {
+        "/early": (HEAD + "x" * 50000).encode(),
+        "/late": ("<html><body>" + "y" * 50000 + '<img itemprop="image" src="/late.jpg">').encode(),
+    }
+
+    def handler(request):
+        return httpx.Response(200, content=pages[request.url.path], headers={"content-type": "text/html"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(type(appmod.http_clients), "scrape", property(lambda self: client))
+    monkeypatch.setattr(appmod, "SCRAPE_MAX_BYTES", 10000)
+
+    async def run():
+        early = await appmod.fetch_product_image("https://shop.example/early")
+        late = await appmod.fetch_product_image("https://shop.example/late")
+        return early, late
+
+    early, late = asyncio.run(run())
+    assert early.strategy == "og:image"
+    # The itemprop image sits beyond the byte cap, so it is never seen
+    assert late is None
+
+
+PAGES = [
+    '<html><head><meta name="twitter:image" content="https://cdn.example/tw.jpg"></head></html>',
+    '<html><head><meta property="og:image" content="/relative.jpg">'
+    '<meta property="product:image" content="https://cdn.example/p.svg"></head></html>',
+    '<html><body><img src="/logo.png"><img itemprop="image" data-src="//cdn.example/ip.jpg"></body></html>',
+    '<html><head><link rel="preload image_src" href="/link.jpg"></head></html>',
+    '<html><body><img class="thumb" src="/t.jpg"><img class="pdp main-image" src="/main.jpg"></body></html>',
+    '<html><body><img src="/a.jpg" width="100"><img src="/hero-large.jpg" width="50">'
+    '<img src="/b.jpg" srcset="/b-400.jpg 400w, /b-1200.jpg 1200w"></body></html>',
+    '<html><body><script>var s = "<img src=/js.jpg>";</script><img src="/icon.svg"></body></html>',
+    '<html><head><script type="application/ld+json">[{"@type": "Offer"}, '
+    '{"@type": "Product", "image": "https://cdn.example/ld.jpg"}]</script></head></html>',
+]
+
+
+def test_fast_extractor_matches_bs4_cascade():
+    """The single-pass extractor picks the same image and strategy as BeautifulSoup"""
+    from backend.services.image_extract import extract_image_fast
+
+    for page in PAGES:
+        body = page.encode()
+        assert extract_image_fast(body, "https://shop.example/p/1") == extract_image_bs4(body, "https://shop.example/p/1"), page
@@ -0,0 +1,37 @@
+import random
+
+from backend.services.keywords import KeywordMatcher
+
+
+def test_scan_reports_overlapping_and_nested_keywords():
+    """Every occurrence is found, including keywords inside or overlapping others"""
+    matcher = KeywordMatcher({
+        "strong": {"buy", "buy now", "free shipping"},
+        "moderate": {"shipping", "$", "sale"},
+        "clothing": {"ring", "earrings", "bra", "bracelet"},
+    })
+    matches = matcher.scan("buy now: earrings + bracelet, free shipping on sale $5")
+    assert matches.keywords("strong") == {"buy", "buy now", "free shipping"}
+    assert matches.keywords("moderate") == {"shipping", "$", "sale"}
+    assert matches.keywords("clothing") == {"ring", "earrings", "bra", "bracelet"}
+
+
+def test_scan_can_be_restricted_to_a_prefix():
+    """Checks can be limited to the first part of a combined text"""
+    matcher = KeywordMatcher({"excluded": {"blog"}})
+    text = "cheap dress shop.example.blog"
+    assert matcher.scan(text).has("excluded")
+    assert not matcher.scan(text).has("excluded", end=len("cheap dress"))
+
+
+def test_scan_matches_substring_semantics():
+    """Results are identical to `keyword in text` for every keyword"""
+    import backend.app as appmod
+
+    matcher = appmod.CONTENT_MATCHER
+    words = sorted(matcher.categories)
+    rng = random.Random(7)
+    for _ in range(300):
+        text = "".join(rng.choice(words + [" ", "s", "in", "xx"]) for _ in range(8))
+        found = {kw for _, kw in matcher.scan(text).hits}
+        assert found == {kw for kw in words if kw in text}, text
@@ -0,0 +1,109 @@
+import importlib
+import io
+import json
+import logging
+
+from fastapi.testclient import TestClient
+
+from backend.services import logging_setup
+from backend.services.image_cache import ImageCache
+from backend.services.logging_setup import LogConfig, SampleFilter, get_logger, setup_logging, shutdown_logging
+
+
+def read_lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_json_lines_carry_request_id_and_extra_fields():
+    stream = io.StringIO()
+    setup_logging(LogConfig(level="INFO", levels={"scrape": "WARNING"}), stream=stream)
+    try:
+        token = logging_setup.set_request_id("abc123")
+        get_logger("api").info("dupes ranked", extra={"query": "red bag", "returned": 3})
+        get_logger("scrape").info("dropped by subsystem level")
+        get_logger("scrape").warning("scrape timeout", extra={"host": "shop.example"})
+        logging_setup._request_id.reset(token)
+        get_logger("api").info("outside a request")
+    finally:
+        shutdown_logging()
+
+    lines = read_lines(stream)
+    assert [line["msg"] for line in lines] == ["dupes ranked", "scrape timeout", "outside a request"]
+    assert lines[0]["request_id"] == "abc123"
+    assert lines[0]["query"] == "red bag" and lines[0]["returned"] == 3
+    assert lines[0]["logger"] == "dupefinder.api" and lines[0]["level"] == "INFO"
+    assert lines[1]["host"] == "shop.example"
+    assert lines[2]["request_id"] == "-"
+
+    # shutdown restores the defaults
+    assert logging.getLogger("dupefinder").propagate
+    assert get_logger("scrape").level == logging.NOTSET
+
+
+def test_text_format_appends_extra_fields():
+    stream = io.StringIO()
+    setup_logging(LogConfig(format="text"), stream=stream)
+    try:
+        get_logger("api").info("request", extra={"status": 200})
+    finally:
+        shutdown_logging()
+    line = stream.getvalue().strip()
+    assert "INFO" in line and "dupefinder.api [-] request status=200" in line
+
+
+def test_sampling_is_per_request_and_never_drops_warnings():
+    sampler = SampleFilter(0.5)
+    info = logging.makeLogRecord({"levelno": logging.INFO})
+    warning = logging.makeLogRecord({"levelno": logging.WARNING})
+
+    kept = 0
+    for n in range(200):
+        token = logging_setup.set_request_id(f"req-{n}")
+        decision = sampler.filter(info)
+        assert sampler.filter(info) == decision
+        assert sampler.filter(warning)
+        kept += decision
+        logging_setup._request_id.reset(token)
+    assert 60 < kept < 140
+
+    assert not SampleFilter(0.0).filter(info)
+    assert SampleFilter(0.3, rng=lambda: 0.1).filter(info)
+
+
+def test_parse_levels():
+    assert logging_setup.parse_levels("scrape=debug, images=WARNING,bad,=x") == {
+        "scrape": "DEBUG", "images": "WARNING",
+    }
+
+
+def test_request_id_correlates_request_lines(monkeypatch, tmp_path):
+    monkeypatch.setenv("TAVILY_API_KEY", "fake")
+    import backend.app as appmod
+    importlib.reload(appmod)
+    monkeypatch.setattr(appmod, "image_cache", ImageCache(str(tmp_path / "images.sqlite3")))
+
+    async def fake_tavily(query, max_results, search_depth="basic"):
+        return {"results": [{"title": "Quilted bag", "url": "https://shop.example/bag", "content": "Bag $25"}]}
+
+    async def fake_fetch(url):
+        return appmod.ImageHit("https://cdn.example/bag.jpg", "og:image")
+
+    monkeypatch.setattr(appmod, "tavily_search", fake_tavily)
+    monkeypatch.setattr(appmod, "download_product_page", fake_fetch)
+
+    stream = io.StringIO()
+    setup_logging(LogConfig(sample_rate=1.0), stream=stream)
+    try:
+        client = TestClient(appmod.app)
+        r = client.get("/dupes", params={"q": "quilted bag"}, headers={"X-Request-ID": "trace-1"})
+        generated = client.get("/healthz").headers["X-Request-ID"]
+    finally:
+        shutdown_logging()
+
+    assert r.headers["X-Request-ID"] == "trace-1"
+    assert generated and generated != "trace-1"
+    lines = read_lines(stream)
+    traced = {line["msg"] for line in lines if line["request_id"] == "trace-1"}
+    assert {"image found", "dupes ranked", "request"} <= traced
+    request_line = next(line for line in lines if line["msg"] == "request" and line["request_id"] == "trace-1")
+    assert request_line["route"] == "/dupes" and request_line["status"] == 200
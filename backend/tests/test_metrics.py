@@ -0,0 +1,107 @@
+import asyncio
+import importlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.services import metrics
+from backend.services.image_cache import ImageCache
+
+
+def test_registry_renders_prometheus_text():
+    registry = metrics.MetricsRegistry()
+    hits = registry.counter("demo_hits_total", "Hits", ("cache",))
+    latency = registry.histogram("demo_seconds", "Latency", buckets=(0.1, 1.0))
+    registry.gauge("demo_depth", "Depth", fn=lambda: 3)
+
+    hits.inc(cache="image")
+    hits.inc(2, cache="image")
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    text = registry.render()
+    assert "# TYPE demo_hits_total counter" in text
+    assert 'demo_hits_total{cache="image"} 3' in text
+    assert 'demo_seconds_bucket{le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{le="1"} 2' in text
+    assert 'demo_seconds_bucket{le="+Inf"} 3' in text
+    assert "demo_seconds_count 3" in text
+    assert "demo_seconds_sum 5.55" in text
+    assert "demo_depth 3" in text
+
+
+def test_series_beyond_cap_fold_into_other():
+    c = metrics.Counter("hosts_total", "Hosts", ("host",), max_series=2)
+    for host in ("a", "b", "c", "d"):
+        c.inc(host=host)
+    assert c.value(host="a") == 1
+    assert c.value(host="c") == 0
+    assert c.value(host="other") == 2
+
+    with pytest.raises(ValueError):
+        c.inc(site="a")
+
+
+def test_stages_accumulate_into_server_timing():
+    timings = metrics.begin_request()
+    h = metrics.Histogram("stage_seconds", "Stages", ("stage",))
+
+    @metrics.timed("score", h, stage="score")
+    def score():
+        return 1
+
+    @metrics.timed("fetch")
+    async def fetch():
+        await asyncio.sleep(0)
+
+    score()
+    score()
+    asyncio.run(fetch())
+    assert timings["score"][1] == 2
+    assert h.count(stage="score") == 2
+
+    header = metrics.server_timing_header(timings, total=0.0123)
+    assert header.startswith("score;dur=")
+    assert 'desc="2 calls"' in header
+    assert "fetch;dur=" in header
+    assert header.endswith("total;dur=12.3")
+
+
+def test_dupes_records_metrics_and_server_timing(monkeypatch, tmp_path):
+    monkeypatch.setenv("TAVILY_API_KEY", "fake")
+    import backend.app as appmod
+    importlib.reload(appmod)
+    monkeypatch.setattr(appmod, "image_cache", ImageCache(str(tmp_path / "images.sqlite3")))
+
+    async def fake_tavily(query, max_results, search_depth="basic"):
+        return {"results": [
+            {"title": "Quilted bag", "url": "https://shop.example/bag", "content": "Bag $25"},
+            {"title": "Bag review", "url": "https://shop.example/blog/bag", "content": "Bag $30"},
+            {"title": "Haul", "url": "https://www.youtube.com/watch?v=1", "content": "Bag $10"},
+        ]}
+
+    async def fake_fetch(url):
+        return appmod.ImageHit("https://cdn.example/bag.jpg", "og:image")
+
+    monkeypatch.setattr(appmod, "tavily_search", fake_tavily)
+    monkeypatch.setattr(appmod, "download_product_page", fake_fetch)
+
+    client = TestClient(appmod.app)
+    r = client.get("/dupes", params={"q": "quilted bag", "max_results": 5})
+    assert r.status_code == 200
+    timing = r.headers["Server-Timing"]
+    for stage in ("filter", "images", "scrape", "score", "total"):
+        assert f"{stage};dur=" in timing
+
+    assert appmod.IMAGE_STRATEGY.value(strategy="og:image") == 1
+    assert appmod.CACHE_LOOKUPS.value(cache="image", result="miss") == 1
+    assert appmod.FILTER_REJECTIONS.value(reason="excluded_site") == 1
+    assert appmod.FILTER_REJECTIONS.value(reason="article_url") == 1
+    assert appmod.SCRAPE_SECONDS.count(host="shop.example") == 1
+
+    text = client.get("/metrics")
+    assert text.headers["content-type"].startswith("text/plain")
+    assert 'dupefinder_http_request_seconds_count{method="GET",route="/dupes",status="200"} 1' in text.text
+    assert "dupefinder_parse_queue 0" in text.text
+    assert "Server-Timing" in client.get("/healthz").headers
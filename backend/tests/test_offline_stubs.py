@@ -0,0 +1,56 @@
+import asyncio
+
+import httpx
+from fastapi.testclient import TestClient
+
+from backend.services.image_cache import ImageCache
+from benchmarks.stubs import FaultProfile, create_shop_app, create_tavily_app
+
+
+def test_tavily_stand_in_replays_and_rewrites_urls():
+    """Recorded results come back trimmed, pointed at the fixture server"""
+    client = TestClient(create_tavily_app(shop_port=8101))
+    r = client.post("/search", json={"query": "quilted bag", "max_results": 3, "include_images": True})
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert len(results) == 3
+    assert all(":8101/" in res["url"] and res["url"].startswith("http://") for res in results)
+
+
+def test_fault_profile_injects_errors():
+    """error_rate=1 fails every request with the configured status"""
+    client = TestClient(create_shop_app(faults=FaultProfile(error_rate=1.0, error_status=500)))
+    assert client.get("/item-1").status_code == 500
+
+
+def test_dupes_runs_offline_against_stand_ins(monkeypatch, tmp_path):
+    """/dupes works end to end with Tavily and retailers replaced by the stand-ins"""
+    monkeypatch.setenv("TAVILY_API_KEY", "offline")
+    import importlib
+    import backend.app as appmod
+    importlib.reload(appmod)
+    monkeypatch.setattr(appmod, "image_cache", ImageCache(str(tmp_path / "images.sqlite3")))
+    monkeypatch.setattr(appmod, "TAVILY_API_URL", "http://tavily.test/search")
+
+    tavily = httpx.ASGITransport(app=create_tavily_app(shop_port=8101))
+    shop = httpx.ASGITransport(app=create_shop_app(page_kb=50))
+    monkeypatch.setattr(type(appmod.http_clients), "tavily", property(lambda self: httpx.AsyncClient(transport=tavily)))
+    monkeypatch.setattr(type(appmod.http_clients), "scrape", property(lambda self: httpx.AsyncClient(transport=shop)))
+
+    client = TestClient(appmod.app)
+    r = client.get("/dupes", params={"q": "chanel quilted bag", "max_results": 8})
+    assert r.status_code == 200
+    items = r.json()["items"]
+    assert items
+    assert all(item["site"].endswith(":8101") for item in items)
+    assert any(item["image"].startswith("https://cdn.") for item in items)
+
+
+def test_http_resolve_overrides_pin_hosts():
+    """HTTP_RESOLVE answers lookups without DNS"""
+    from backend.services.http_client import DNSCache, parse_resolve_overrides
+
+    overrides = parse_resolve_overrides("www.amazon.com=10.0.0.2, *=127.0.0.1")
+    cache = DNSCache(overrides=overrides)
+    assert asyncio.run(cache.resolve("www.amazon.com", 80)) == ["10.0.0.2"]
+    assert asyncio.run(cache.resolve("www.shein.com", 443)) == ["127.0.0.1"]
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.services.image_extract import extract_image
+from backend.services.parse_pool import ParseExecutor, ParseExecutorSaturated
+
+PAGE = b'<html><head><meta property="og:image" content="https://cdn.example/og.jpg"></head></html>'
+
+
+@pytest.mark.parametrize("kind", ["process", "thread", "inline"])
+def test_parse_executor_runs_extraction(kind):
+    """Every executor kind returns the same extraction result"""
+    executor = ParseExecutor(kind=kind, max_workers=1)
+
+    async def run():
+        return await executor.run(extract_image, PAGE, "https://shop.example/p", None, "fast", False)
+
+    try:
+        hit = asyncio.run(run())
+    finally:
+        executor.shutdown()
+    assert hit == ("https://cdn.example/og.jpg", "og:image")
+    assert executor.stats()["completed"] == 1
+
+
+def test_parse_executor_sheds_load_when_full():
+    """Submissions beyond workers + queue depth are rejected, not queued"""
+    executor = ParseExecutor(kind="thread", max_workers=1, max_queue=1)
+
+    async def run():
+        jobs = [executor.run(time.sleep, 0.05) for _ in range(3)]
+        return await asyncio.gather(*jobs, return_exceptions=True)
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        executor.shutdown()
+    assert sum(isinstance(r, ParseExecutorSaturated) for r in results) == 1
+    stats = executor.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+    assert stats["saturation"] == 0
@@ -0,0 +1,161 @@
+import asyncio
+import importlib
+
+from fastapi.testclient import TestClient
+
+from backend.services.image_cache import ImageCache
+from backend.services.prefetch import Budget, DecayingCounter, PrefetchConfig, PrefetchScheduler
+
+
+def test_decaying_counter_halves_per_half_life_and_stays_bounded():
+    now = [0.0]
+    counter = DecayingCounter(half_life=60, maxsize=4, clock=lambda: now[0])
+    for _ in range(4):
+        counter.hit("old")
+    now[0] = 120
+    counter.hit("new")
+    counter.hit("new")
+    assert counter.score("old") == 1.0
+    assert [key for key, _, _ in counter.top(2)] == ["new", "old"]
+
+    for key in ("a", "b", "c"):
+        counter.hit(key)
+    assert len(counter) == 3  # pruned to the hottest three quarters
+    assert counter.top(1)[0][0] == "new"
+
+
+def test_budget_refills_per_minute():
+    now = [0.0]
+    budget = Budget(2, clock=lambda: now[0])
+    assert budget.take() and budget.take() and not budget.take()
+    now[0] = 30
+    assert budget.take() and not budget.take()
+
+
+def make_scheduler(ages, refreshed, now, **config):
+    async def refresh(query, max_results):
+        refreshed.append((query, max_results))
+        ages[(query, max_results)] = 0.0
+
+    return PrefetchScheduler(
+        PrefetchConfig(**config),
+        key=lambda q, n: (q, n),
+        age=ages.get,
+        refresh=refresh,
+        ttl=100,
+        clock=lambda: now[0],
+    )
+
+
+def test_scheduler_refreshes_hot_queries_near_expiry_within_budget():
+    ages, refreshed, now = {}, [], [0.0]
+    scheduler = make_scheduler(ages, refreshed, now, top_n=3, refresh_at=0.8, budget_per_minute=2)
+    for query, hits in (("red bag", 5), ("tote", 3), ("loafers", 2), ("scarf", 1)):
+        for _ in range(hits):
+            scheduler.record(query, 16)
+    ages.update({("red bag", 16): 90.0, ("tote", 16): 10.0})
+
+    # scarf is not in the top 3; tote is still fresh
+    assert scheduler.due() == [("red bag", 16), ("loafers", 16)]
+    assert asyncio.run(scheduler.refresh_due()) == 2
+    assert refreshed == [("red bag", 16), ("loafers", 16)]
+
+    ages[("tote", 16)] = 85.0
+    assert asyncio.run(scheduler.refresh_due()) == 0  # budget spent
+    assert scheduler.stats()["over_budget"] == 1
+    now[0] = 30
+    assert asyncio.run(scheduler.refresh_due()) == 1
+    assert refreshed[-1] == ("tote", 16)
+
+
+def test_scheduler_lets_queries_nobody_asks_for_expire():
+    """Queries below the minimum score or without a hit in the last TTL are not refreshed"""
+    ages, refreshed, now = {}, [], [0.0]
+    scheduler = make_scheduler(ages, refreshed, now, half_life=1000, min_score=2)
+    for _ in range(8):
+        scheduler.record("tote", 16)
+    scheduler.record("scarf", 16)
+    assert scheduler.due() == [("tote", 16)]
+
+    now[0] = 150  # tote still scores 3.6, but its last hit is older than the TTL
+    assert scheduler.counter.score(("tote", 16)) > 2
+    assert scheduler.due() == []
+    scheduler.record("tote", 16)
+    assert scheduler.due() == [("tote", 16)]
+
+
+def test_warmup_fetches_cold_seeds_once():
+    ages, refreshed, now = {("chanel quilted bag", 24): 5.0}, [], [0.0]
+    scheduler = make_scheduler(
+        ages, refreshed, now, seeds=["chanel quilted bag", "lululemon align leggings"], budget_per_minute=10
+    )
+    assert asyncio.run(scheduler.warmup()) == 1
+    assert refreshed == [("lululemon align leggings", 24)]
+    assert scheduler.counter.score(("chanel quilted bag", 24)) == 1.0
+
+
+def test_scheduler_loop_warms_up_then_cycles_until_stopped():
+    ages, refreshed, now = {}, [], [0.0]
+    scheduler = make_scheduler(ages, refreshed, now, seeds=["tote"], interval=0.01, refresh_at=0.0, min_score=1)
+
+    async def go():
+        scheduler.start()
+        await asyncio.sleep(0.1)
+        await scheduler.stop()
+
+    asyncio.run(go())
+    assert refreshed[0] == ("tote", 24) and len(refreshed) > 1  # refresh_at=0: due every cycle
+    assert scheduler.stats()["cycles"] >= 1 and not scheduler.stats()["running"]
+
+
+def test_prefetch_refreshes_tavily_and_expiring_images(monkeypatch, tmp_path):
+    monkeypatch.setenv("TAVILY_API_KEY", "fake")
+    import backend.app as appmod
+    importlib.reload(appmod)
+    cache = ImageCache(str(tmp_path / "images.sqlite3"))
+    monkeypatch.setattr(appmod, "image_cache", cache)
+    upstream, scraped = [], []
+
+    class FakeResponse:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"results": [
+                {"title": "Leather tote bag", "url": "https://shop.example/tote", "content": "Tote bag $40"},
+            ]}
+
+    class FakeTavily:
+        async def post(self, url, json):
+            upstream.append(json["query"])
+            return FakeResponse()
+
+    async def fake_fetch(url):
+        scraped.append(url)
+        return appmod.ImageHit("https://cdn.example/tote.jpg", "og:image")
+
+    fake_tavily = FakeTavily()
+    monkeypatch.setattr(type(appmod.http_clients), "tavily", property(lambda self: fake_tavily))
+    monkeypatch.setattr(appmod, "download_product_page", fake_fetch)
+    client = TestClient(appmod.app)
+
+    assert client.get("/dupes", params={"q": "leather tote"}).headers["X-Cache"] == "miss"
+    assert (len(upstream), len(scraped)) == (1, 1)
+    assert appmod.prefetcher.due() == []  # fresh
+
+    # An ordinary request would be served from the caches; a prefetch goes upstream
+    cache.put("https://shop.example/tote", "https://cdn.example/tote.jpg", "og:image")
+    asyncio.run(appmod.prefetch_dupes("leather tote", 16))
+    assert (len(upstream), len(scraped)) == (2, 1)  # image is not close to expiry
+    monkeypatch.setattr(appmod.prefetch_config, "image_horizon", 8 * 24 * 3600)
+    monkeypatch.setattr(appmod.prefetcher.budget, "take", lambda: False)
+    asyncio.run(appmod.prefetch_dupes("leather tote", 16))
+    assert (len(upstream), len(scraped)) == (3, 1)  # re-scrapes count against the budget
+    monkeypatch.setattr(appmod.prefetcher.budget, "take", lambda: True)
+    asyncio.run(appmod.prefetch_dupes("leather tote", 16))
+    assert (len(upstream), len(scraped)) == (4, 2)
+
+    again = client.get("/dupes", params={"q": "Leather Totes"})
+    assert again.headers["X-Cache"] == "hit"
+    assert len(upstream) == 4
+    assert client.get("/stats").json()["prefetch"]["top"][0]["query"] == "Leather Totes"
@@ -0,0 +1,52 @@
+import pytest
+
+from backend.services.prices import Price, comparable_amounts, parse_amount, parse_price, parse_prices
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("Affordable dupe $39.99", Price(39.99, "USD")),
+    ("was $120 now $39", Price(39.0, "USD", kind="sale", was=120.0)),
+    ("Reg. $80, sale $45.50", Price(45.5, "USD", kind="sale", was=80.0)),
+    ("$39 (was $120)", Price(39.0, "USD", was=120.0)),
+    ("MSRP $200", Price(200.0, "USD", kind="was")),
+    ("Leather tote $1,299.99", Price(1299.99, "USD")),
+    ("Tasche 1.299,99 €", Price(1299.99, "EUR")),
+    ("Maxi dress £20 - £40", Price(20.0, "GBP", high=40.0)),
+    ("Sneakers $20-40", Price(20.0, "USD", high=40.0)),
+    ("From US$15 to US$30", Price(15.0, "USD", high=30.0)),
+    ("Only 20 USD", Price(20.0, "USD", kind="sale")),
+    ("Hoodie ¥3,000", Price(3000.0, "JPY")),
+    ("size 10 only, no price", None),
+])
+def test_parse_price(text, expected):
+    assert parse_price(text) == expected
+
+
+def test_parse_amount_separators():
+    """Thousands and decimal separators in both conventions"""
+    assert parse_amount("1,299") == 1299
+    assert parse_amount("39,99") == 39.99
+    assert parse_amount("1.234.567,5") == 1234567.5
+    assert parse_amount("12.5") == 12.5
+
+
+def test_batch_matches_single_parses():
+    """The one-pass batch API gives the same answer per text, without bleeding between texts"""
+    texts = ["was $120 now", "$39 today", "", None, "Sale: 15 €", "$20 to", "$40"]
+    assert parse_prices(texts) == [parse_price(t or "") for t in texts]
+    assert parse_prices(texts)[1] == Price(39.0, "USD")
+
+
+def test_extract_price_prefers_sale_price():
+    """/dupes scoring uses the sale price"""
+    import backend.app as appmod
+
+    assert appmod.extract_price("Was $120, now $39 at Shein") == 39.0
+    assert appmod.extract_price("No price visible") is None
+    assert appmod.extract_price("Hoodie ¥3,980") is None
+
+
+def test_comparable_amounts_keep_one_currency():
+    prices = parse_prices(["Dress $40", "Robe 35 €", "Hoodie ¥3,980", ""])
+    assert comparable_amounts(prices) == [40.0, None, None, None]
+    assert comparable_amounts(prices, "EUR") == [None, 35.0, None, None]
@@ -0,0 +1,118 @@
+import importlib
+import os
+import pstats
+
+from fastapi.testclient import TestClient
+
+from backend.services.image_cache import ImageCache
+from backend.services.profiling import ProfileConfig, ProfileStore, RequestProfiler
+
+
+def test_config_guards_trigger_and_admin():
+    off = ProfileConfig(enabled=False)
+    assert not off.requested("1")
+
+    open_config = ProfileConfig(enabled=True)
+    assert open_config.requested("1") and open_config.requested("true")
+    assert not open_config.requested("0") and not open_config.requested(None)
+    assert open_config.authorized(None)
+
+    guarded = ProfileConfig(enabled=True, token="s3cret")
+    assert not guarded.requested("1")
+    assert guarded.requested("s3cret")
+    assert not guarded.authorized(None) and guarded.authorized("s3cret")
+    assert not guarded.requested("é") and not guarded.authorized("sécret")
+
+
+def test_only_one_request_is_profiled_at_a_time():
+    first = RequestProfiler.start()
+    assert first is not None
+    assert RequestProfiler.start() is None
+    first.stop()
+    second = RequestProfiler.start()
+    assert second is not None
+    second.stop()
+
+
+def capture(store):
+    profiler = RequestProfiler.start()
+    sum(range(1000))
+    profiler.stop()
+    report = profiler.report({"path": "/dupes"}, {"score": [0.002, 1]}, [], 5)
+    return store.save(profiler, report)
+
+
+def test_store_is_bounded_and_rejects_bad_ids(tmp_path):
+    store = ProfileStore(str(tmp_path), max_files=2)
+    ids = []
+    for n in range(3):
+        ids.append(capture(store))
+        # distinct mtimes so pruning order is deterministic
+        for ext in ("json", "prof"):
+            os.utime(tmp_path / f"{ids[-1]}.{ext}", (1000 + n, 1000 + n))
+        store.prune()
+
+    listed = [p["id"] for p in store.list()]
+    assert listed == [ids[2], ids[1]]
+    assert store.path(ids[0], "json") is None
+    assert store.path("../../etc/passwd", "json") is None
+
+    # Captures started in the same second still get their own files
+    assert len({capture(store) for _ in range(3)}) == 3
+
+    store.max_bytes = 1
+    store.prune()
+    assert store.list() == []
+
+
+def test_profiled_dupes_request_is_downloadable(monkeypatch, tmp_path):
+    monkeypatch.setenv("TAVILY_API_KEY", "fake")
+    import backend.app as appmod
+    importlib.reload(appmod)
+    monkeypatch.setattr(appmod, "image_cache", ImageCache(str(tmp_path / "images.sqlite3")))
+    monkeypatch.setattr(appmod, "profiling_config", ProfileConfig(enabled=True, token="s3cret"))
+    monkeypatch.setattr(appmod, "profile_store", ProfileStore(str(tmp_path / "profiles")))
+
+    async def fake_tavily(query, max_results, search_depth="basic"):
+        return {"results": [{"title": "Quilted bag", "url": "https://shop.example/bag", "content": "Bag $25"}]}
+
+    async def fake_fetch(url):
+        return appmod.ImageHit("https://cdn.example/bag.jpg", "og:image")
+
+    monkeypatch.setattr(appmod, "tavily_search", fake_tavily)
+    monkeypatch.setattr(appmod, "download_product_page", fake_fetch)
+
+    client = TestClient(appmod.app)
+    r = client.get("/dupes", params={"q": "quilted bag", "profile": "s3cret"}, headers={"X-Request-ID": "slow-1"})
+    assert r.status_code == 200
+    profile_id = r.headers["X-Profile-Id"]
+    assert "slow-1" not in profile_id  # the client's id never reaches the filename
+
+    assert "X-Profile-Id" not in client.get("/dupes", params={"q": "quilted bag"}).headers
+    assert "X-Profile-Id" not in client.get("/dupes", params={"q": "quilted bag", "profile": "1"}).headers
+
+    assert client.get("/admin/profiles").status_code == 403
+    assert client.get("/admin/profiles", headers={"X-Profile-Token": "sécret".encode()}).status_code == 403
+    assert "X-Profile-Id" not in client.get("/dupes", params={"q": "quilted bag", "profile": "é"}).headers
+    auth = {"X-Profile-Token": "s3cret"}
+    listed = client.get("/admin/profiles", headers=auth).json()["profiles"]
+    assert [p["id"] for p in listed] == [profile_id]
+
+    report = client.get(f"/admin/profiles/{profile_id}", headers=auth).json()
+    assert report["request"]["path"] == "/dupes"
+    assert report["request"]["request_id"] == "slow-1"
+    assert "profile" not in report["request"]["query"]
+    assert {"filter", "images", "scrape", "score"} <= set(report["stages"])
+    scrape = next(e for e in report["timeline"] if e["stage"] == "scrape")
+    assert scrape["host"] == "shop.example" and scrape["start_ms"] >= 0
+    assert any("rank_dupes" in f["function"] for f in report["top_functions"])
+
+    raw = client.get(f"/admin/profiles/{profile_id}", params={"format": "pstats"}, headers=auth)
+    assert raw.status_code == 200
+    (tmp_path / "download.prof").write_bytes(raw.content)
+    assert pstats.Stats(str(tmp_path / "download.prof")).total_calls > 0
+
+    assert client.get("/admin/profiles/nope", headers=auth).status_code == 404
+
+    monkeypatch.setattr(appmod, "profiling_config", ProfileConfig(enabled=False))
+    assert client.get("/admin/profiles").status_code == 404
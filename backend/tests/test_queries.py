@@ -0,0 +1,103 @@
+import importlib
+
+from fastapi.testclient import TestClient
+
+from backend.services.queries import DUPE_QUERY_TERMS, SimilarQueryIndex, normalize_query, stem
+
+
+def test_stem_strips_plurals_only():
+    assert [stem(w) for w in ("leggings", "dresses", "accessories", "watches", "jeans")] == [
+        "legging", "dress", "accessory", "watch", "jean",
+    ]
+    assert [stem(w) for w in ("dress", "bus", "famous", "gas")] == ["dress", "bus", "famous", "gas"]
+
+
+def test_normalize_query_ignores_order_case_plurals_and_stop_words():
+    forms = {
+        normalize_query(q, DUPE_QUERY_TERMS)
+        for q in ("Lululemon Align leggings", "lululemon align legging", "align leggings lululemon",
+                  "cheap lululemon align legging dupes")
+    }
+    assert forms == {"align legging lululemon"}
+    assert normalize_query("Women's Café Dresses") == "café dress women"
+    assert normalize_query("cheap dupe", DUPE_QUERY_TERMS) == "cheap dupe"
+
+
+def test_similar_query_index_ranks_by_jaccard_and_stays_bounded():
+    index = SimilarQueryIndex(threshold=0.75, maxsize=3)
+    index.add("dupes", "align legging lululemon")
+    index.add("dupes", "align black legging lululemon")
+    index.add(("dupes", 5), "align legging lululemon")
+
+    assert index.similar("dupes", "align legging lululemon") == [("align black legging lululemon", 0.75)]
+    # 0.6 against the four-word entry, below the threshold
+    assert index.similar("dupes", "align legging lululemon short") == [("align legging lululemon", 0.75)]
+    assert index.similar("dupes", "nike legging") == []
+
+    index.add("dupes", "red dress")
+    assert index.stats()["queries"] == 3
+    assert index.similar("dupes", "align black legging lululemon") == []  # oldest entry evicted
+
+
+def test_similar_query_index_never_matches_across_qualifiers():
+    """Gender, size and model tokens change the products; colours don't"""
+    index = SimilarQueryIndex(threshold=0.5)
+    for query in ("nike air max 90", "zara linen wide leg pants", "air force nike"):
+        index.add("dupes", normalize_query(query))
+
+    assert index.similar("dupes", normalize_query("nike air max 90 women")) == []
+    assert index.similar("dupes", normalize_query("nike air max 95")) == []
+    assert index.similar("dupes", normalize_query("Zara linen wide leg pants men's")) == []
+    assert index.similar("dupes", normalize_query("zara linen wide leg pants petite")) == []
+    assert index.similar("dupes", normalize_query("air force nike white")) == [("air force nike", 0.75)]
+
+
+def test_dupes_serves_near_identical_queries_from_one_result(monkeypatch):
+    monkeypatch.setenv("TAVILY_API_KEY", "fake")
+    import backend.app as appmod
+    importlib.reload(appmod)
+    monkeypatch.setattr(appmod, "query_index", SimilarQueryIndex(threshold=0.75))
+    searched = []
+
+    async def fake_find_dupes(q, max_results):
+        searched.append(q)
+        return []
+
+    monkeypatch.setattr(appmod, "find_dupes", fake_find_dupes)
+    client = TestClient(appmod.app)
+
+    first = client.get("/dupes", params={"q": "Lululemon Align leggings"})
+    assert first.headers["X-Cache"] == "miss" and "X-Similar-Query" not in first.headers
+
+    reordered = client.get("/dupes", params={"q": "align legging lululemon"})
+    assert reordered.headers["X-Cache"] == "hit" and "X-Similar-Query" not in reordered.headers
+
+    near = client.get("/dupes", params={"q": "lululemon align leggings black"})
+    assert near.headers["X-Cache"] == "hit"
+    assert near.headers["X-Similar-Query"] == "align legging lululemon"
+    assert near.headers["X-Query-Similarity"] == "0.75"
+    assert near.content == first.content
+
+    assert client.get("/dupes", params={"q": "nike pegasus shoes"}).headers["X-Cache"] == "miss"
+    forced = client.get("/dupes", params={"q": "lululemon align leggings black"}, headers={"Cache-Control": "no-cache"})
+    assert "X-Similar-Query" not in forced.headers
+    assert searched == ["Lululemon Align leggings", "nike pegasus shoes", "lululemon align leggings black"]
+    assert client.get("/stats").json()["similar_queries"]["matches"] == 1
+
+    women = client.get("/dupes", params={"q": "lululemon align leggings women"})
+    assert women.headers["X-Cache"] == "miss" and "X-Similar-Query" not in women.headers
+
+
+def test_failed_queries_are_not_offered_to_similar_ones(monkeypatch):
+    monkeypatch.setenv("TAVILY_API_KEY", "fake")
+    import backend.app as appmod
+    importlib.reload(appmod)
+    monkeypatch.setattr(appmod, "query_index", SimilarQueryIndex(threshold=0.75))
+
+    async def failing_find_dupes(q, max_results):
+        raise appmod.HTTPException(status_code=502, detail="Provider error")
+
+    monkeypatch.setattr(appmod, "find_dupes", failing_find_dupes)
+    client = TestClient(appmod.app)
+    assert client.get("/dupes", params={"q": "lululemon align leggings"}).status_code == 502
+    assert appmod.query_index.stats()["queries"] == 0
@@ -0,0 +1,124 @@
+import asyncio
+import importlib
+
+from fastapi.testclient import TestClient
+
+from backend.services.response_cache import HIT, MISS, STALE, ResponseCache, etag_matches, make_etag
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_etag_matching():
+    etag = make_etag(b'{"a":1}')
+    assert etag == make_etag(b'{"a":1}') != make_etag(b'{"a":2}')
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag) and not etag_matches('"other"', etag)
+
+
+def test_fresh_stale_and_background_refresh():
+    clock = FakeClock()
+    cache = ResponseCache(ttl=10, stale_ttl=20, clock=clock)
+    calls = []
+
+    async def compute():
+        calls.append(clock.now)
+        await asyncio.sleep(0)
+        return f"body-{len(calls)}".encode()
+
+    async def go():
+        first, status = await cache.get_or_compute("k", compute)
+        assert (first.body, status) == (b"body-1", MISS)
+        assert (await cache.get_or_compute("k", compute))[1] == HIT
+        assert cache.cache_control(first) == "public, max-age=10, stale-while-revalidate=20"
+
+        clock.now += 15
+        stale, status = await cache.get_or_compute("k", compute)
+        assert (stale.body, status) == (b"body-1", STALE)
+        # a second stale hit doesn't start another refresh
+        await cache.get_or_compute("k", compute)
+        await asyncio.sleep(0.01)
+        assert len(calls) == 2
+
+        fresh, status = await cache.get_or_compute("k", compute)
+        assert (fresh.body, status) == (b"body-2", HIT)
+
+        clock.now += 31
+        assert (await cache.get_or_compute("k", compute))[1] == MISS
+
+    asyncio.run(go())
+    assert cache.stats()["refreshes"] == 1
+
+
+def test_concurrent_misses_share_one_computation_and_failed_refresh_keeps_stale():
+    clock = FakeClock()
+    cache = ResponseCache(ttl=10, stale_ttl=20, clock=clock)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if len(calls) > 1:
+            raise RuntimeError("provider down")
+        return b"body"
+
+    async def go():
+        results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+        assert {entry.body for entry, _ in results} == {b"body"}
+        assert len(calls) == 1
+
+        clock.now += 15
+        assert (await cache.get_or_compute("k", compute))[1] == STALE
+        await asyncio.sleep(0.05)
+        entry, status = await cache.get_or_compute("k", compute)
+        assert (entry.body, status) == (b"body", STALE)
+
+    asyncio.run(go())
+    assert cache.stats()["refresh_errors"] >= 1
+
+
+def test_search_responses_are_cached_with_etags(monkeypatch):
+    monkeypatch.setenv("TAVILY_API_KEY", "fake")
+    import backend.app as appmod
+    importlib.reload(appmod)
+    calls = []
+
+    async def fake_tavily(query, max_results, search_depth="basic"):
+        calls.append(query)
+        return {"results": [
+            {"title": "Quilted bag", "url": "https://www.amazon.com/dp/1", "content": "Shop now, buy for $25"},
+        ]}
+
+    monkeypatch.setattr(appmod, "tavily_search", fake_tavily)
+    client = TestClient(appmod.app)
+
+    first = client.get("/search", params={"q": "quilted bag"})
+    assert first.status_code == 200
+    assert first.headers["X-Cache"] == "miss"
+    assert first.json()["results"][0]["url"] == "https://www.amazon.com/dp/1"
+    etag = first.headers["ETag"]
+    assert "stale-while-revalidate" in first.headers["Cache-Control"]
+
+    again = client.get("/search", params={"q": "  Quilted   BAG "})
+    assert again.headers["X-Cache"] == "hit"
+    assert again.headers["ETag"] == etag and again.content == first.content
+    assert len(calls) == 1
+
+    not_modified = client.get("/search", params={"q": "quilted bag"}, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b"" and not_modified.headers["ETag"] == etag
+
+    other_size = client.get("/search", params={"q": "quilted bag", "max_results": 3})
+    assert other_size.headers["X-Cache"] == "miss"
+
+    forced = client.get("/search", params={"q": "quilted bag"}, headers={"Cache-Control": "no-cache"})
+    assert forced.headers["X-Cache"] == "miss"
+    assert len(calls) == 3
+    assert client.get("/stats").json()["response_cache"]["hits"] >= 2
@@ -0,0 +1,73 @@
+import random
+
+import numpy as np
+
+from backend.services.scoring import savings_bonus, score_batch
+
+
+def reference_rank(normalized, max_results):
+    """The original per-item ranking from the /dupes handler"""
+    import backend.app as appmod
+
+    prices = [appmod.extract_price(r.snippet or "") for r in normalized]
+    known = [p for p in prices if p is not None]
+    avg_price = sum(known) / len(known) if known else None
+    max_price = max(known) if known else None
+    items = [(i, appmod.score_dupe(r, avg_price, max_price)) for i, r in enumerate(normalized)]
+    items.sort(key=lambda x: x[1].dupeScore, reverse=True)
+    if known:
+        with_price = [it for it in items if it[1].price is not None]
+        without_price = [it for it in items if it[1].price is None]
+        with_price.sort(key=lambda x: (x[1].price if x[1].price else 999999))
+        items = with_price + without_price
+    return items[:max_results]
+
+
+def test_savings_buckets():
+    """Bucket edges match the per-item thresholds"""
+    savings = np.array([0, 9.9, 10, 20, 30, 50, 69.9, 70, 100])
+    assert savings_bonus(savings).tolist() == [0, 0, 10, 15, 20, 25, 25, 30, 30]
+
+
+def test_unpriced_batch_orders_by_score_only():
+    """Without any prices the order is the stable score order"""
+    batch = score_batch([None, None, None], [0, 9, 9])
+    assert batch.order.tolist() == [1, 2, 0]
+    assert batch.scores.tolist() == [50, 59, 59]
+    assert batch.max_price is None and batch.priced == 0
+
+
+def test_rank_dupes_matches_per_item_scoring():
+    """Batch ranking gives the same items, scores and order as score_dupe"""
+    import backend.app as appmod
+
+    rng = random.Random(11)
+    hosts = ["www.amazon.com", "www.shein.com", "wish.com", "shop.example", "www.zara.com", "www.etsy.com"]
+    for _ in range(200):
+        normalized = []
+        for n in range(rng.randint(0, 25)):
+            price = rng.choice([None, 0, 5, 12.5, 19.99, 39.99, 80, 120, rng.randint(1, 300)])
+            snippet = "No price visible" if price is None else f"Now ${price}"
+            normalized.append(appmod.SearchResult(
+                title=f"Dress {n}", url=f"https://{rng.choice(hosts)}/p/{n}", snippet=snippet,
+            ))
+        max_results = rng.randint(1, 30)
+        ranked, stats = appmod.rank_dupes(normalized, max_results)
+        expected = reference_rank(normalized, max_results)
+        assert [(i, item.model_dump()) for i, item in ranked] == [(i, item.model_dump()) for i, item in expected]
+        assert stats["count"] == sum(1 for _, it in reference_rank(normalized, len(normalized)) if it.price is not None)
+
+
+def test_rank_dupes_ignores_other_currencies():
+    """A yen price neither sets the price range nor shows up as dollars"""
+    import backend.app as appmod
+
+    normalized = [
+        appmod.SearchResult(title="Dress", url="https://shop.example/a", snippet="Now $40"),
+        appmod.SearchResult(title="Dress JP", url="https://shop.example/b", snippet="Now ¥3,980"),
+        appmod.SearchResult(title="Dress 2", url="https://shop.example/c", snippet="Now $20"),
+    ]
+    ranked, stats = appmod.rank_dupes(normalized, 3)
+    assert (stats["max"], stats["count"]) == (40.0, 2)
+    item = next(item for _, item in ranked if item.title == "Dress JP")
+    assert item.price is None and "3980" not in item.reason
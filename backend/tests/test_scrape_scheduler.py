@@ -0,0 +1,150 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.services.scrape_scheduler import AdaptiveTimeout, CircuitBreaker, CircuitOpen, ScrapeScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_circuit_breaker_opens_and_recovers():
+    """The breaker opens after repeated failures and half-opens after the cooldown"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=30, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    clock.now = 31
+    assert breaker.allow()  # single trial call
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_adaptive_timeout_tracks_latency():
+    """Fast hosts get short timeouts; timeouts back off toward the maximum"""
+    timeout = AdaptiveTimeout(initial=5.0, min_timeout=0.5, max_timeout=5.0)
+    for _ in range(20):
+        timeout.observe(0.2)
+    assert timeout.value == pytest.approx(0.5, abs=0.1)
+    timeout.backoff()
+    assert timeout.value == pytest.approx(1.0, abs=0.2)
+
+
+def test_scheduler_limits_per_host_concurrency():
+    """No more than per_host_limit calls run against one host at a time"""
+    scheduler = ScrapeScheduler(global_limit=10, per_host_limit=2)
+    active = {"now": 0, "peak": 0}
+
+    async def job():
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+        return "ok"
+
+    async def run():
+        return await asyncio.gather(*[scheduler.run("www.amazon.com", job) for _ in range(6)])
+
+    assert asyncio.run(run()) == ["ok"] * 6
+    assert active["peak"] == 2
+
+
+def test_scheduler_skips_hosts_after_timeouts():
+    """Hosts that keep timing out are skipped until their cooldown ends"""
+    scheduler = ScrapeScheduler(failure_threshold=2, min_timeout=0.01, max_timeout=0.01)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def run():
+        results = []
+        for _ in range(3):
+            try:
+                await scheduler.run("slow.example", slow)
+            except Exception as e:
+                results.append(type(e))
+        return results
+
+    assert asyncio.run(run()) == [TimeoutError, TimeoutError, CircuitOpen]
+    assert scheduler.stats()["slow.example"]["state"] == "open"
+
+
+def test_scheduler_counts_only_host_failures():
+    """Connect errors and 5xx open the breaker; a 404 or an unusable page does not"""
+    scheduler = ScrapeScheduler(failure_threshold=2)
+    request = httpx.Request("GET", "https://shop.example/p")
+
+    def status(code):
+        async def call():
+            raise httpx.HTTPStatusError("status", request=request, response=httpx.Response(code, request=request))
+        return call
+
+    async def not_an_image():
+        raise ValueError("Not an image")
+
+    async def refused():
+        raise httpx.ConnectError("refused", request=request)
+
+    async def run(*calls):
+        for call in calls:
+            with pytest.raises(Exception):
+                await scheduler.run("shop.example", call)
+
+    asyncio.run(run(status(404), not_an_image, status(404), not_an_image))
+    stats = scheduler.stats()["shop.example"]
+    assert (stats["state"], stats["errors"]) == ("closed", 0)
+    asyncio.run(run(status(503), refused))
+    assert scheduler.stats()["shop.example"]["state"] == "open"
+
+
+def test_scheduler_forgets_least_recently_used_hosts():
+    scheduler = ScrapeScheduler(max_hosts=2)
+
+    async def ok():
+        return "ok"
+
+    async def run():
+        for host in ("a.example", "b.example", "a.example", "c.example"):
+            await scheduler.run(host, ok)
+
+    asyncio.run(run())
+    assert list(scheduler.stats()) == ["a.example", "c.example"]
+
+
+def test_cancelled_trial_waiting_for_a_slot_is_released():
+    """A half-open trial cancelled before it gets a slot doesn't leave the host skipped"""
+    clock = FakeClock()
+    scheduler = ScrapeScheduler(per_host_limit=1, failure_threshold=1, cooldown=30, clock=clock)
+
+    async def refused():
+        raise httpx.ConnectError("refused")
+
+    async def ok():
+        return "ok"
+
+    async def run():
+        with pytest.raises(httpx.ConnectError):
+            await scheduler.run("shop.example", refused)
+        clock.now = 31  # half-open: one trial allowed
+        state = scheduler.host("shop.example")
+        await state.semaphore.acquire()  # the slot is busy, so the trial waits
+        trial = asyncio.ensure_future(scheduler.run("shop.example", ok))
+        await asyncio.sleep(0)
+        trial.cancel()
+        await asyncio.gather(trial, return_exceptions=True)
+        state.semaphore.release()
+        return await scheduler.run("shop.example", ok)
+
+    assert asyncio.run(run()) == "ok"
+    assert scheduler.stats()["shop.example"]["state"] == "closed"
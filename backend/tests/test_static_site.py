@@ -0,0 +1,101 @@
+import gzip
+import importlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from backend.services.compression import CompressionMiddleware, choose_encoding
+from backend.services.static_site import StaticSite
+
+
+def test_choose_encoding_honours_q_values():
+    assert choose_encoding("gzip, deflate, br", ("br", "gzip")) == "br"
+    assert choose_encoding("br;q=0.5, gzip", ("br", "gzip")) == "gzip"
+    assert choose_encoding("*;q=0.1", ("gzip",)) == "gzip"
+    assert choose_encoding("gzip;q=0, identity", ("gzip",)) is None
+    assert choose_encoding(None) is None
+
+
+def test_middleware_compresses_whole_json_but_not_streams():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100, encodings=("gzip",))
+
+    @app.get("/big")
+    def big():
+        return JSONResponse({"items": ["dupe"] * 200}, headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b"data: 1\n\n"] * 100), media_type="text/event-stream")
+
+    client = TestClient(app)
+    r = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["etag"] == 'W/"abc"'
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert int(r.headers["content-length"]) < len(r.content)
+    assert r.json()["items"][0] == "dupe"
+
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/stream", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/big", headers={"Accept-Encoding": "identity"}).headers
+
+
+@pytest.fixture
+def site_dir(tmp_path):
+    (tmp_path / "index.html").write_text(
+        '<img src="logo.webp"><link href="./css/app.css">' + "<p>raccoon</p>" * 200
+    )
+    (tmp_path / "logo.webp").write_bytes(b"RIFF....WEBP")
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "app.css").write_text("body { color: black; }\n" * 100)
+    (tmp_path / "server.log").write_text("not served")
+    return tmp_path
+
+
+def test_static_site_hashes_assets_and_rewrites_pages(site_dir):
+    site = StaticSite(str(site_dir))
+    site.load()
+    logo = site.manifest["logo.webp"]
+    css = site.manifest["css/app.css"]
+    assert logo.startswith("/assets/logo.") and logo.endswith(".webp")
+    assert css.startswith("/assets/css/app.")
+
+    page = site.get("index.html")
+    assert f'src="{logo}"'.encode() in page.body and f'href="{css}"'.encode() in page.body
+    assert not page.immutable and site.get(logo[1:]).immutable
+    assert gzip.decompress(page.variants["gzip"]) == page.body
+    assert "gzip" not in site.get(logo[1:]).variants  # images are not recompressed
+    assert all(not path.endswith(".log") for path in site.files)
+
+    # Changing an asset changes its URL
+    (site_dir / "logo.webp").write_bytes(b"RIFF....WEBP2")
+    assert StaticSite(str(site_dir)).get("index.html").body != page.body
+
+
+def test_app_serves_frontend_same_origin(monkeypatch, site_dir):
+    monkeypatch.setenv("FRONTEND_DIR", str(site_dir))
+    import backend.app as appmod
+    importlib.reload(appmod)
+    client = TestClient(appmod.app)
+
+    r = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/html")
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["cache-control"] == "no-cache"
+    assert client.get("/", headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+
+    asset = client.get(appmod.static_site.manifest["logo.webp"])
+    assert asset.status_code == 200 and asset.content == b"RIFF....WEBP"
+    assert "immutable" in asset.headers["cache-control"]
+    assert client.get("/assets/logo.webp").status_code == 404
+
+    monkeypatch.setattr(appmod, "SERVE_FRONTEND", False)
+    assert client.get("/").status_code == 404
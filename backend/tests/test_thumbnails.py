@@ -0,0 +1,134 @@
+import importlib
+import io
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.services import thumbnails
+from backend.services.parse_pool import ParseExecutor
+from backend.services.thumbnails import ThumbnailCache, make_thumbnail, placeholder_svg, sign_url, verify_url
+
+
+def jpeg_bytes(size=(1200, 1500)):
+    Image = pytest.importorskip("PIL.Image")
+    out = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 60)).save(out, "JPEG")
+    return out.getvalue()
+
+
+def test_signatures_bind_the_url():
+    sig = sign_url(b"secret", "https://cdn.example/a.jpg")
+    assert verify_url(b"secret", "https://cdn.example/a.jpg", sig)
+    assert not verify_url(b"secret", "https://cdn.example/b.jpg", sig)
+    assert not verify_url(b"other", "https://cdn.example/a.jpg", sig)
+    assert not verify_url(b"secret", "https://cdn.example/a.jpg", "é" * 32)
+
+
+def test_placeholder_is_local_svg_with_escaped_text():
+    svg = placeholder_svg(400, 500, "<No Image>").decode()
+    assert svg.startswith("<svg") and 'width="400"' in svg
+    assert "&lt;No Image&gt;" in svg
+
+
+def test_make_thumbnail_resizes_into_the_box():
+    Image = pytest.importorskip("PIL.Image")
+    data, ext = make_thumbnail(jpeg_bytes(), 400, 500, "jpeg")
+    assert ext == "jpg"
+    assert Image.open(io.BytesIO(data)).size == (400, 500)
+
+    with pytest.raises(ValueError):
+        make_thumbnail(b"<html>not an image</html>", 400, 500, "jpeg")
+
+
+def test_make_thumbnail_passes_through_without_pillow(monkeypatch):
+    monkeypatch.setattr(thumbnails, "PIL_AVAILABLE", False)
+    assert make_thumbnail(b"raw", 400, 500, "webp", "image/png; charset=binary") == (b"raw", "png")
+    with pytest.raises(ValueError):
+        make_thumbnail(b"raw", 400, 500, "webp", "application/octet-stream")
+
+
+def test_thumbnail_cache_evicts_least_recently_used(tmp_path):
+    cache = ThumbnailCache(str(tmp_path), max_bytes=250)
+    cache.put("a", b"x" * 100, "jpg")
+    cache.put("b", b"x" * 100, "jpg")
+    assert cache.get("a").endswith("a.jpg")  # a is now more recent than b
+    cache.put("c", b"x" * 100, "jpg")
+
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.jpg", "c.jpg"]
+    assert cache.stats()["bytes"] == 200 and cache.stats()["evictions"] == 1
+
+    # A restarted worker picks the files (and their size) back up
+    assert ThumbnailCache(str(tmp_path), max_bytes=250).stats()["bytes"] == 200
+
+
+@pytest.fixture
+def appmod(monkeypatch, tmp_path):
+    import backend.app as appmod
+    importlib.reload(appmod)
+    monkeypatch.setattr(appmod, "thumbnail_cache", ThumbnailCache(str(tmp_path / "thumbs")))
+    monkeypatch.setattr(appmod, "parse_executor", ParseExecutor(kind="inline"))
+    return appmod
+
+
+def test_image_proxy_fetches_once_and_serves_immutable_thumbnails(monkeypatch, appmod):
+    fetched = []
+
+    async def fake_fetch(url):
+        fetched.append(url)
+        return jpeg_bytes(), "image/jpeg"
+
+    monkeypatch.setattr(appmod, "fetch_image_bytes", fake_fetch)
+    proxied = appmod.thumbnail_url("https://cdn.example/tote.jpg")
+    assert parse_qs(urlsplit(proxied).query)["url"] == ["https://cdn.example/tote.jpg"]
+
+    client = TestClient(appmod.app)
+    first = client.get(proxied)
+    second = client.get(proxied)
+    assert first.status_code == second.status_code == 200
+    assert first.headers["content-type"] == f"image/{appmod.IMAGE_PROXY_FORMAT}"
+    assert "immutable" in first.headers["cache-control"]
+    assert second.content == first.content
+    assert fetched == ["https://cdn.example/tote.jpg"]
+    assert appmod.thumbnail_cache.stats()["hits"] == 1
+
+
+def test_image_proxy_rejects_unsigned_urls_and_falls_back(monkeypatch, appmod):
+    async def broken_fetch(url):
+        raise ValueError("Not an image: text/html")
+
+    monkeypatch.setattr(appmod, "fetch_image_bytes", broken_fetch)
+    client = TestClient(appmod.app)
+
+    forged = client.get("/img", params={"url": "https://evil.example/x.jpg", "sig": "0" * 32})
+    assert forged.status_code == 403
+    assert client.get("/img", params={"url": "https://evil.example/x.jpg", "sig": "ü" * 32}).status_code == 403
+
+    # Only the card and detail sizes are rendered, whatever the signature
+    resized = appmod.thumbnail_url("https://shop.example/page").replace("w=400&h=500", "w=1600&h=2000")
+    assert client.get(resized).status_code == 400
+    detail = appmod.thumbnail_url("https://shop.example/page").replace("w=400&h=500", "w=600&h=750")
+    assert client.get(detail).status_code == 200
+
+    r = client.get(appmod.thumbnail_url("https://shop.example/page"))
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "image/svg+xml"
+    assert r.headers["x-image-proxy"] == "fallback"
+    assert "max-age=300" in r.headers["cache-control"]
+
+
+def test_items_carry_thumbnails_and_local_placeholders(appmod):
+    client = TestClient(appmod.app)
+    placeholder = appmod.placeholder_url("No Image")
+    r = client.get(placeholder)
+    assert r.status_code == 200 and r.headers["content-type"] == "image/svg+xml"
+
+    result = appmod.SearchResult(title="Tote", url="https://shop.example/tote", snippet="Tote $20")
+    item = appmod.build_dupe_item(result, "shop.example", 20.0, 0, 0.0, 60)
+    assert item.image.startswith("/img/placeholder?") and item.thumbnail is None
+
+    result.image = "https://cdn.example/tote.jpg"
+    item = appmod.build_dupe_item(result, "shop.example", 20.0, 0, 0.0, 60)
+    assert item.thumbnail.startswith("/img?")
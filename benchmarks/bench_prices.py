@@ -0,0 +1,65 @@
+"""Micro-benchmark: price extraction, old single-regex vs backend.services.prices.
+
+Runs each parser over a corpus of result snippets (benchmarks/data/snippets.json
+by default) and reports time per snippet, plus how often the two disagree.
+
+    python -m benchmarks.bench_prices [--corpus PATH] [--rounds N]
+"""
+import argparse
+import json
+import os
+import re
+import timeit
+
+from backend.services.prices import parse_price, parse_prices
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "data", "snippets.json")
+
+
+def legacy_extract_price(text):
+    """The original backend.app.extract_price"""
+    import re
+    m = re.search(r"\$(\d+(?:\.\d{1,2})?)", text)
+    return float(m.group(1)) if m else None
+
+
+def run(corpus, rounds):
+    n = len(corpus)
+    timings = {
+        "legacy extract_price": timeit.timeit(lambda: [legacy_extract_price(t) for t in corpus], number=rounds),
+        "parse_price (per snippet)": timeit.timeit(lambda: [parse_price(t) for t in corpus], number=rounds),
+        "parse_prices (batch)": timeit.timeit(lambda: parse_prices(corpus), number=rounds),
+    }
+    results = {name: round(total / (rounds * n) * 1e6, 3) for name, total in timings.items()}
+
+    legacy = [legacy_extract_price(t) for t in corpus]
+    current = [p.amount if p else None for p in parse_prices(corpus)]
+    changed = [(t, old, new) for t, old, new in zip(corpus, legacy, current) if old != new]
+    return results, changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    results, changed = run(corpus, args.rounds)
+    if args.json:
+        print(json.dumps({"us_per_snippet": results, "changed": len(changed), "snippets": len(corpus)}))
+        return
+
+    print(f"{len(corpus)} snippets x {args.rounds} rounds (microseconds per snippet)")
+    for name, us in results.items():
+        print(f"  {name:<28} {us:8.3f}")
+    print(f"{len(changed)} snippets parse differently:")
+    for text, old, new in changed:
+        print(f"  {old!s:>8} -> {new!s:<8} {text[:70]}")
+
+
+if __name__ == "__main__":
+    main()
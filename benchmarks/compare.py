@@ -0,0 +1,66 @@
+"""Compare two benchmark result files (micro or load) and flag regressions.
+
+    python -m benchmarks.compare old.json new.json [--threshold 10]
+
+Exits with status 1 if any metric got worse by more than ``--threshold``
+percent (time per op / latency up, requests per second down).
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, Tuple
+
+# metric -> True if higher is better
+LOAD_METRICS = {"p50_ms": False, "p95_ms": False, "p99_ms": False, "rps": True}
+
+
+def _metrics(results: dict) -> Iterator[Tuple[str, float, bool]]:
+    if results.get("kind") == "micro":
+        for name, bench in results["benchmarks"].items():
+            yield name, bench["us_per_op"], False
+    else:
+        for s in results["scenarios"]:
+            label = f"{s['endpoint']} c={s['concurrency']} max={s['max_results']}"
+            for metric, higher_better in LOAD_METRICS.items():
+                value = s["rps"] if metric == "rps" else s["latency"][metric]
+                yield f"{label} {metric}", value, higher_better
+
+
+def compare(old: dict, new: dict, threshold: float) -> Tuple[list, list]:
+    before: Dict[str, float] = {name: value for name, value, _ in _metrics(old)}
+    rows, regressions = [], []
+    for name, value, higher_better in _metrics(new):
+        if name not in before or not before[name] or value is None:
+            continue
+        change = (value - before[name]) / before[name] * 100
+        worse = -change if higher_better else change
+        rows.append((name, before[name], value, change))
+        if worse > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark JSON files")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    if old.get("kind") != new.get("kind"):
+        sys.exit(f"Can't compare {old.get('kind')} results with {new.get('kind')} results")
+
+    rows, regressions = compare(old, new, args.threshold)
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']}")
+    for name, before, after, change in rows:
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"  {name:<55} {before:>12.3f} {after:>12.3f} {change:+7.1f}%{flag}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
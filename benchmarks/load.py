@@ -0,0 +1,226 @@
+"""End-to-end load test for /search and /dupes against the offline stand-ins.
+
+By default the backend app, the Tavily stand-in and the product-page fixture
+server all run in this process over ASGI transports (no sockets), so numbers
+describe one worker's throughput with the configured injected latency. With
+``--base-url`` the requests go to an already running server instead (start it
+and the stand-ins as described in benchmarks/stubs.py).
+
+For every (endpoint, concurrency, max_results) scenario the output records
+p50/p95/p99 latency, requests per second and scrape fan-out (product pages
+fetched per request, from the backend's /stats). Caches are cold by default:
+queries are made unique and the image cache keeps nothing.
+
+    python -m benchmarks.load --out benchmarks/results/load.json
+    python -m benchmarks.load --quick --out -
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import latency_summary, run_metadata, write_results
+from benchmarks.stubs import FaultProfile, create_shop_app, create_tavily_app, load_tavily_corpus
+
+STAND_IN_SHOP_PORT = 8101
+
+
+class StandInClients:
+    """Drop-in for ``backend.app.http_clients`` that talks to in-process stand-ins"""
+
+    def __init__(self, tavily_app, shop_app):
+        self._apps = {"tavily": tavily_app, "scrape": shop_app}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _client(self, name: str) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._clients = {}
+            self._loop = loop
+        if name not in self._clients:
+            self._clients[name] = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=self._apps[name]), follow_redirects=True
+            )
+        return self._clients[name]
+
+    @property
+    def tavily(self) -> httpx.AsyncClient:
+        return self._client("tavily")
+
+    @property
+    def scrape(self) -> httpx.AsyncClient:
+        return self._client("scrape")
+
+    async def startup(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients = {}
+
+
+def load_backend(args: argparse.Namespace):
+    """Import backend.app wired to in-process stand-ins"""
+    os.environ.setdefault("TAVILY_API_KEY", "offline")
+    import backend.app as appmod
+    from backend.services.image_cache import ImageCache
+    from backend.services.scrape_scheduler import ScrapeScheduler
+
+    tavily_faults = FaultProfile(args.tavily_latency_ms, args.tavily_jitter_ms, args.tavily_error_rate, seed=args.seed)
+    shop_faults = FaultProfile(args.shop_latency_ms, args.shop_jitter_ms, args.shop_error_rate, seed=args.seed)
+    appmod.TAVILY_API_KEY = appmod.TAVILY_API_KEY or "offline"
+    appmod.TAVILY_API_URL = "http://tavily.stand-in/search"
+    appmod.http_clients = StandInClients(
+        create_tavily_app(faults=tavily_faults, shop_port=STAND_IN_SHOP_PORT),
+        create_shop_app(faults=shop_faults, page_kb=args.page_kb),
+    )
+    appmod.scrape_scheduler = ScrapeScheduler.from_env()
+    if args.cold:
+        appmod.image_cache = ImageCache(":memory:", ttl=0, not_found_ttl=0, timeout_ttl=0, error_ttl=0)
+    return appmod
+
+
+def _scrape_requests(stats: dict) -> int:
+    return sum(host["requests"] for host in stats.get("scrape_hosts", {}).values())
+
+
+# Suffixes that make cold-mode queries unique across every scenario of a run.
+# Starting from the clock keeps them unique across runs against one
+# long-lived --base-url server too.
+_cold_suffixes = itertools.count(int(time.time()))
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    concurrency: int,
+    max_results: int,
+    requests: int,
+    queries: List[str],
+    cold: bool = True,
+) -> Dict[str, Any]:
+    """Closed-loop load: ``concurrency`` workers issue ``requests`` requests in total"""
+    counter = itertools.count()
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while True:
+            n = next(counter)
+            if n >= requests:
+                return
+            q = queries[n % len(queries)]
+            if cold:
+                q = f"{q} {next(_cold_suffixes)}"
+            started = time.perf_counter()
+            try:
+                r = await client.get(endpoint, params={"q": q, "max_results": max_results})
+                ok = r.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    before = (await client.get("/stats")).json()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    after = (await client.get("/stats")).json()
+
+    done = len(latencies)
+    tavily_calls = after["tavily_cache"]["misses"] - before["tavily_cache"]["misses"]
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "max_results": max_results,
+        "requests": done,
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "rps": round(done / elapsed, 2) if elapsed else None,
+        "latency": latency_summary(latencies),
+        "scrape_fanout": round((_scrape_requests(after) - _scrape_requests(before)) / done, 2) if done else None,
+        "tavily_calls_per_request": round(tavily_calls / done, 2) if done else None,
+    }
+
+
+async def run_all(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    queries = [r["query"].split(" clothing ")[0] for r in load_tavily_corpus()]
+    if args.base_url:
+        transport = None
+        base_url = args.base_url
+    else:
+        appmod = load_backend(args)
+        transport = httpx.ASGITransport(app=appmod.app)
+        base_url = "http://backend"
+
+    scenarios = []
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=120) as client:
+        for endpoint in args.endpoints:
+            for concurrency in args.concurrency:
+                for max_results in args.max_results:
+                    result = await run_scenario(
+                        client, endpoint, concurrency, max_results, args.requests, queries, cold=args.cold
+                    )
+                    scenarios.append(result)
+                    print(
+                        f"{endpoint:<8} c={concurrency:<3} max={max_results:<3} "
+                        f"p50={result['latency']['p50_ms']:8.1f}ms p99={result['latency']['p99_ms']:8.1f}ms "
+                        f"rps={result['rps']:7.1f} fanout={result['scrape_fanout']} errors={result['errors']}",
+                        file=args.console,
+                    )
+    return scenarios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test /search and /dupes against the offline stand-ins")
+    parser.add_argument("--out", default="benchmarks/results/load.json", help="JSON output path, - for stdout")
+    parser.add_argument("--base-url", help="hit a running server instead of the in-process app")
+    parser.add_argument("--endpoints", nargs="+", default=["/search", "/dupes"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--max-results", nargs="+", type=int, default=[8, 16])
+    parser.add_argument("--requests", type=int, default=50, help="requests per scenario")
+    parser.add_argument("--warm", dest="cold", action="store_false", help="reuse queries and cached images")
+    parser.add_argument("--quick", action="store_true", help="small smoke run")
+    parser.add_argument("--page-kb", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=218)
+    for prefix, latency in (("tavily", 0.0), ("shop", 20.0)):
+        parser.add_argument(f"--{prefix}-latency-ms", type=float, default=latency)
+        parser.add_argument(f"--{prefix}-jitter-ms", type=float, default=0.0)
+        parser.add_argument(f"--{prefix}-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    if args.quick:
+        args.concurrency, args.max_results, args.requests = [1, 4], [8], 8
+
+    # The in-process backend logs every request and scrape; keep it out of the report
+    args.console = sys.stderr
+    logging.getLogger("dupefinder").setLevel(logging.ERROR)
+    scenarios = asyncio.run(run_all(args))
+
+    write_results(args.out, {
+        "kind": "load",
+        "meta": run_metadata(),
+        "config": {
+            "mode": "http" if args.base_url else "in-process",
+            "cold": args.cold,
+            "requests_per_scenario": args.requests,
+            "page_kb": args.page_kb,
+            "tavily_latency_ms": args.tavily_latency_ms,
+            "shop_latency_ms": args.shop_latency_ms,
+            "shop_error_rate": args.shop_error_rate,
+        },
+        "scenarios": scenarios,
+    })
+
+
+if __name__ == "__main__":
+    main()
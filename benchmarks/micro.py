@@ -0,0 +1,138 @@
+"""Micro-benchmarks for the hot paths behind /search and /dupes.
+
+Inputs come from the offline corpora: recorded Tavily responses
+(benchmarks/data/tavily) and product pages rendered from
+benchmarks/data/pages. ``--html-dir`` adds saved retailer pages (*.html)
+to the parsing benchmarks.
+
+    python -m benchmarks.micro --out benchmarks/results/micro.json
+"""
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import timeit
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks import bench_prices
+from benchmarks.common import run_metadata, write_results
+from benchmarks.stubs import load_page_templates, load_tavily_corpus, make_filler, render_page
+
+
+def measure(fn: Callable[[], Any], ops: int = 1, repeat: int = 5, min_time: float = 0.2) -> Dict[str, float]:
+    """Best-of-``repeat`` time per operation; ``fn`` performs ``ops`` operations per call"""
+    timer = timeit.Timer(fn)
+    number, total = timer.autorange()
+    number = max(1, int(number * min_time / max(total, 1e-9)))
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+    return {"us_per_op": round(best / ops * 1e6, 3), "ops_per_call": ops, "calls": number}
+
+
+def product_pages(html_dir: str = None, page_kb: int = 200) -> List[Tuple[str, str, bytes]]:
+    """(name, url, body) for every template (and every saved page in ``html_dir``)"""
+    filler = make_filler(page_kb)
+    pages = [
+        (f"template:{name}", f"https://www.shein.com/{name}-p-1.html",
+         render_page(template, "www.shein.com", f"/{name}-p-1.html", filler).encode("utf-8"))
+        for name, template in load_page_templates().items()
+    ]
+    if html_dir:
+        for path in sorted(glob.glob(os.path.join(html_dir, "*.html"))):
+            with open(path, "rb") as f:
+                pages.append((f"saved:{os.path.basename(path)}", "https://shop.example/p", f.read()))
+    return pages
+
+
+def bench_pipeline(appmod, recordings: List[dict]) -> Dict[str, Any]:
+    results = {}
+    rows = [r for rec in recordings for r in rec["results"]]
+    n = len(rows)
+    triples = [
+        (r.get("title") or "", r.get("content") or "", appmod.extract_site(r["url"]) or "") for r in rows
+    ]
+    results["is_shopping_content"] = measure(
+        lambda: [appmod.is_shopping_content(t, s, site) for t, s, site in triples], ops=n
+    )
+    results["normalize"] = measure(
+        lambda: [appmod.normalize(rec, 20) for rec in recordings], ops=len(recordings)
+    )
+
+    candidates = [appmod.filter_clothing_results(rec, 32) for rec in recordings]
+    flat = [c for group in candidates for c in group]
+    results["score_dupe"] = measure(lambda: [appmod.score_dupe(c, None, 120.0) for c in flat], ops=len(flat))
+    results["rank_dupes"] = measure(
+        lambda: [appmod.rank_dupes(group, 16) for group in candidates], ops=len(candidates)
+    )
+
+    # Image lookups answered at once, so this measures filtering and orchestration
+    async def instant_image(url):
+        return appmod.ImageHit("https://cdn.example/p.jpg", "og:image")
+
+    appmod.download_product_page = instant_image
+
+    def run_normalize_with_images():
+        async def go():
+            for rec in recordings:
+                await appmod.normalize_with_images(rec, 32)
+        asyncio.run(go())
+
+    results["normalize_with_images"] = measure(run_normalize_with_images, ops=len(recordings), repeat=3)
+    return results
+
+
+def bench_parsing(pages) -> Dict[str, Any]:
+    from backend.services.image_extract import HeadScanner, extract_image
+
+    results = {}
+    for name, url, body in pages:
+        results[f"extract_image[fast,{name}]"] = measure(lambda: extract_image(body, url, "utf-8", "fast"))
+        results[f"extract_image[bs4,{name}]"] = measure(lambda: extract_image(body, url, "utf-8", "bs4"), repeat=3)
+
+        def stream():
+            scanner = HeadScanner("utf-8")
+            for i in range(0, len(body), 16384):
+                if scanner.feed(body[i:i + 16384]):
+                    break
+
+        results[f"head_scanner[{name}]"] = measure(stream)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the /search and /dupes hot paths")
+    parser.add_argument("--out", default="benchmarks/results/micro.json", help="JSON output path, - for stdout")
+    parser.add_argument("--html-dir", help="directory of saved product pages to parse as well")
+    parser.add_argument("--page-kb", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ.setdefault("TAVILY_API_KEY", "offline")
+    os.environ.setdefault("IMAGE_CACHE_PATH", ":memory:")
+    import backend.app as appmod
+    from backend.services.image_cache import ImageCache
+
+    appmod.image_cache = ImageCache(":memory:", ttl=0, not_found_ttl=0, timeout_ttl=0, error_ttl=0)
+    recordings = load_tavily_corpus()
+
+    with open(bench_prices.DEFAULT_CORPUS, encoding="utf-8") as f:
+        snippets = json.load(f)
+
+    # Per-call backend logging would only measure the log handler
+    logging.getLogger("dupefinder").setLevel(logging.ERROR)
+    benchmarks = bench_pipeline(appmod, recordings)
+    benchmarks.update(bench_parsing(product_pages(args.html_dir, args.page_kb)))
+    prices, _ = bench_prices.run(snippets, 500)
+    for name, us in prices.items():
+        benchmarks[f"prices[{name}]"] = {"us_per_op": us, "ops_per_call": len(snippets), "calls": 500}
+
+    write_results(args.out, {
+        "kind": "micro",
+        "meta": run_metadata(),
+        "config": {"page_kb": args.page_kb, "html_dir": args.html_dir},
+        "benchmarks": benchmarks,
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""In-memory Redis-protocol stand-in for testing the redis:// cache backend.
+
+Speaks enough RESP2 for ``RedisBackend``: PING, GET, SET (with EX/PX),
+DEL, DBSIZE, FLUSHALL, SELECT and AUTH (accepted without checking). Keys
+expire lazily on access. Start it, then share one cache between workers:
+
+    python -m benchmarks.resp_stub --port 6380
+    CACHE_BACKEND=redis://127.0.0.1:6380/0 uvicorn backend.app:app --workers 4
+"""
+import argparse
+import asyncio
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class RespStandIn:
+    def __init__(self):
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.commands = 0
+
+    def _live(self, key: bytes) -> Optional[bytes]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, args: List[bytes]) -> bytes:
+        self.commands += 1
+        name = args[0].upper() if args else b""
+        if name == b"PING":
+            return b"+PONG\r\n"
+        if name in (b"AUTH", b"SELECT"):
+            return b"+OK\r\n"
+        if name == b"GET" and len(args) == 2:
+            value = self._live(args[1])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if name == b"SET" and len(args) >= 3:
+            expires_at = None
+            options = [a.upper() for a in args[3:]]
+            for unit, scale in ((b"EX", 1.0), (b"PX", 0.001)):
+                if unit in options:
+                    expires_at = time.monotonic() + int(args[3 + options.index(unit) + 1]) * scale
+            self.data[args[1]] = (args[2], expires_at)
+            return b"+OK\r\n"
+        if name == b"DEL":
+            removed = sum(1 for key in args[1:] if self.data.pop(key, None) is not None)
+            return b":%d\r\n" % removed
+        if name == b"DBSIZE":
+            return b":%d\r\n" % len(self.data)
+        if name == b"FLUSHALL":
+            self.data.clear()
+            return b"+OK\r\n"
+        return b"-ERR unknown command\r\n"
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.startswith(b"*"):
+                    writer.write(b"-ERR protocol error\r\n")
+                    break
+                args = []
+                for _ in range(int(line[1:-2])):
+                    length = int((await reader.readline())[1:-2])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                writer.write(self.execute(args))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+def start_in_thread(host: str = "127.0.0.1", port: int = 0) -> Tuple[RespStandIn, int, threading.Event]:
+    """Serve a stand-in from a daemon thread; returns (stand-in, port, stop event)"""
+    stand_in = RespStandIn()
+    ready = threading.Event()
+    stop = threading.Event()
+    bound: List[int] = []
+
+    def run():
+        async def serve():
+            server = await asyncio.start_server(stand_in.handle, host, port)
+            bound.append(server.sockets[0].getsockname()[1])
+            ready.set()
+            async with server:
+                while not stop.is_set():
+                    await asyncio.sleep(0.05)
+
+        asyncio.run(serve())
+
+    threading.Thread(target=run, name="resp-stand-in", daemon=True).start()
+    ready.wait(5)
+    return stand_in, bound[0], stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-memory Redis-protocol stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    args = parser.parse_args()
+
+    async def serve():
+        server = await asyncio.start_server(RespStandIn().handle, args.host, args.port)
+        print(f"RESP stand-in listening on {args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
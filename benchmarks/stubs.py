@@ -0,0 +1,241 @@
+"""Offline stand-ins for Tavily and retailer product pages.
+
+``create_tavily_app`` replays recorded Tavily responses
+(benchmarks/data/tavily/*.json) and ``create_shop_app`` serves product pages
+rendered from HTML templates (benchmarks/data/pages/*.html). Both accept a
+``FaultProfile`` to add latency, errors and hung requests, so the /dupes
+pipeline can be exercised and load-tested without network access.
+
+Run both servers, then point the backend at them:
+
+    python -m benchmarks.stubs --tavily-port 8100 --shop-port 8101 --shop-latency-ms 150
+    TAVILY_API_KEY=offline TAVILY_API_URL=http://127.0.0.1:8100/search \\
+        HTTP_RESOLVE='*=127.0.0.1' uvicorn backend.app:app --port 8000
+
+With ``shop_port`` set, the Tavily stand-in rewrites result URLs to
+``http://<original host>:<shop_port>/...``. ``HTTP_RESOLVE`` makes the
+backend connect every host to 127.0.0.1, so retailer hosts (and their scoring
+and per-host limits) are kept while all pages come from the fixture server.
+"""
+import argparse
+import asyncio
+import copy
+import glob
+import json
+import os
+import random
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+TAVILY_CORPUS = os.path.join(DATA_DIR, "tavily")
+PAGE_TEMPLATES = os.path.join(DATA_DIR, "pages")
+
+
+@dataclass
+class FaultProfile:
+    """Latency and failure injection for a stand-in server.
+
+    Every request waits ``latency_ms`` plus up to ``jitter_ms``. A fraction
+    ``error_rate`` of requests then fails with ``error_status``, and a fraction
+    ``hang_rate`` stalls for ``hang_seconds`` (to trip client timeouts).
+    """
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    hang_rate: float = 0.0
+    hang_seconds: float = 30.0
+    seed: Optional[int] = None
+    _rng: random.Random = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+
+    async def apply(self) -> Optional[Response]:
+        """Sleep for the injected latency; return an error response if this request should fail"""
+        delay = (self.latency_ms + self._rng.uniform(0, self.jitter_ms)) / 1000
+        if delay > 0:
+            await asyncio.sleep(delay)
+        roll = self._rng.random()
+        if roll < self.hang_rate:
+            await asyncio.sleep(self.hang_seconds)
+        elif roll < self.hang_rate + self.error_rate:
+            return JSONResponse({"detail": "injected failure"}, status_code=self.error_status)
+        return None
+
+
+def _stable_pick(items: list, key: str):
+    return items[zlib.crc32(key.encode("utf-8")) % len(items)]
+
+
+def load_tavily_corpus(path: str = TAVILY_CORPUS) -> List[dict]:
+    recordings = []
+    for name in sorted(glob.glob(os.path.join(path, "*.json"))):
+        with open(name, encoding="utf-8") as f:
+            recordings.append(json.load(f))
+    if not recordings:
+        raise FileNotFoundError(f"No Tavily recordings in {path}")
+    return recordings
+
+
+def load_page_templates(path: str = PAGE_TEMPLATES) -> Dict[str, str]:
+    templates = {}
+    for name in sorted(glob.glob(os.path.join(path, "*.html"))):
+        with open(name, encoding="utf-8") as f:
+            templates[os.path.splitext(os.path.basename(name))[0]] = f.read()
+    if not templates:
+        raise FileNotFoundError(f"No page templates in {path}")
+    return templates
+
+
+def rewrite_url(url: str, port: int) -> str:
+    """Send a recorded product URL to the fixture server, keeping its host"""
+    parts = urlsplit(url)
+    if not parts.hostname:
+        return url
+    return urlunsplit(("http", f"{parts.hostname}:{port}", parts.path, parts.query, ""))
+
+
+def create_tavily_app(
+    recordings: Optional[List[dict]] = None,
+    faults: Optional[FaultProfile] = None,
+    shop_port: Optional[int] = None,
+) -> FastAPI:
+    """Tavily ``POST /search`` stand-in replaying recorded responses.
+
+    A recording whose ``query`` equals the request's is used if present;
+    otherwise one is picked deterministically from the query text.
+    """
+    recordings = recordings if recordings is not None else load_tavily_corpus()
+    by_query = {r.get("query"): r for r in recordings}
+    faults = faults or FaultProfile()
+    app = FastAPI(title="Tavily stand-in")
+    app.state.requests = 0
+
+    @app.post("/search")
+    async def search(request: Request):
+        app.state.requests += 1
+        payload = await request.json()
+        failure = await faults.apply()
+        if failure is not None:
+            return failure
+
+        query = payload.get("query") or ""
+        recording = by_query.get(query) or _stable_pick(recordings, query)
+        data = copy.deepcopy(recording)
+        data["query"] = query
+        data["results"] = data.get("results", [])[: int(payload.get("max_results") or 5)]
+        if shop_port:
+            for result in data["results"]:
+                result["url"] = rewrite_url(result["url"], shop_port)
+        if not payload.get("include_images"):
+            data["images"] = []
+        return data
+
+    return app
+
+
+def make_filler(page_kb: int) -> str:
+    """Navigation-style markup so pages are about as heavy as real retailer pages"""
+    chunks = []
+    size = 0
+    while size < page_kb * 1024:
+        n = len(chunks)
+        chunk = f'<li class="menu-item"><a href="/c/{n}">Category {n}</a><img src="/static/icon-{n}.svg" alt=""></li>\n'
+        chunks.append(chunk)
+        size += len(chunk)
+    return "".join(chunks)
+
+
+def render_page(template: str, host: str, path: str, filler: str = "") -> str:
+    digest = zlib.crc32(f"{host}{path}".encode("utf-8"))
+    slug = path.rstrip("/").rsplit("/", 1)[-1].split(".", 1)[0] or "product"
+    return (
+        template.replace("{{title}}", slug.replace("-", " ").title())
+        .replace("{{image}}", f"https://cdn.{host}/images/{digest:08x}.jpg")
+        .replace("{{price}}", f"{10 + digest % 90}.99")
+        .replace("{{filler}}", filler)
+    )
+
+
+def create_shop_app(
+    templates: Optional[Dict[str, str]] = None,
+    faults: Optional[FaultProfile] = None,
+    page_kb: int = 0,
+) -> FastAPI:
+    """Product-page fixture server; any host/path gets a page, chosen by a stable hash"""
+    templates = templates if templates is not None else load_page_templates()
+    names = sorted(templates)
+    faults = faults or FaultProfile()
+    filler = make_filler(page_kb)
+    app = FastAPI(title="Product page fixtures")
+    app.state.requests = 0
+
+    @app.get("/{path:path}")
+    async def page(path: str, request: Request):
+        app.state.requests += 1
+        failure = await faults.apply()
+        if failure is not None:
+            return failure
+        host = (request.headers.get("host") or "shop.example").split(":", 1)[0]
+        template = templates[_stable_pick(names, f"{host}/{path}")]
+        return HTMLResponse(render_page(template, host, "/" + path, filler))
+
+    return app
+
+
+def _fault_args(parser: argparse.ArgumentParser, prefix: str) -> None:
+    parser.add_argument(f"--{prefix}-latency-ms", type=float, default=0.0)
+    parser.add_argument(f"--{prefix}-jitter-ms", type=float, default=0.0)
+    parser.add_argument(f"--{prefix}-error-rate", type=float, default=0.0)
+    parser.add_argument(f"--{prefix}-hang-rate", type=float, default=0.0)
+
+
+def _faults(args: argparse.Namespace, prefix: str) -> FaultProfile:
+    return FaultProfile(
+        latency_ms=getattr(args, f"{prefix}_latency_ms"),
+        jitter_ms=getattr(args, f"{prefix}_jitter_ms"),
+        error_rate=getattr(args, f"{prefix}_error_rate"),
+        hang_rate=getattr(args, f"{prefix}_hang_rate"),
+        seed=args.seed,
+    )
+
+
+async def serve(args: argparse.Namespace) -> None:
+    import uvicorn
+
+    tavily = create_tavily_app(
+        load_tavily_corpus(args.tavily_corpus), _faults(args, "tavily"), shop_port=args.shop_port
+    )
+    shop = create_shop_app(load_page_templates(args.pages), _faults(args, "shop"), page_kb=args.page_kb)
+    servers = [
+        uvicorn.Server(uvicorn.Config(tavily, host=args.host, port=args.tavily_port, log_level="warning")),
+        uvicorn.Server(uvicorn.Config(shop, host=args.host, port=args.shop_port, log_level="warning")),
+    ]
+    print(f"Tavily stand-in on http://{args.host}:{args.tavily_port}/search")
+    print(f"Product pages on http://<any host>:{args.shop_port}/ (connect to {args.host})")
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Tavily and product-page stand-ins")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--tavily-port", type=int, default=8100)
+    parser.add_argument("--shop-port", type=int, default=8101)
+    parser.add_argument("--tavily-corpus", default=TAVILY_CORPUS)
+    parser.add_argument("--pages", default=PAGE_TEMPLATES)
+    parser.add_argument("--page-kb", type=int, default=200, help="approximate product page size")
+    parser.add_argument("--seed", type=int, default=None)
+    _fault_args(parser, "tavily")
+    _fault_args(parser, "shop")
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -12,9 +12,17 @@ source .venv/bin/activate
 # Export API key
 export TAVILY_API_KEY=$(grep TAVILY_API_KEY .env | cut -d '=' -f2)
 
-# Start backend
-echo "Starting backend on port 8000..."
-nohup uvicorn backend.app:app --port 8000 > backend.log 2>&1 &
+# Workers must agree on the key that signs /img thumbnail URLs
+export IMAGE_PROXY_SECRET=${IMAGE_PROXY_SECRET:-$(python3 -c 'import secrets; print(secrets.token_hex(16))')}
+
+# Start backend (WORKERS=4 ./start.sh for several processes; they share
+# caches through SQLite unless CACHE_BACKEND points elsewhere, e.g. redis://)
+WORKERS=${WORKERS:-1}
+if [ "$WORKERS" -gt 1 ]; then
+    export CACHE_BACKEND=${CACHE_BACKEND:-sqlite:///.cache/shared_cache.sqlite3}
+fi
+echo "Starting backend on port 8000 ($WORKERS worker(s))..."
+nohup uvicorn backend.app:app --port 8000 --workers "$WORKERS" > backend.log 2>&1 &
 BACKEND_PID=$!
 
 # Wait for backend to start
@@ -28,16 +36,10 @@ else
     exit 1
 fi
 
-# Start frontend
-echo "Starting frontend on port 5173..."
-cd frontend
-nohup python3 -m http.server 5173 > /dev/null 2>&1 &
-FRONTEND_PID=$!
-
-echo "✅ Frontend is running (PID: $FRONTEND_PID)"
+# The backend serves the frontend too (hashed, precompressed assets, same origin)
 echo ""
 echo "🎉 DupeFinder is ready!"
-echo "🌐 Open http://localhost:5173 in your browser"
+echo "🌐 Open http://localhost:8000 in your browser"
 echo ""
-echo "To stop the servers:"
-echo "  kill $BACKEND_PID $FRONTEND_PID"
+echo "To stop the server:"
+echo "  kill $BACKEND_PID"